@@ -0,0 +1,144 @@
+import glob
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+# Sigla da UF para cada nome de estado usado no cálculo.
+UF_POR_ESTADO = {
+    "Acre": "AC", "Alagoas": "AL", "Amapá": "AP", "Amazonas": "AM", "Bahia": "BA",
+    "Ceará": "CE", "Distrito Federal": "DF", "Espírito Santo": "ES", "Goiás": "GO",
+    "Maranhão": "MA", "Mato Grosso": "MT", "Mato Grosso do Sul": "MS", "Minas Gerais": "MG",
+    "Pará": "PA", "Paraíba": "PB", "Paraná": "PR", "Pernambuco": "PE", "Piauí": "PI",
+    "Rio de Janeiro": "RJ", "Rio Grande do Norte": "RN", "Rio Grande do Sul": "RS",
+    "Rondônia": "RO", "Roraima": "RR", "Santa Catarina": "SC", "São Paulo": "SP",
+    "Sergipe": "SE", "Tocantins": "TO",
+}
+
+
+def dias_ate_posicao(acumulado: np.ndarray, linhas: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    """Dias úteis do início do período até o dia `pos` (inclusive), na linha de calendário de cada posição."""
+    if not acumulado.shape[1]:
+        return np.zeros(len(linhas), dtype="int64")
+    return acumulado[linhas, pos]
+
+
+def dias_desde_posicao(acumulado: np.ndarray, uteis: np.ndarray, linhas: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    """Dias úteis do dia `pos` (inclusive) até o fim do período, na linha de calendário de cada posição."""
+    if not acumulado.shape[1]:
+        return np.zeros(len(linhas), dtype="int64")
+    return acumulado[linhas, -1] - acumulado[linhas, pos] + uteis[linhas, pos]
+
+
+class MonthCalendar:
+    """
+    Dias úteis acumulados de um período, uma linha por UF (a linha 0 é o
+    calendário nacional). Contagens de dias úteis entre datas viram consultas
+    vetorizadas nesses arrays.
+    """
+
+    def __init__(self, ini: pd.Timestamp, fim: pd.Timestamp, ufs: list[str], feriados: dict[str | None, np.ndarray]):
+        self.ini = np.datetime64(pd.Timestamp(ini).date(), "D")
+        self.fim = np.datetime64(pd.Timestamp(fim).date(), "D")
+        self.ufs = [None] + [uf for uf in ufs if uf is not None]
+        dias = np.arange(self.ini, self.fim + 1, dtype="datetime64[D]")
+        uteis = np.vstack([np.is_busday(dias, holidays=feriados.get(uf, feriados[None])) for uf in self.ufs])
+        self.acumulado = np.cumsum(uteis, axis=1)
+        self.uteis = uteis
+
+    def linhas_uf(self, ufs) -> np.ndarray:
+        """Linha do calendário de cada UF (0, o nacional, para UF desconhecida ou vazia)."""
+        codigos = pd.Categorical(pd.Series(ufs, dtype=object), categories=self.ufs[1:]).codes
+        return codigos.astype("int64") + 1
+
+    def _dias(self, datas) -> tuple[np.ndarray, np.ndarray]:
+        dias = pd.Series(datas).to_numpy(dtype="datetime64[D]")
+        valido = ~np.isnat(dias) & (dias >= self.ini) & (dias <= self.fim)
+        return np.where(valido, (dias - self.ini).astype("int64"), 0), valido
+
+    def offsets(self, datas) -> np.ndarray:
+        """Dia de cada data contado a partir do início do período (-1 fora do período)."""
+        pos, valido = self._dias(datas)
+        return np.where(valido, pos, -1)
+
+    def total(self, ufs) -> np.ndarray:
+        """Dias úteis do período inteiro para cada UF."""
+        return self.acumulado[self.linhas_uf(ufs), -1] if self.acumulado.shape[1] else np.zeros(len(ufs), dtype="int64")
+
+    def dias_ate(self, datas, ufs) -> np.ndarray:
+        """Dias úteis do início do período até cada data (inclusive); 0 fora do período."""
+        pos, valido = self._dias(datas)
+        return np.where(valido, dias_ate_posicao(self.acumulado, self.linhas_uf(ufs), pos), 0)
+
+    def dias_desde(self, datas, ufs) -> np.ndarray:
+        """Dias úteis de cada data (inclusive) até o fim do período; 0 fora do período."""
+        pos, valido = self._dias(datas)
+        return np.where(valido, dias_desde_posicao(self.acumulado, self.uteis, self.linhas_uf(ufs), pos), 0)
+
+
+class BusinessCalendar:
+    """
+    Calendário de dias úteis com feriados nacionais, estaduais e municipais
+    lidos dos arquivos CSV (DATA;UF;MUNICIPIO;DESCRICAO) do diretório
+    configurado em `calendario.diretorio_feriados`. Linhas sem UF são
+    feriados nacionais; linhas com MUNICIPIO valem só para o município.
+    """
+
+    COLUNAS = ["DATA", "UF", "MUNICIPIO", "DESCRICAO"]
+
+    def __init__(self, feriados: pd.DataFrame | None = None):
+        if feriados is None or feriados.empty:
+            feriados = pd.DataFrame(columns=self.COLUNAS)
+        self.feriados = feriados
+        self._datas: dict[tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "BusinessCalendar":
+        cfg = config.get("calendario", {}) or {}
+        if not cfg.get("considerar_feriados", True):
+            return cls()
+        return cls(cls.load_feriados(cfg.get("diretorio_feriados", "feriados")))
+
+    @classmethod
+    def load_feriados(cls, diretorio: str) -> pd.DataFrame:
+        arquivos = sorted(glob.glob(os.path.join(diretorio, "*.csv")))
+        if not arquivos:
+            logging.warning(f"Calendário: nenhum arquivo de feriados em '{diretorio}'. Considerando apenas fins de semana.")
+            return pd.DataFrame(columns=cls.COLUNAS)
+        tabelas = [pd.read_csv(f, sep=";", dtype=str, keep_default_na=False, encoding="utf-8") for f in arquivos]
+        feriados = pd.concat(tabelas, ignore_index=True)
+        feriados["DATA"] = pd.to_datetime(feriados["DATA"], errors="coerce")
+        for col in ("UF", "MUNICIPIO"):
+            feriados[col] = feriados[col].str.strip().str.upper()
+        feriados = feriados.dropna(subset=["DATA"])
+        logging.info(f"Calendário: {len(feriados)} feriado(s) carregado(s) de {len(arquivos)} arquivo(s) em '{diretorio}'.")
+        return feriados
+
+    def datas_feriados(self, uf: str | None = None, municipio: str | None = None) -> np.ndarray:
+        """Feriados nacionais mais os da UF e, se informado, os do município (memoizado por UF e município)."""
+        chave = (uf.upper() if uf else None, municipio.upper() if uf and municipio else None)
+        if chave not in self._datas:
+            self._datas[chave] = self._filtrar_feriados(uf, municipio)
+        return self._datas[chave]
+
+    def _filtrar_feriados(self, uf: str | None, municipio: str | None) -> np.ndarray:
+        f = self.feriados
+        mask = f["UF"].eq("")
+        if uf:
+            mask |= f["UF"].eq(uf.upper()) & f["MUNICIPIO"].eq("")
+            if municipio:
+                mask |= f["UF"].eq(uf.upper()) & f["MUNICIPIO"].eq(municipio.upper())
+        return np.unique(f.loc[mask, "DATA"].to_numpy(dtype="datetime64[D]"))
+
+    def mes(self, ini: pd.Timestamp, fim: pd.Timestamp, ufs=()) -> MonthCalendar:
+        """Pré-calcula os dias úteis acumulados do período para o calendário nacional e cada UF."""
+        ufs = sorted({uf for uf in ufs if isinstance(uf, str)})
+        feriados = {None: self.datas_feriados()}
+        feriados.update({uf: self.datas_feriados(uf) for uf in ufs})
+        return MonthCalendar(ini, fim, ufs, feriados)
+
+    def dias_uteis(self, ini: pd.Timestamp, fim: pd.Timestamp, uf: str | None = None, municipio: str | None = None) -> int:
+        ini_d = np.datetime64(pd.Timestamp(ini).date(), "D")
+        fim_d = np.datetime64(pd.Timestamp(fim).date(), "D")
+        return int(np.busday_count(ini_d, fim_d + 1, holidays=self.datas_feriados(uf, municipio)))
@@ -0,0 +1,73 @@
+import numpy as np
+
+from .business_calendar import dias_ate_posicao, dias_desde_posicao
+from .money import dividir
+
+# Último dia do mês de eventos em que o desligamento zera o benefício.
+DIA_CORTE_DESLIGAMENTO = 15
+
+
+def calcular_beneficio(
+    dias_uteis_base: np.ndarray,
+    valor_unitario: np.ndarray,
+    adm_offset: np.ndarray,
+    des_offset: np.ndarray,
+    des_ok: np.ndarray,
+    ferias_dias: np.ndarray,
+    uteis: np.ndarray,
+    uf_linha: np.ndarray,
+    percentual_empresa=0.80,
+) -> dict[str, np.ndarray]:
+    """
+    Núcleo vetorizado do cálculo do benefício, só com arrays NumPy.
+
+    Os deslocamentos (`adm_offset`, `des_offset`) são o dia do mês de eventos
+    contado a partir de 0 (-1 quando não há evento no mês). `uteis` é a matriz
+    de dias úteis do mês de eventos (uma linha por calendário de UF) e
+    `uf_linha` a linha usada por cada colaborador.
+
+    Regras:
+    - Admitido no mês: proporcional aos dias úteis da admissão ao fim do mês.
+    - Desligado (comunicado OK) até o dia 15: benefício zerado.
+    - Desligado após o dia 15: proporcional aos dias úteis até a demissão
+      (`regras.pos15_regra` só muda o texto da observação).
+    - Dias de férias são descontados dos dias calculados.
+    - O total é dividido entre empresa (`percentual_empresa`) e colaborador
+      sem perder centavos (ver `money.dividir`).
+
+    Os valores monetários (`valor_unitario` e os totais) são centavos em int64.
+
+    `dias_uteis_base`, `valor_unitario` e `percentual_empresa` podem ter uma
+    dimensão extra à esquerda (uma linha por cenário); os demais arrays são
+    por colaborador e são propagados (broadcast) para todos os cenários.
+    """
+    n_dias = uteis.shape[1]
+    acumulado = np.cumsum(uteis, axis=1)
+    total = acumulado[uf_linha, -1] if n_dias else np.zeros(len(uf_linha), dtype="int64")
+    com_total = total > 0
+    divisor = np.maximum(total, 1)
+
+    adm = adm_offset >= 0
+    adm_pos = np.where(adm, adm_offset, 0)
+    dias_desde_adm = dias_desde_posicao(acumulado, uteis, uf_linha, adm_pos)
+    fator_adm = np.where(adm & com_total, dias_desde_adm / divisor, 1.0)
+
+    des = (des_offset >= 0) & des_ok
+    des_pos = np.where(des, des_offset, 0)
+    dias_ate_des = dias_ate_posicao(acumulado, uf_linha, des_pos)
+    fator_pos15 = np.where(com_total, dias_ate_des / divisor, 1.0)
+    ate_corte = des_pos + 1 <= DIA_CORTE_DESLIGAMENTO
+    fator_des = np.where(des, np.where(ate_corte, 0.0, fator_pos15), 1.0)
+
+    dias = np.round(dias_uteis_base * fator_adm * fator_des)
+    dias = np.clip(dias - ferias_dias, 0, None).astype("int64")
+    total_vr = dias * np.asarray(valor_unitario, dtype="int64")
+    empresa, colaborador = dividir(total_vr, percentual_empresa)
+    return {
+        "FATOR_ADMISSAO": fator_adm,
+        "FATOR_DESLIG": fator_des,
+        "DIAS_CALCULADOS": dias,
+        "VR_TOTAL": total_vr,
+        "EMPRESA_80": empresa,
+        "COLABORADOR_20": colaborador,
+    }
@@ -1,54 +1,127 @@
 
+import numpy as np
 import pandas as pd
 import logging
 import unicodedata
 
+from .business_calendar import BusinessCalendar
+from .calc_kernel import calcular_beneficio
 from .context import Contexto
+from .matricula_index import MatriculaIndex
+from .money import dividir, para_centavos
+from .schema import ensure_datetime
+from .sindicato_resolver import ESTADO_POR_UF, SindicatoResolver
 
 class CalculatorAgent:
     """
     Agente que realiza todos os cálculos de valores e dias.
     """
 
-    def _infer_estado_from_sindicato(self, s: str):
-        if not isinstance(s, str):
-            return None
-        S = s.upper()
-        if " SP " in f" {S} " or S.endswith(" SP") or S.startswith("SINDPD SP"):
-            return "São Paulo"
-        if " RJ " in f" {S} " or S.endswith(" RJ"):
-            return "Rio de Janeiro"
-        if " RS " in f" {S} " or S.endswith(" RS"):
-            return "Rio Grande do Sul"
-        if " PR " in f" {S} " or S.endswith(" PR") or S.startswith("SITEPD PR"):
-            return "Paraná"
-        return None
-
-    def _gerar_observacoes(self, row: pd.Series, bases: dict, ctx: Contexto) -> str:
+    MOTORES = ("vetorizado", "legado")
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.calendario = BusinessCalendar.from_config(config)
+        self.sindicatos = SindicatoResolver.from_config(config)
+        self.motor = (config.get("processamento", {}) or {}).get("motor_calculo", "vetorizado")
+        if self.motor not in self.MOTORES:
+            raise ValueError(f"Motor de cálculo desconhecido em config.yaml: '{self.motor}'. Use um de {self.MOTORES}.")
+        self.entradas = {}
+
+    def _gerar_observacoes(self, row: pd.Series, ctx: Contexto) -> str:
+        """
+        Observação de uma única linha. Mantida como referência da versão
+        vetorizada (`_montar_observacoes`), usada nos testes e no benchmark.
+        """
         parts = []
         if pd.notna(row.get("ADMISSAO")) and row.get("FATOR_ADMISSAO", 1.0) < 1.0:
             parts.append(f"Admitido em {pd.Timestamp(row['ADMISSAO']).date().isoformat()} (proporcional)")
         if row.get("FERIAS_DIAS", 0) > 0:
             parts.append(f"Férias {int(row['FERIAS_DIAS'])} dia(s)")
 
-        des_df = bases.get("DESLIGADOS", pd.DataFrame())
-        if not des_df.empty and pd.notna(row["MATRICULA"]):
-            des_info = des_df[des_df["MATRICULA"] == row["MATRICULA"]]
-            if not des_info.empty:
-                info = des_info.iloc[0]
-                d = info.get("DATA DEMISSÃO")
-                ok = info.get("OK")
-                if pd.notna(d) and ok:
-                    if d.day <= 15:
-                        parts.append(f"Desligado em {d.date().isoformat()} (OK até dia 15)")
-                    elif d.day >= 16:
-                        if ctx.pos15_regra == "integral":
-                            parts.append(f"Desligado em {d.date().isoformat()} (>15) - compra integral, ajuste em rescisão")
-                        else:
-                            parts.append(f"Desligado em {d.date().isoformat()} (>15) - pró-rata no período")
+        d = row.get("DATA DEMISSÃO")
+        ok = row.get("DESLIG_OK")
+        if pd.notna(d) and pd.notna(ok) and ok:
+            if d.day <= 15:
+                parts.append(f"Desligado em {d.date().isoformat()} (OK até dia 15)")
+            elif d.day >= 16:
+                if ctx.pos15_regra == "integral":
+                    parts.append(f"Desligado em {d.date().isoformat()} (>15) - compra integral, ajuste em rescisão")
+                else:
+                    parts.append(f"Desligado em {d.date().isoformat()} (>15) - pró-rata no período")
         return " | ".join(parts)
 
-    def execute(self, base_elegiveis: pd.DataFrame, bases: dict, ctx: Contexto) -> pd.DataFrame:
+    def _montar_observacoes(self, base: pd.DataFrame, des_data: pd.Series, des_ok: pd.Series, ctx: Contexto) -> pd.Series:
+        """
+        Monta a coluna OBS GERAL por colunas: cada fragmento (admissão, férias,
+        desligamento) é uma coluna de texto calculada só nas linhas em que se
+        aplica, e os fragmentos não vazios são unidos por " | ".
+        """
+        adm = ensure_datetime(base["ADMISSAO"])
+        des_data = ensure_datetime(des_data)
+        mask_adm = (adm.notna() & (base["FATOR_ADMISSAO"] < 1.0)).to_numpy()
+        mask_fer = (base["FERIAS_DIAS"] > 0).to_numpy()
+        mask_des = (des_data.notna() & des_ok.eq(True)).to_numpy()
+
+        if ctx.pos15_regra == "integral":
+            sufixo_pos15 = " (>15) - compra integral, ajuste em rescisão"
+        else:
+            sufixo_pos15 = " (>15) - pró-rata no período"
+
+        fragmentos = [
+            (mask_adm, lambda m: "Admitido em " + adm[m].dt.strftime("%Y-%m-%d") + " (proporcional)"),
+            (mask_fer, lambda m: "Férias " + base["FERIAS_DIAS"][m].astype("int64").astype(str) + " dia(s)"),
+            (mask_des, lambda m: "Desligado em " + des_data[m].dt.strftime("%Y-%m-%d")
+                + np.where(des_data[m].dt.day <= 15, " (OK até dia 15)", sufixo_pos15)),
+        ]
+
+        obs = np.full(len(base), "", dtype=object)
+        for mask, fragmento in fragmentos:
+            if not mask.any():
+                continue
+            texto = fragmento(mask).to_numpy(dtype=object)
+            anterior = obs[mask]
+            obs[mask] = np.where(anterior != "", anterior + " | " + texto, texto)
+        return pd.Series(obs, index=base.index, dtype=object)
+
+    def _calcular_legado(self, base: pd.DataFrame, des_data: pd.Series, des_ok: pd.Series, ufs: pd.Series, ctx: Contexto) -> None:
+        """
+        Cálculo linha a linha dos fatores e valores (implementação anterior ao
+        núcleo vetorizado de `calc_kernel`). Mantido como referência para o
+        teste diferencial; selecionado com `processamento.motor_calculo: legado`.
+        """
+        ini, fim = ctx.periodo_eventos_ini, ctx.periodo_eventos_fim
+
+        def dias_uteis(d_ini, d_fim, uf):
+            return self.calendario.dias_uteis(d_ini, d_fim, uf if isinstance(uf, str) else None)
+
+        def fator_adm(d, uf):
+            dias_uteis_eventos = dias_uteis(ini, fim, uf)
+            if pd.isna(d) or d < ini or d > fim:
+                return 1.0
+            dias_trabalhados = dias_uteis(d, fim, uf)
+            return dias_trabalhados / dias_uteis_eventos if dias_uteis_eventos else 1.0
+        base["FATOR_ADMISSAO"] = [fator_adm(d, uf) for d, uf in zip(base["ADMISSAO"], ufs)]
+
+        def fator_deslig(d, ok, uf):
+            if pd.notna(d) and pd.notna(ok) and ok and (d >= ini and d <= fim):
+                if d.day <= 15:
+                    return 0.0  # Regra: Demitido no mês de eventos até dia 15 -> benefício zerado.
+                # Regra do PDF: Demitido após dia 15 -> benefício proporcional.
+                dias_uteis_eventos = dias_uteis(ini, fim, uf)
+                dias_trabalhados = dias_uteis(ini, d, uf)
+                return dias_trabalhados / dias_uteis_eventos if dias_uteis_eventos else 1.0
+            return 1.0
+        base["FATOR_DESLIG"] = [fator_deslig(d, ok, uf) for d, ok, uf in zip(des_data, des_ok, ufs)]
+
+        base["DIAS_CALCULADOS"] = (base["DIAS_UTEIS_BASE"] * base["FATOR_ADMISSAO"] * base["FATOR_DESLIG"]).round()
+        # A regra de "exclusão parcial" de férias implica em subtrair os dias.
+        base["DIAS_CALCULADOS"] = (base["DIAS_CALCULADOS"] - base["FERIAS_DIAS"]).clip(lower=0).astype(int)
+
+        base["VR_TOTAL"] = base["DIAS_CALCULADOS"].astype("int64") * base["VALOR_UNITARIO"]
+        base["EMPRESA_80"], base["COLABORADOR_20"] = dividir(base["VR_TOTAL"].to_numpy(), 0.80)
+
+    def execute(self, base_elegiveis: pd.DataFrame, bases: dict, ctx: Contexto, index: MatriculaIndex | None = None) -> pd.DataFrame:
         logging.info("Agente de Cálculo: Iniciando processamento matemático com lógica Mês Fechado.")
         if base_elegiveis.empty:
             logging.warning("Agente de Cálculo: Base de elegíveis está vazia. Nenhum cálculo a ser feito.")
@@ -57,71 +130,71 @@ class CalculatorAgent:
         base = base_elegiveis.copy()
 
         # --- Etapa 1: Mapeamento Inteligente de Dias Úteis e Valores ---
-        base["ESTADO"] = base["SINDICATO"].apply(self._infer_estado_from_sindicato)
+        ufs = self.sindicatos.ufs(base["SINDICATO"])
+        base["ESTADO"] = ufs.map(ESTADO_POR_UF)
 
-        # Mapeia dias úteis por estado, de forma robusta
+        # Mapeia dias úteis por estado (a última linha de cada UF prevalece)
         du = bases.get("DIAS_UTEIS", pd.DataFrame())
         estado_dias_map = {}
         if not du.empty:
-            for _, row in du.iterrows():
-                estado = self._infer_estado_from_sindicato(row.get('SINDICATO'))
-                if estado:
-                    estado_dias_map[estado] = row.get('DIAS_UTEIS')
+            du_ufs = self.sindicatos.ufs(du["SINDICATO"])
+            estado_dias_map = dict(zip(du_ufs[du_ufs.notna()].map(ESTADO_POR_UF), du["DIAS_UTEIS"][du_ufs.notna()]))
         base["DIAS_UTEIS_BASE"] = base["ESTADO"].map(estado_dias_map).fillna(0).astype(int)
+        if du.empty:
+            # Sem a planilha de dias úteis, deriva os dias do mês do benefício pelo calendário da UF
+            mes_beneficio = self.calendario.mes(ctx.periodo_beneficio_ini, ctx.periodo_beneficio_fim, ufs)
+            base["DIAS_UTEIS_BASE"] = np.where(ufs.notna(), mes_beneficio.total(ufs), 0)
+            logging.info("Agente de Cálculo: Base de dias úteis ausente; DIAS_UTEIS_BASE derivado do calendário de feriados.")
 
-        # Mapeia valor do VR por estado
+        # Mapeia valor do VR por estado (em centavos)
         sv = bases.get("SIND_VALOR", pd.DataFrame())
         val_map = sv.set_index("ESTADO")["VALOR"].to_dict() if not sv.empty else {}
-        base["VALOR_UNITARIO"] = base["ESTADO"].map(val_map).fillna(0)
+        base["VALOR_UNITARIO"] = para_centavos(base["ESTADO"].map(val_map).astype("float64"))
         logging.info(f"Agente de Cálculo: {base['ESTADO'].isna().sum()} colaboradores sem ESTADO inferido.")
         logging.info(f"Agente de Cálculo: {base[base['DIAS_UTEIS_BASE'] == 0].shape[0]} colaboradores com DIAS_UTEIS_BASE = 0.")
         logging.info(f"Agente de Cálculo: {base[base['VALOR_UNITARIO'] == 0].shape[0]} colaboradores com VALOR_UNITARIO = 0.")
 
-        # Mapeia férias e admissões
-        fer_map = bases.get("FERIAS", pd.DataFrame()).groupby("MATRICULA")["DIAS DE FÉRIAS"].sum()
-        base["FERIAS_DIAS"] = base["MATRICULA"].map(fer_map).fillna(0).astype(int)
-        adm_map = bases.get("ADMISSAO", pd.DataFrame()).set_index("MATRICULA")["ADMISSAO"]
-        base["ADMISSAO"] = base["MATRICULA"].map(adm_map)
+        # Mapeia férias, admissões e desligamentos pelo índice de matrículas
+        if index is None:
+            index = MatriculaIndex(bases)
+        codigos = index.codigos_de(base["MATRICULA"])
+        base["FERIAS_DIAS"] = index.soma("FERIAS", "DIAS DE FÉRIAS", codigos).astype(int)
+        base["ADMISSAO"] = index.valores("ADMISSAO", "ADMISSAO", codigos, index=base.index)
+        des_data = index.valores("DESLIGADOS", "DATA DEMISSÃO", codigos, index=base.index)
+        des_ok = index.valores("DESLIGADOS", "OK", codigos, index=base.index)
 
         # --- Etapa 2: Calcular Fatores de Ajuste com base no Mês de Eventos ---
-        dias_uteis_eventos = pd.bdate_range(ctx.periodo_eventos_ini, ctx.periodo_eventos_fim).size
-        logging.info(f"Agente de Cálculo: Dias úteis no mês de eventos ({ctx.periodo_eventos_ini.strftime('%Y-%m-%d')} a {ctx.periodo_eventos_fim.strftime('%Y-%m-%d')}): {dias_uteis_eventos}")
+        mes_eventos = self.calendario.mes(ctx.periodo_eventos_ini, ctx.periodo_eventos_fim, ufs)
+        logging.info(f"Agente de Cálculo: Dias úteis no mês de eventos ({ctx.periodo_eventos_ini.strftime('%Y-%m-%d')} a {ctx.periodo_eventos_fim.strftime('%Y-%m-%d')}): {int(mes_eventos.total([None])[0])} (calendário nacional)")
 
-        def fator_adm(d):
-            if pd.isna(d) or d < ctx.periodo_eventos_ini or d > ctx.periodo_eventos_fim:
-                return 1.0
-            dias_trabalhados = pd.bdate_range(d, ctx.periodo_eventos_fim).size
-            return dias_trabalhados / dias_uteis_eventos if dias_uteis_eventos else 1.0
-        base["FATOR_ADMISSAO"] = base["ADMISSAO"].apply(fator_adm)
-
-        des_map = bases.get("DESLIGADOS", pd.DataFrame()).set_index("MATRICULA").to_dict('index')
-        def fator_deslig(row):
-            info = des_map.get(row["MATRICULA"])
-            if not info: return 1.0
-            d, ok = info.get("DATA DEMISSÃO"), info.get("OK")
-            if pd.notna(d) and ok and (d >= ctx.periodo_eventos_ini and d <= ctx.periodo_eventos_fim):
-                if d.day <= 15:
-                    return 0.0  # Regra: Demitido no mês de eventos até dia 15 -> benefício zerado.
-                else: # d.day > 15
-                    # Regra do PDF: Demitido após dia 15 -> benefício proporcional.
-                    dias_trabalhados = pd.bdate_range(ctx.periodo_eventos_ini, d).size
-                    return dias_trabalhados / dias_uteis_eventos if dias_uteis_eventos else 1.0
-            return 1.0
-        base["FATOR_DESLIG"] = base.apply(fator_deslig, axis=1)
+        adm = ensure_datetime(base["ADMISSAO"])
+        des_data = ensure_datetime(des_data)
 
         # --- Etapa 3: Cálculo Final ---
-        base["DIAS_CALCULADOS"] = (base["DIAS_UTEIS_BASE"] * base["FATOR_ADMISSAO"] * base["FATOR_DESLIG"]).round()
-        # A regra de "exclusão parcial" de férias implica em subtrair os dias.
-        base["DIAS_CALCULADOS"] = (base["DIAS_CALCULADOS"] - base["FERIAS_DIAS"]).clip(lower=0).astype(int)
-        
-        base["VR_TOTAL"] = (base["DIAS_CALCULADOS"] * base["VALOR_UNITARIO"]).round(2)
-        base["EMPRESA_80"] = (base["VR_TOTAL"] * 0.80).round(2)
-        base["COLABORADOR_20"] = (base["VR_TOTAL"] * 0.20).round(2)
+        # Entradas do núcleo guardadas para a simulação de cenários (ScenarioEngine)
+        self.entradas = {
+            "dias_uteis_base": base["DIAS_UTEIS_BASE"].to_numpy(dtype="int64"),
+            "valor_unitario": base["VALOR_UNITARIO"].to_numpy(dtype="int64"),
+            "adm_offset": mes_eventos.offsets(adm),
+            "des_offset": mes_eventos.offsets(des_data),
+            "des_ok": des_ok.eq(True).to_numpy(dtype=bool),
+            "ferias_dias": base["FERIAS_DIAS"].to_numpy(dtype="int64"),
+            "uteis": mes_eventos.uteis,
+            "uf_linha": mes_eventos.linhas_uf(ufs),
+            "ufs": ufs.to_numpy(dtype=object),
+            "sindicatos": base["SINDICATO"].to_numpy(dtype=object),
+        }
+        if self.motor == "legado":
+            self._calcular_legado(base, des_data, des_ok, ufs, ctx)
+        else:
+            parametros = {k: v for k, v in self.entradas.items() if k not in ("ufs", "sindicatos")}
+            for coluna, valores in calcular_beneficio(**parametros).items():
+                base[coluna] = valores
 
         logging.info(f"Agente de Cálculo: {base[base['DIAS_CALCULADOS'] == 0].shape[0]} colaboradores com DIAS_CALCULADOS = 0 após ajustes.")
         logging.info(f"Agente de Cálculo: {base[base['VR_TOTAL'] == 0].shape[0]} colaboradores com VR_TOTAL = 0.")
 
-        base["OBS GERAL"] = base.apply(lambda row: self._gerar_observacoes(row, bases, ctx), axis=1)
+        base["OBS GERAL"] = self._montar_observacoes(base, des_data, des_ok, ctx)
 
         logging.info("Agente de Cálculo: Processamento matemático finalizado.")
         return base
@@ -1,9 +1,55 @@
-
 import pandas as pd
+import numpy as np
+import openpyxl
+from openpyxl.cell.cell import ERROR_CODES
+from pandas.io.parsers import TextParser
 import logging
 import os
 import glob
 import unicodedata
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .ingest_cache import IngestCache
+from .schema import SchemaRegistry, memory_bytes
+
+# Extensões aceitas, da leitura mais rápida para a mais lenta. Quando mais de um
+# arquivo corresponde ao mesmo padrão de nome, o de formato mais rápido é usado.
+INPUT_EXTENSIONS = (".parquet", ".csv", ".xlsx")
+
+# Variações de nomes de colunas aceitas para cada coluna padronizada.
+COLUMN_MAP = {
+    "MATRICULA": ["MATRICULA", "CHAPA", "CADASTRO"],
+    "TITULO DO CARGO": ["TITULO DO CARGO", "CARGO"],
+    "SINDICATO": ["SINDICATO", "SINDICATO DO COLABORADOR"],
+    "DATA DEMISSÃO": ["DATA DEMISSÃO", "DATA DEMISSAO", "DEMISSAO"],
+    "COMUNICADO DE DESLIGAMENTO": ["COMUNICADO DE DESLIGAMENTO", "COMUNICADO"],
+    "DIAS DE FÉRIAS": ["DIAS DE FÉRIAS", "DIAS DE FERIAS", "FERIAS DIAS"],
+    "ADMISSAO": ["ADMISSAO", "ADMISSÃO", "DATA DE ADMISSÃO", "DATA ADMISSAO"],
+    "DIAS_UTEIS": ["DIAS_UTEIS", "DIAS UTEIS"],
+    "ESTADO": ["ESTADO", "UF"],
+    "VALOR": ["VALOR", "VALOR DIARIO", "VALOR DIÁRIO"]
+}
+
+def _load_base_worker(config: dict, input_dir: str, config_key: str, use_cache: bool) -> tuple[pd.DataFrame, str, dict]:
+    """
+    Ponto de entrada dos processos do pool de coleta paralela.
+    """
+    return CollectorAgent(config)._load_base(input_dir, config_key, use_cache)
+
+def _convert_cell(value):
+    """
+    Converte o valor de uma célula como o leitor openpyxl do pandas faz,
+    para que a inferência de tipos seja a mesma de `pd.ExcelFile.parse`.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        as_int = int(value)
+        return as_int if as_int == value else value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return np.nan
+    return value
 
 class CollectorAgent:
     """
@@ -18,47 +64,83 @@ class CollectorAgent:
             'estagio': 'ESTAGIO', 'exterior': 'EXTERIOR', 'dias_uteis': 'DIAS_UTEIS',
             'sind_valor': 'SIND_VALOR'
         }
+        self.cache = IngestCache.from_config(config)
+        self.schemas = SchemaRegistry.from_config(config)
+        self.cache_status = {}
+        self.memory_report = {}
+
+    def _normalize_name(self, col) -> str:
+        """
+        Normaliza o nome de uma coluna para o nome padronizado do COLUMN_MAP.
+        """
+        inverted_map = {var.upper(): standard for standard, variations in COLUMN_MAP.items() for var in variations}
+        normalized_col = str(col).strip().upper()
+        normalized_col = unicodedata.normalize('NFKD', normalized_col).encode('ascii', 'ignore').decode('utf-8')
+        return inverted_map.get(normalized_col, normalized_col)
 
     def _normalize_cols(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Normaliza as colunas de um DataFrame.
         """
         df = df.copy()
-        column_map = {
-            "MATRICULA": ["MATRICULA", "CHAPA", "CADASTRO"],
-            "TITULO DO CARGO": ["TITULO DO CARGO", "CARGO"],
-            "SINDICATO": ["SINDICATO", "SINDICATO DO COLABORADOR"],
-            "DATA DEMISSÃO": ["DATA DEMISSÃO", "DATA DEMISSAO", "DEMISSAO"],
-            "COMUNICADO DE DESLIGAMENTO": ["COMUNICADO DE DESLIGAMENTO", "COMUNICADO"],
-            "DIAS DE FÉRIAS": ["DIAS DE FÉRIAS", "DIAS DE FERIAS", "FERIAS DIAS"],
-            "ADMISSAO": ["ADMISSAO", "ADMISSÃO", "DATA DE ADMISSÃO", "DATA ADMISSAO"],
-            "DIAS_UTEIS": ["DIAS_UTEIS", "DIAS UTEIS"],
-            "ESTADO": ["ESTADO", "UF"],
-            "VALOR": ["VALOR", "VALOR DIARIO", "VALOR DIÁRIO"]
-        }
-        inverted_map = {var.upper(): standard for standard, variations in column_map.items() for var in variations}
-        new_columns = []
-        for col in df.columns:
-            normalized_col = str(col).strip().upper()
-            normalized_col = unicodedata.normalize('NFKD', normalized_col).encode('ascii', 'ignore').decode('utf-8')
-            if normalized_col in inverted_map:
-                new_columns.append(inverted_map[normalized_col])
-            else:
-                new_columns.append(normalized_col)
-        df.columns = new_columns
+        df.columns = [self._normalize_name(col) for col in df.columns]
         return df
 
-    def _read(self, input_dir: str, name_like: str, sheet_hint: str | None = None) -> tuple[pd.DataFrame, str | None]:
+    def _projection(self, config_key: str) -> tuple[list[str], list[str]] | None:
         """
-        Lê um arquivo Excel que corresponde a um padrão de nome, garantindo que seja fechado.
-        Retorna o dataframe e o nome do arquivo lido.
+        Retorna as colunas obrigatórias e opcionais declaradas para a base em
+        `colunas` no config.yaml, ou None quando a base deve ser lida por inteiro.
         """
-        matches = [p for p in glob.glob(os.path.join(input_dir, "*.xlsx")) if name_like.lower() in p.lower()]
-        if not matches:
-            raise FileNotFoundError(f"Arquivo contendo '{name_like}' não encontrado no diretório {input_dir}")
-        
-        file_path = matches[0]
-        logging.info(f"Lendo arquivo: {os.path.basename(file_path)} (para base: {name_like})")
+        spec = (self.config.get('colunas', {}) or {}).get(config_key)
+        if not spec:
+            return None
+        obrigatorias = [self._normalize_name(c) for c in spec.get('obrigatorias', [])]
+        opcionais = [self._normalize_name(c) for c in spec.get('opcionais', [])]
+        return obrigatorias, opcionais
+
+    def _find_file(self, input_dir: str, name_like: str) -> str:
+        """
+        Retorna o caminho do primeiro arquivo (.parquet, .csv ou .xlsx) cujo nome contém o padrão informado.
+        """
+        for ext in INPUT_EXTENSIONS:
+            matches = [p for p in glob.glob(os.path.join(input_dir, f"*{ext}")) if name_like.lower() in p.lower()]
+            if matches:
+                return matches[0]
+        raise FileNotFoundError(f"Arquivo contendo '{name_like}' não encontrado no diretório {input_dir}")
+
+    def _resolve_header(self, header, columns: tuple[list[str], list[str]], file_path: str) -> dict[str, int]:
+        """
+        Resolve os nomes do cabeçalho pelos aliases do COLUMN_MAP e retorna,
+        na ordem declarada, a posição de cada coluna projetada encontrada.
+        """
+        obrigatorias, opcionais = columns
+        positions = {}
+        for i, col in enumerate(header):
+            if col is None:
+                continue
+            name = self._normalize_name(col)
+            if name in obrigatorias or name in opcionais:
+                if name in positions:
+                    logging.warning(f"Coluna '{name}' repetida em {file_path}. Usando a primeira ocorrência.")
+                    continue
+                positions[name] = i
+        faltantes = [c for c in obrigatorias if c not in positions]
+        if faltantes:
+            logging.warning(f"Colunas obrigatórias ausentes em {file_path}: {faltantes}")
+        return {c: positions[c] for c in obrigatorias + opcionais if c in positions}
+
+    def _file_size(self, input_dir: str, name_like: str) -> int:
+        try:
+            return os.path.getsize(self._find_file(input_dir, name_like))
+        except FileNotFoundError:
+            return 0
+
+    def _read(self, file_path: str, sheet_hint: str | None = None, nrows: int | None = None) -> pd.DataFrame:
+        """
+        Lê a aba indicada de um arquivo Excel, garantindo que seja fechado.
+        Com `nrows`, lê apenas o cabeçalho e as primeiras linhas.
+        """
+        logging.info(f"Lendo arquivo: {os.path.basename(file_path)}")
         
         try:
             with pd.ExcelFile(file_path) as xl:
@@ -69,41 +151,296 @@ class CollectorAgent:
                     if sheet_hint:
                         logging.warning(f"Aba '{sheet_hint}' não encontrada em {file_path}. Usando a primeira aba: '{sheet_name}'.")
                 
-                df = xl.parse(sheet_name)
-            return df, os.path.basename(file_path)
+                return xl.parse(sheet_name, nrows=nrows)
+        except Exception as e:
+            logging.error(f"Falha ao ler o arquivo Excel {file_path}: {e}")
+            raise
+
+    def _read_projected(self, file_path: str, sheet_hint: str | None, columns: tuple[list[str], list[str]],
+                        nrows: int | None = None) -> pd.DataFrame:
+        """
+        Lê apenas as colunas declaradas de um arquivo Excel, percorrendo as linhas
+        em modo somente-leitura. Os nomes do cabeçalho são resolvidos pelos
+        aliases do COLUMN_MAP; o DataFrame já sai com as colunas normalizadas.
+        """
+        obrigatorias, opcionais = columns
+        logging.info(f"Lendo arquivo: {os.path.basename(file_path)} (colunas: {obrigatorias + opcionais})")
+
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            if sheet_hint and sheet_hint in wb.sheetnames:
+                sheet_name = sheet_hint
+            else:
+                sheet_name = wb.sheetnames[0]
+                if sheet_hint:
+                    logging.warning(f"Aba '{sheet_hint}' não encontrada em {file_path}. Usando a primeira aba: '{sheet_name}'.")
+            ws = wb[sheet_name]
+            ws.reset_dimensions()
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return pd.DataFrame()
+
+            positions = self._resolve_header(header, columns, file_path)
+            names = list(positions)
+            idx = list(positions.values())
+            data = [names]
+            last_row_with_data = 0
+            for row in rows:
+                # Uma linha conta como preenchida se qualquer célula (projetada ou não) tiver valor,
+                # para que o número de registros seja o mesmo da leitura completa.
+                if any(v is not None and v != "" for v in row):
+                    last_row_with_data = len(data)
+                width = len(row)
+                data.append([_convert_cell(row[i]) if i < width else "" for i in idx])
+                if nrows is not None and len(data) > nrows:
+                    break
         except Exception as e:
             logging.error(f"Falha ao ler o arquivo Excel {file_path}: {e}")
             raise
+        finally:
+            wb.close()
+
+        data = data[: last_row_with_data + 1]
+        if not names:
+            return pd.DataFrame(index=range(len(data) - 1))
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+
+    def _csv_options(self) -> dict:
+        """Opções de leitura dos CSVs (seção `entrada_csv` do config.yaml)."""
+        csv_cfg = self.config.get('entrada_csv', {}) or {}
+        return {
+            "sep": csv_cfg.get('separador', ","),
+            "encoding": csv_cfg.get('encoding', "utf-8"),
+            "decimal": csv_cfg.get('decimal', "."),
+            "chunksize": int(csv_cfg.get('linhas_por_bloco', 100_000)),
+            "dayfirst": csv_cfg.get('data_dia_primeiro', True),
+        }
 
-    
+    def _read_options(self, file_path: str) -> dict:
+        """Formato do arquivo e opções do leitor usado, para a chave do cache de coleta."""
+        ext = os.path.splitext(file_path)[1].lower()
+        return {"formato": ext, **(self._csv_options() if ext == ".csv" else {})}
 
-    def execute(self, input_dir: str) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+    def _read_csv(self, file_path: str, config_key: str, columns: tuple[list[str], list[str]] | None,
+                  nrows: int | None = None) -> tuple[pd.DataFrame, int]:
+        """
+        Lê um CSV em blocos. O cabeçalho é normalizado uma única vez e cada bloco
+        já é tipado antes da concatenação, limitando a memória ao tamanho tipado.
+        Retorna o DataFrame e a memória que os blocos ocupavam antes da tipagem.
+        """
+        opcoes = self._csv_options()
+        chunksize, dayfirst = opcoes.pop("chunksize"), opcoes.pop("dayfirst")
+        read_kwargs = opcoes
+        logging.info(f"Lendo arquivo: {os.path.basename(file_path)} (CSV em blocos de {chunksize} linhas)")
+
+        header = pd.read_csv(file_path, nrows=0, **read_kwargs).columns
+        if columns:
+            positions = self._resolve_header(list(header), columns, file_path)
+            names, usecols = list(positions), list(positions.values())
+        else:
+            names, usecols = [self._normalize_name(c) for c in header], None
+        if not names:
+            return pd.DataFrame(), 0
+
+        datas = [c for c, t in self.schemas.get(config_key).items() if t == "datetime" and c in names]
+        chunks, antes = [], 0
+        reader = pd.read_csv(
+            file_path, header=0, names=names if usecols is None else None, usecols=usecols,
+            chunksize=chunksize, nrows=nrows, **read_kwargs,
+        )
+        file_order = [positions[c] for c in names] if usecols is not None else None
+        for chunk in reader:
+            if usecols is not None:
+                # usecols devolve as colunas na ordem do arquivo; reordena para a ordem declarada.
+                by_pos = dict(zip(sorted(file_order), chunk.columns))
+                chunk = chunk[[by_pos[p] for p in file_order]]
+                chunk.columns = names
+            antes += memory_bytes(chunk)
+            for col in datas:
+                # Datas ISO (AAAA-MM-DD) são lidas como tal; as demais seguem o formato brasileiro.
+                iso = pd.to_datetime(chunk[col], errors="coerce", format="ISO8601")
+                chunk[col] = iso.fillna(pd.to_datetime(chunk[col].where(iso.isna()), errors="coerce", dayfirst=dayfirst))
+            chunks.append(self.schemas.apply(config_key, chunk))
+
+        if not chunks:
+            return pd.DataFrame(columns=names), 0
+        return self._concat_chunks(chunks), antes
+
+    def _concat_chunks(self, chunks: list[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatena blocos tipados preservando colunas categóricas (as categorias
+        de cada bloco são unificadas antes da concatenação).
+        """
+        for col in chunks[0].columns:
+            if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+                valores = set()
+                for chunk in chunks:
+                    valores.update(chunk[col].cat.categories)
+                categorias = pd.Index(sorted(valores, key=str))
+                for chunk in chunks:
+                    chunk[col] = chunk[col].cat.set_categories(categorias)
+        return pd.concat(chunks, ignore_index=True)
+
+    def _read_parquet(self, file_path: str, columns: tuple[list[str], list[str]] | None,
+                      nrows: int | None = None) -> pd.DataFrame:
+        """
+        Lê um arquivo Parquet, carregando apenas as colunas projetadas.
+        Com `nrows`, lê somente o primeiro lote de linhas.
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("A leitura de arquivos .parquet requer o pacote 'pyarrow' (pip install pyarrow).") from e
+
+        logging.info(f"Lendo arquivo: {os.path.basename(file_path)}")
+        header = pq.read_schema(file_path).names
+        positions = self._resolve_header(header, columns, file_path) if columns else None
+        selected = [header[i] for i in positions.values()] if positions is not None else None
+        if nrows is not None:
+            batch = next(pq.ParquetFile(file_path).iter_batches(batch_size=nrows, columns=selected), None)
+            df = batch.to_pandas() if batch is not None else pd.DataFrame(columns=selected or header)
+        else:
+            df = pd.read_parquet(file_path, columns=selected)
+        if positions is None:
+            return self._normalize_cols(df)
+        df.columns = list(positions)
+        return df
+
+    def _read_base(self, file_path: str, config_key: str, nrows: int | None = None) -> tuple[pd.DataFrame, tuple[int, int]]:
+        """
+        Lê, normaliza e tipa uma base conforme o formato do arquivo.
+        Retorna o dataframe e a memória antes/depois da tipagem.
+        """
+        sheet_hint = (self.config.get('sheets', {}) or {}).get(config_key)
+        columns = self._projection(config_key)
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == ".csv":
+            df, antes = self._read_csv(file_path, config_key, columns, nrows)
+            return df, (antes, memory_bytes(df))
+        if ext == ".parquet":
+            df = self._read_parquet(file_path, columns, nrows)
+        elif columns:
+            df = self._read_projected(file_path, sheet_hint, columns, nrows)
+        else:
+            df = self._normalize_cols(self._read(file_path, sheet_hint, nrows))
+        antes = memory_bytes(df)
+        df = self.schemas.apply(config_key, df)
+        return df, (antes, memory_bytes(df))
+
+    def _load_base(self, input_dir: str, config_key: str, use_cache: bool) -> tuple[pd.DataFrame, str, dict]:
+        """
+        Localiza, lê, normaliza e tipa uma base, consultando o cache de coleta.
+        Retorna o dataframe, o nome do arquivo e um dicionário com o status do
+        cache ('hit', 'miss' ou 'desativado') e a memória antes/depois da tipagem.
+        """
+        sheet_hint = self.config.get('sheets', {}).get(config_key)
+        columns = self._projection(config_key)
+        schema = self.schemas.get(config_key)
+        file_path = self._find_file(input_dir, self.config['arquivos_entrada'][config_key])
+        filename = os.path.basename(file_path)
+
+        if not (use_cache and self.cache.enabled):
+            df, memoria = self._read_base(file_path, config_key)
+            return df, filename, {"cache": "desativado", "memoria": memoria}
+
+        key = self.cache.key(file_path, sheet_hint, COLUMN_MAP, columns, schema, self._read_options(file_path))
+        df = self.cache.get(key)
+        if df is not None:
+            logging.info(f"Cache de coleta: '{filename}' carregado do cache.")
+            return df, filename, {"cache": "hit", "memoria": (None, memory_bytes(df))}
+
+        df, memoria = self._read_base(file_path, config_key)
+        self.cache.put(key, df)
+        return df, filename, {"cache": "miss", "memoria": memoria}
+
+    def _store_result(self, internal_key: str, load, bases: dict, file_report: dict) -> None:
+        """
+        Executa `load` e registra o resultado nas estruturas da coleta.
+        Arquivos ausentes resultam em uma base vazia marcada como "Não encontrado".
+        """
+        try:
+            df, filename, info = load()
+            bases[internal_key] = df
+            file_report[internal_key] = filename
+            self.cache_status[internal_key] = info["cache"]
+            self.memory_report[internal_key] = info["memoria"]
+        except FileNotFoundError as e:
+            logging.warning(str(e))
+            bases[internal_key] = pd.DataFrame()
+            file_report[internal_key] = "Não encontrado"
+
+    def sample(self, input_dir: str, nrows: int = 200) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+        """
+        Lê apenas o cabeçalho e as primeiras `nrows` linhas de cada base, sem
+        cache nem paralelismo. Usado pela pré-validação dos arquivos.
+        """
+        bases, file_report = {}, {}
+        for config_key, internal_key in self.key_map.items():
+            name_like = self.config['arquivos_entrada'].get(config_key)
+            if not name_like:
+                continue
+            try:
+                file_path = self._find_file(input_dir, name_like)
+            except FileNotFoundError:
+                bases[internal_key] = pd.DataFrame()
+                file_report[internal_key] = "Não encontrado"
+                continue
+            bases[internal_key] = self._read_base(file_path, config_key, nrows)[0]
+            file_report[internal_key] = os.path.basename(file_path)
+        return bases, file_report
+
+    def execute(self, input_dir: str, use_cache: bool = True) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
         """
         Executa o processo de coleta de dados.
         Retorna uma tupla contendo:
         - Dicionário de dataframes das bases.
         - Dicionário com o relatório de arquivos lidos.
+        O status do cache de cada base fica disponível em `self.cache_status` e a
+        memória ocupada antes/depois da tipagem em `self.memory_report`.
         """
         logging.info("Agente Coletor: Iniciando coleta de dados.")
         bases = {}
         file_report = {} # Initialize file_report
+        self.cache_status = {}
+        self.memory_report = {}
         file_map = self.config['arquivos_entrada']
-        sheet_map = self.config.get('sheets', {})
 
+        proc_cfg = self.config.get('processamento', {}) or {}
+        max_workers = int(proc_cfg.get('max_workers', 1) or 1)
+
+        jobs = {}
         for config_key, internal_key in self.key_map.items():
             name_like = file_map.get(config_key)
             if not name_like:
                 logging.warning(f"Arquivo para '{config_key}' não definido no config.yaml. Pulando.")
                 continue
-            try:
-                sheet_hint = sheet_map.get(config_key)
-                df, filename = self._read(input_dir, name_like, sheet_hint) # Unpack df and filename
-                bases[internal_key] = self._normalize_cols(df)
-                file_report[internal_key] = filename # Add filename to file_report
-            except FileNotFoundError as e:
-                logging.warning(str(e))
-                bases[internal_key] = pd.DataFrame()
-                file_report[internal_key] = "Não encontrado" # Add "Não encontrado" to file_report
+            jobs[internal_key] = config_key
+
+        workers = min(max_workers, len(jobs), os.cpu_count() or 1)
+        if proc_cfg.get('coleta_paralela', False) and workers > 1:
+            logging.info(f"Agente Coletor: Lendo {len(jobs)} bases em paralelo com {workers} processo(s).")
+            # Os maiores arquivos são submetidos primeiro, para que o tempo total
+            # fique próximo ao da leitura do maior arquivo.
+            ordem = sorted(jobs, key=lambda k: self._file_size(input_dir, file_map[jobs[k]]), reverse=True)
+            # "spawn": a coleta roda em uma thread do pipeline, e um fork do processo
+            # com outras threads ativas pode herdar travas (ex.: do logging) já tomadas
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                submitted = {
+                    internal_key: pool.submit(_load_base_worker, self.config, input_dir, jobs[internal_key], use_cache)
+                    for internal_key in ordem
+                }
+                futures = {internal_key: submitted[internal_key] for internal_key in jobs}
+                # Os resultados são consumidos na ordem do key_map para manter os relatórios estáveis.
+                for internal_key, future in futures.items():
+                    self._store_result(internal_key, future.result, bases, file_report)
+        else:
+            for internal_key, config_key in jobs.items():
+                self._store_result(
+                    internal_key,
+                    lambda: self._load_base(input_dir, config_key, use_cache),
+                    bases, file_report,
+                )
 
         logging.info("Agente Coletor: Coleta de dados finalizada.")
         return bases, file_report # Return bases and file_report
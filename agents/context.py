@@ -13,3 +13,18 @@ class Contexto:
     periodo_eventos_fim: pd.Timestamp
 
     competencia: pd.Timestamp
+
+    # Regra para desligamentos após o dia 15 ("integral" ou "pro-rata")
+    pos15_regra: str = "integral"
+
+
+def limite_data(valor, ctx: Contexto | None) -> pd.Timestamp | None:
+    """
+    Limite de data das regras do config.yaml (validacoes e elegibilidade): uma
+    data literal ou o nome de um atributo do Contexto (ex.: "periodo_eventos_ini").
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, str) and ctx is not None and hasattr(ctx, valor):
+        return pd.Timestamp(getattr(ctx, valor))
+    return pd.Timestamp(valor)
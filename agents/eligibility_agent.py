@@ -1,56 +1,130 @@
 
+import numpy as np
 import pandas as pd
 import logging
 import unicodedata
 
+from .context import Contexto, limite_data
+from .matricula_index import MatriculaIndex
+from .schema import ensure_datetime, ensure_int
+
 class EligibilityAgent:
     """
     Agente que aplica as regras de negócio para determinar quem é elegível.
+
+    As regras de exclusão são declaradas em `elegibilidade.exclusoes` no
+    config.yaml e compiladas em uma única máscara vetorizada. Cada regra ocupa
+    um bit de `MOTIVOS_EXCLUSAO`, registrado por colaborador em `self.exclusoes`
+    para auditoria de quem foi removido e por quê.
+
+    Tipos de regra suportados:
+    - cargo: `padrao` (regex) sobre o `coluna` (padrão: TITULO DO CARGO), sem acentos e em maiúsculas.
+    - base: matrículas presentes na `base` informada (coluna `coluna`, padrão MATRICULA).
+    - data: data de `coluna` na `base` (padrão ATIVOS) antes de `antes_de` e/ou depois de
+      `depois_de` (datas ou atributos do Contexto).
     """
 
+    TIPOS = ("cargo", "base", "data")
+    MAX_REGRAS = 32
+
+    # Regras usadas quando o config.yaml não declara `elegibilidade.exclusoes`.
+    REGRAS_PADRAO = [
+        {"nome": "DIRETOR", "tipo": "cargo", "padrao": "DIRETOR"},
+        {"nome": "APRENDIZ", "tipo": "base", "base": "APRENDIZ"},
+        {"nome": "ESTAGIO", "tipo": "base", "base": "ESTAGIO"},
+        {"nome": "AFASTAMENTOS", "tipo": "base", "base": "AFASTAMENTOS"},
+        {"nome": "EXTERIOR", "tipo": "base", "base": "EXTERIOR"},
+    ]
+
+    def __init__(self, config: dict | None = None):
+        regras = ((config or {}).get("elegibilidade", {}) or {}).get("exclusoes") or self.REGRAS_PADRAO
+        for regra in regras:
+            if regra.get("tipo") not in self.TIPOS:
+                raise ValueError(f"Regra de exclusão desconhecida em config.yaml: {regra}")
+        if len(regras) > self.MAX_REGRAS:
+            raise ValueError(f"No máximo {self.MAX_REGRAS} regras de exclusão são suportadas ({len(regras)} declaradas).")
+        self.regras = regras
+        self.motivos = [regra.get("nome", f"REGRA_{i}") for i, regra in enumerate(regras)]
+        self.exclusoes = pd.DataFrame(columns=["MATRICULA", "MOTIVOS_EXCLUSAO"])
+
     def _strip_accents_upper(self, s: str):
         if pd.isna(s):
             return s
         return unicodedata.normalize('NFKD', str(s)).encode('ascii','ignore').decode('utf-8').upper()
 
-    def execute(self, bases: dict) -> pd.DataFrame:
+    def descrever(self, mascara: int) -> list[str]:
+        """Nomes das regras presentes em uma máscara de `MOTIVOS_EXCLUSAO`."""
+        return [nome for bit, nome in enumerate(self.motivos) if int(mascara) >> bit & 1]
+
+    def resumo(self) -> dict[str, int]:
+        """Quantidade de colaboradores atingidos por regra na última execução."""
+        mascaras = self.exclusoes["MOTIVOS_EXCLUSAO"].to_numpy(dtype="uint32")
+        return {nome: int(((mascaras >> np.uint32(bit)) & 1).sum()) for bit, nome in enumerate(self.motivos)}
+
+    def _regra_cargo(self, regra, ativos, bases, index, codigos, ctx) -> np.ndarray:
+        coluna = regra.get("coluna", "TITULO DO CARGO")
+        if coluna not in ativos.columns:
+            return np.zeros(len(ativos), dtype=bool)
+        # Normaliza e testa o padrão uma vez por título distinto, depois expande para as linhas
+        posicoes, titulos = pd.factorize(ativos[coluna].astype(str))
+        normalizados = pd.Series([self._strip_accents_upper(t) for t in titulos], dtype="object")
+        casa = normalizados.str.contains(regra["padrao"], regex=True, na=False).to_numpy(dtype=bool)
+        return casa[posicoes] if len(casa) else np.zeros(len(ativos), dtype=bool)
+
+    def _regra_base(self, regra, ativos, bases, index, codigos, ctx) -> np.ndarray:
+        nome_base = regra["base"]
+        coluna = regra.get("coluna", "MATRICULA")
+        df_excl = bases.get(nome_base, pd.DataFrame())
+        if df_excl.empty or coluna not in df_excl.columns:
+            return np.zeros(len(ativos), dtype=bool)
+        if coluna == "MATRICULA":
+            return index.contem(nome_base, codigos)
+        return ativos["MATRICULA"].isin(ensure_int(df_excl[coluna]).dropna().unique()).to_numpy(dtype=bool)
+
+    def _regra_data(self, regra, ativos, bases, index, codigos, ctx) -> np.ndarray:
+        nome_base = regra.get("base", "ATIVOS")
+        coluna = regra["coluna"]
+        if nome_base == "ATIVOS":
+            if coluna not in ativos.columns:
+                return np.zeros(len(ativos), dtype=bool)
+            datas = ensure_datetime(ativos[coluna])
+        else:
+            datas = ensure_datetime(index.valores(nome_base, coluna, codigos, index=ativos.index))
+        mask = pd.Series(False, index=ativos.index)
+        antes_de, depois_de = limite_data(regra.get("antes_de"), ctx), limite_data(regra.get("depois_de"), ctx)
+        if antes_de is not None:
+            mask |= datas < antes_de
+        if depois_de is not None:
+            mask |= datas > depois_de
+        return mask.to_numpy(dtype=bool)
+
+    def execute(self, bases: dict, index: MatriculaIndex | None = None, ctx: Contexto | None = None) -> pd.DataFrame:
         """
         Filtra a base de ativos para retornar apenas os colaboradores elegíveis.
+        As exclusões por matrícula usam o índice compartilhado (construído aqui se não informado).
         """
         logging.info("Agente de Elegibilidade: Iniciando filtro de colaboradores.")
-        
+
         ativos = bases.get("ATIVOS", pd.DataFrame()).copy()
         if ativos.empty:
             logging.error("Base de ATIVOS está vazia. Não é possível encontrar elegíveis.")
+            self.exclusoes = pd.DataFrame(columns=["MATRICULA", "MOTIVOS_EXCLUSAO"])
             return pd.DataFrame()
-            
-        ativos["MATRICULA"] = pd.to_numeric(ativos["MATRICULA"], errors="coerce").astype("Int64")
-        
-        # 1. Remover Diretores
-        ativos["CARGO_UP"] = ativos["TITULO DO CARGO"].astype(str).apply(self._strip_accents_upper)
-        base_elegiveis = ativos[~ativos["CARGO_UP"].str.contains("DIRETOR", na=False)].copy()
-        logging.info(f"{len(ativos) - len(base_elegiveis)} diretores removidos.")
-
-        # 2. Remover outros grupos
-        excl_matriculas = []
-        grupos_para_excluir = {
-            "APRENDIZ": "MATRICULA",
-            "ESTAGIO": "MATRICULA",
-            "AFASTAMENTOS": "MATRICULA",
-            "EXTERIOR": "CADASTRO" # Note que a coluna é diferente aqui
-        }
-
-        for key, col_matricula in grupos_para_excluir.items():
-            df_excl = bases.get(key, pd.DataFrame())
-            if not df_excl.empty and col_matricula in df_excl.columns:
-                s = pd.to_numeric(df_excl[col_matricula], errors="coerce").dropna().astype(int)
-                matriculas = s.tolist()
-                if matriculas:
-                    logging.info(f"{len(matriculas)} colaboradores removidos da base '{key}'.")
-                    excl_matriculas.extend(matriculas)
-        
-        if excl_matriculas:
-            base_elegiveis = base_elegiveis[~base_elegiveis["MATRICULA"].isin(set(excl_matriculas))]
+
+        ativos["MATRICULA"] = ensure_int(ativos["MATRICULA"])
+        if index is None:
+            index = MatriculaIndex(bases)
+        codigos = index.codigos_de(ativos["MATRICULA"])
+
+        # Compila todas as regras em uma única máscara de bits por colaborador
+        mascaras = np.zeros(len(ativos), dtype="uint32")
+        for bit, regra in enumerate(self.regras):
+            atingidos = getattr(self, f"_regra_{regra['tipo']}")(regra, ativos, bases, index, codigos, ctx)
+            mascaras |= atingidos.astype("uint32") << np.uint32(bit)
+            logging.info(f"{int(atingidos.sum())} colaboradores atingidos pela regra de exclusão '{self.motivos[bit]}'.")
+
+        self.exclusoes = pd.DataFrame({"MATRICULA": ativos["MATRICULA"].to_numpy(), "MOTIVOS_EXCLUSAO": mascaras})
+        base_elegiveis = ativos[mascaras == 0]
 
         logging.info(f"Agente de Elegibilidade: Filtro finalizado. {len(base_elegiveis)} colaboradores são elegíveis.")
         return base_elegiveis
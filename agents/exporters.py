@@ -0,0 +1,166 @@
+import logging
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class CsvExporter:
+    """CSV no layout do relatório, escrito bloco a bloco no mesmo arquivo."""
+
+    extensao = ".csv"
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.separador = config.get("separador", ";")
+        self.decimal = config.get("decimal", ",")
+        self.encoding = config.get("encoding", "utf-8-sig")
+        self.formato_data = config.get("formato_data", "%d/%m/%Y")
+
+    def escrever(self, path: str, blocos: Iterable[pd.DataFrame], ctx=None) -> int:
+        linhas = 0
+        with open(path, "w", encoding=self.encoding, newline="") as f:
+            for bloco in blocos:
+                bloco.to_csv(
+                    f, sep=self.separador, decimal=self.decimal, index=False,
+                    header=linhas == 0, date_format=self.formato_data,
+                )
+                linhas += len(bloco)
+        return linhas
+
+
+class ParquetExporter:
+    """Parquet para análise, com um row group por bloco (requer pyarrow)."""
+
+    extensao = ".parquet"
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.compressao = config.get("compressao", "snappy")
+
+    def escrever(self, path: str, blocos: Iterable[pd.DataFrame], ctx=None) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("A exportação em .parquet requer o pacote 'pyarrow' (pip install pyarrow).") from e
+
+        linhas, writer = 0, None
+        try:
+            for bloco in blocos:
+                tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                if writer is None:
+                    # Categorias (e colunas vazias no primeiro bloco) viram texto para que
+                    # todos os blocos tenham o mesmo esquema
+                    esquema = pa.schema([
+                        f.with_type(f.type.value_type) if pa.types.is_dictionary(f.type)
+                        else f.with_type(pa.string()) if pa.types.is_null(f.type) else f
+                        for f in tabela.schema
+                    ])
+                    writer = pq.ParquetWriter(path, esquema, compression=self.compressao)
+                writer.write_table(tabela.cast(esquema))
+                linhas += len(bloco)
+        finally:
+            if writer is not None:
+                writer.close()
+        return linhas
+
+
+class FixedWidthExporter:
+    """
+    Arquivo texto de largura fixa no layout da operadora, definido em
+    `exportacao.largura_fixa.campos`. Cada campo tem `coluna` (do layout do
+    relatório) ou `valor` fixo, `largura` e `tipo`:
+    - texto: alinhado à esquerda e completado com espaços (cortado se maior);
+    - numero: inteiro alinhado à direita e completado com zeros;
+    - valor: valor em reais gravado em centavos, sem separador, com zeros à esquerda;
+    - data: data no `formato` informado (padrão %d%m%Y), espaços se vazia.
+    `alinhamento` (esquerda/direita) e `preenchimento` sobrescrevem o padrão do tipo.
+    `cabecalho` e `rodape` são modelos opcionais com {competencia}, {quantidade}
+    e {total_centavos} (o rodapé é gravado ao fim, com os totais do arquivo).
+    """
+
+    extensao = ".txt"
+    TIPOS = ("texto", "numero", "valor", "data")
+
+    def __init__(self, config: dict | None = None):
+        config = config or {}
+        self.campos = [dict(c) for c in config.get("campos") or []]
+        if not self.campos:
+            raise ValueError("Exportação de largura fixa sem campos em `exportacao.largura_fixa.campos` do config.yaml.")
+        for campo in self.campos:
+            campo.setdefault("tipo", "texto")
+            if campo["tipo"] not in self.TIPOS:
+                raise ValueError(f"Tipo de campo de largura fixa desconhecido: '{campo['tipo']}'. Use um de {self.TIPOS}.")
+            if "coluna" not in campo and "valor" not in campo:
+                raise ValueError(f"Campo de largura fixa sem `coluna` ou `valor`: {campo}")
+        self.encoding = config.get("encoding", "latin-1")
+        self.fim_linha = config.get("fim_linha", "\r\n")
+        self.cabecalho = config.get("cabecalho")
+        self.rodape = config.get("rodape")
+        self.coluna_total = config.get("coluna_total", "TOTAL")
+
+    def _formatar(self, campo: dict, bloco: pd.DataFrame) -> pd.Series:
+        largura, tipo = int(campo["largura"]), campo["tipo"]
+        if "valor" in campo:
+            s = pd.Series(str(campo["valor"]), index=bloco.index)
+        elif tipo == "data":
+            s = pd.to_datetime(bloco[campo["coluna"]]).dt.strftime(campo.get("formato", "%d%m%Y")).fillna("")
+        elif tipo in ("numero", "valor"):
+            numeros = pd.to_numeric(bloco[campo["coluna"]], errors="coerce").fillna(0)
+            if tipo == "valor":
+                numeros = np.round(numeros * 100)
+            s = numeros.astype("int64").astype(str)
+        else:
+            s = bloco[campo["coluna"]].astype(object).where(bloco[campo["coluna"]].notna(), "").astype(str)
+
+        numerico = tipo in ("numero", "valor")
+        direita = campo.get("alinhamento", "direita" if numerico else "esquerda") == "direita"
+        preenchimento = str(campo.get("preenchimento", "0" if numerico else " "))
+        if numerico and (s.str.len() > largura).any():
+            raise ValueError(f"Valor maior que a largura ({largura}) do campo '{campo.get('coluna')}' no arquivo de largura fixa.")
+        s = s.str.slice(0, largura)
+        return s.str.pad(largura, side="left" if direita else "right", fillchar=preenchimento)
+
+    def escrever(self, path: str, blocos: Iterable[pd.DataFrame], ctx=None) -> int:
+        linhas, total = 0, 0
+        competencia = ctx.competencia.strftime("%m%Y") if ctx is not None else ""
+        with open(path, "w", encoding=self.encoding, errors="replace", newline="") as f:
+            if self.cabecalho:
+                f.write(self.cabecalho.format(competencia=competencia) + self.fim_linha)
+            for bloco in blocos:
+                registro = pd.Series("", index=bloco.index)
+                for campo in self.campos:
+                    registro = registro + self._formatar(campo, bloco)
+                f.write(self.fim_linha.join(registro) + self.fim_linha)
+                linhas += len(bloco)
+                if self.coluna_total in bloco.columns:
+                    total += int(np.round(bloco[self.coluna_total].sum() * 100))
+            if self.rodape:
+                f.write(self.rodape.format(competencia=competencia, quantidade=linhas, total_centavos=total) + self.fim_linha)
+        return linhas
+
+
+# Formatos de exportação além do XLSX, selecionáveis em `exportacao.formatos`
+EXPORTADORES = {
+    "csv": CsvExporter,
+    "parquet": ParquetExporter,
+    "largura_fixa": FixedWidthExporter,
+}
+FORMATOS = ("xlsx",) + tuple(EXPORTADORES)
+
+
+def validar_formatos(formatos) -> list[str]:
+    formatos = [f.strip().lower() for f in formatos if f and f.strip()]
+    desconhecidos = [f for f in formatos if f not in FORMATOS]
+    if desconhecidos:
+        raise ValueError(f"Formato(s) de exportação desconhecido(s): {desconhecidos}. Use {FORMATOS}.")
+    if not formatos:
+        raise ValueError(f"Nenhum formato de exportação informado. Use {FORMATOS}.")
+    return list(dict.fromkeys(formatos))
+
+
+def criar_exportador(formato: str, config: dict):
+    cfg = (config.get("exportacao", {}) or {}).get(formato, {}) or {}
+    logging.debug(f"Exportação: usando o exportador '{formato}'.")
+    return EXPORTADORES[formato](cfg)
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from .context import Contexto
+
+# Matrícula usada para agrupar as linhas sem matrícula nos hashes por colaborador.
+SEM_MATRICULA = np.iinfo("int64").min
+
+
+class EstadoIncremental:
+    """
+    Estado persistido de uma execução (por diretório de entrada e competência)
+    usado no recálculo incremental.
+
+    Guarda a base final calculada, as exclusões da elegibilidade e a assinatura
+    das bases validadas: um hash por matrícula para as bases com MATRICULA e um
+    hash da base inteira para as demais (valores e dias úteis por sindicato).
+    Na reexecução, as matrículas cujos hashes mudaram são as únicas recalculadas.
+    Qualquer mudança que afete todos os colaboradores (configuração, feriados,
+    bases sem matrícula ou a sequência de matrículas de ATIVOS) exige o
+    recálculo completo.
+    """
+
+    EXT = ".pkl"
+    VERSAO = 1
+
+    def __init__(self, diretorio: str, enabled: bool = False):
+        self.diretorio = diretorio
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, config: dict) -> "EstadoIncremental":
+        cfg = config.get("incremental", {}) or {}
+        return cls(cfg.get("diretorio", ".cache/estado"), cfg.get("habilitado", False))
+
+    @staticmethod
+    def chave(input_dir: str, ctx: Contexto) -> str:
+        payload = f"{os.path.abspath(input_dir)}|{ctx.competencia:%Y-%m-%d}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def hash_base(df: pd.DataFrame) -> str:
+        """Hash do conteúdo da base (colunas, ordem das linhas e valores)."""
+        h = hashlib.sha256(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+    @staticmethod
+    def hashes_por_matricula(df: pd.DataFrame, coluna: str = "MATRICULA") -> pd.Series:
+        """
+        Hash das linhas de cada matrícula. A posição da linha entre as repetidas
+        da mesma matrícula entra no hash, porque as consultas usam a primeira.
+        """
+        if df.empty:
+            return pd.Series(dtype="uint64")
+        matriculas = pd.to_numeric(df[coluna], errors="coerce").astype("Float64").fillna(SEM_MATRICULA)
+        matriculas = matriculas.to_numpy(dtype="int64")
+        linhas = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        ordem = pd.Series(matriculas).groupby(matriculas).cumcount().to_numpy(dtype="uint64")
+        with np.errstate(over="ignore"):
+            linhas = pd.util.hash_array(linhas + ordem * np.uint64(0x9E3779B97F4A7C15))
+        codigos, unicas = pd.factorize(matriculas)
+        somas = np.zeros(len(unicas), dtype="uint64")
+        np.add.at(somas, codigos, linhas)
+        return pd.Series(somas, index=unicas)
+
+    def assinatura(self, bases: dict, ctx: Contexto, config: dict, feriados: pd.DataFrame) -> dict:
+        """Resumo das entradas de uma execução, comparado na reexecução."""
+        por_matricula, globais = {}, {}
+        for nome, df in bases.items():
+            if not isinstance(df, pd.DataFrame):
+                continue
+            if "MATRICULA" in df.columns:
+                por_matricula[nome] = self.hashes_por_matricula(df)
+            else:
+                globais[nome] = self.hash_base(df)
+        ativos = bases.get("ATIVOS", pd.DataFrame())
+        return {
+            "versao": self.VERSAO,
+            "contexto": repr(ctx),
+            "config": hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest(),
+            "feriados": self.hash_base(feriados) if not feriados.empty else "",
+            "globais": globais,
+            "ativos": self.hash_base(ativos[["MATRICULA"]].reset_index()) if "MATRICULA" in ativos.columns else "",
+            "por_matricula": por_matricula,
+        }
+
+    @staticmethod
+    def matriculas_alteradas(anterior: dict, atual: dict) -> tuple[np.ndarray | None, str]:
+        """
+        Matrículas cujas linhas mudaram em alguma base. Retorna None (com o
+        motivo) quando a mudança exige o recálculo completo.
+        """
+        for campo, motivo in (
+            ("versao", "versão do estado"), ("contexto", "período da competência"),
+            ("config", "configuração"), ("feriados", "feriados"),
+            ("globais", "bases sem matrícula (valores/dias úteis)"), ("ativos", "sequência de matrículas de ATIVOS"),
+        ):
+            if anterior.get(campo) != atual.get(campo):
+                return None, f"mudança em {motivo}"
+
+        alteradas = set()
+        nomes = set(anterior["por_matricula"]) | set(atual["por_matricula"])
+        for nome in nomes:
+            antes = anterior["por_matricula"].get(nome, pd.Series(dtype="uint64"))
+            depois = atual["por_matricula"].get(nome, pd.Series(dtype="uint64"))
+            antes, depois = antes.align(depois)
+            diferentes = antes.index[antes.ne(depois) | antes.isna() | depois.isna()]
+            if SEM_MATRICULA in diferentes:
+                return None, f"linhas sem matrícula alteradas em {nome}"
+            alteradas.update(diferentes.tolist())
+        return np.array(sorted(alteradas), dtype="int64"), ""
+
+    def _path(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave + self.EXT)
+
+    def carregar(self, chave: str) -> dict | None:
+        path = self._path(chave)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logging.warning(f"Estado incremental: arquivo corrompido '{path}' descartado ({e}).")
+            os.remove(path)
+            return None
+
+    def salvar(self, chave: str, estado: dict) -> None:
+        os.makedirs(self.diretorio, exist_ok=True)
+        path = self._path(chave)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            pd.to_pickle(estado, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Estado incremental: falha ao gravar '{path}' ({e}).")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def divergencias(incremental: pd.DataFrame, completo: pd.DataFrame) -> list[int]:
+        """Matrículas cujas linhas diferem entre o resultado incremental e o recálculo completo."""
+        linhas = incremental.index.union(completo.index)
+        colunas = incremental.columns.union(completo.columns, sort=False)
+        a, b = incremental.reindex(index=linhas, columns=colunas), completo.reindex(index=linhas, columns=colunas)
+        diferentes = np.zeros(len(linhas), dtype=bool)
+        for coluna in colunas:
+            x, y = a[coluna].astype(object), b[coluna].astype(object)
+            diferentes |= ~((x == y) | (x.isna() & y.isna())).to_numpy(dtype=bool)
+        matriculas = b["MATRICULA"].astype(object).where(b["MATRICULA"].notna(), a["MATRICULA"].astype(object))
+        return sorted(set(matriculas[diferentes].dropna().astype(int)))
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+
+class IngestCache:
+    """
+    Cache em disco das bases já lidas e normalizadas pelo CollectorAgent.
+
+    Cada entrada é indexada pelo hash do conteúdo do arquivo, pela aba lida,
+    pelo mapa de normalização de colunas, pelas colunas projetadas e pelos
+    tipos aplicados; qualquer mudança em um deles gera uma nova chave. Os DataFrames são gravados em
+    pickle (formato do próprio pandas, que preserva os dtypes sem dependências
+    extras).
+    """
+
+    EXT = ".pkl"
+    NOME = "Cache de coleta"
+
+    def __init__(self, cache_dir: str, max_mb: float = 512, max_age_days: float = 30, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_age_s = max_age_days * 86400
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, config: dict) -> "IngestCache":
+        cfg = config.get("cache_coleta", {}) or {}
+        return cls(
+            cache_dir=cfg.get("diretorio", ".cache/coleta"),
+            max_mb=cfg.get("tamanho_max_mb", 512),
+            max_age_days=cfg.get("idade_max_dias", 30),
+            enabled=cfg.get("habilitado", True),
+        )
+
+    @staticmethod
+    def fingerprint(file_path: str) -> str:
+        """Hash SHA-256 do conteúdo do arquivo."""
+        h = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def key(self, file_path: str, sheet_hint: str | None, column_map: dict, projection=None, schema=None,
+            leitura: dict | None = None) -> str:
+        """
+        Chave da entrada: conteúdo do arquivo e tudo que muda o resultado da
+        leitura (aba, aliases, projeção, tipos e as opções do leitor, como
+        formato, separador e marca decimal do CSV).
+        """
+        payload = json.dumps(
+            {
+                "arquivo": self.fingerprint(file_path), "aba": sheet_hint, "colunas": column_map,
+                "projecao": projection, "tipos": schema, "leitura": leitura,
+            },
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.EXT)
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_pickle(path)
+        except Exception as e:
+            logging.warning(f"{self.NOME}: entrada corrompida '{path}' descartada ({e}).")
+            self._remove(path)
+            return None
+        # Atualiza o mtime para que a evicção trate a entrada como recém-usada (LRU).
+        os.utime(path, None)
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            pd.to_pickle(df, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"{self.NOME}: falha ao gravar '{path}' ({e}).")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def _entries(self) -> list[tuple[str, float, int]]:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.EXT):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, st.st_mtime, st.st_size))
+        return entries
+
+    def evict(self) -> int:
+        """Remove entradas expiradas e, se preciso, as menos usadas até caber no limite."""
+        now = time.time()
+        removed = 0
+        entries = []
+        for path, mtime, size in self._entries():
+            if self.max_age_s and now - mtime > self.max_age_s:
+                removed += self._remove(path)
+            else:
+                entries.append((path, mtime, size))
+
+        total = sum(size for _, _, size in entries)
+        for path, _, size in sorted(entries, key=lambda e: e[1]):
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+        return removed
+
+    def clear(self) -> int:
+        removed = sum(self._remove(path) for path, _, _ in self._entries())
+        logging.info(f"{self.NOME}: {removed} entrada(s) removida(s) de '{self.cache_dir}'.")
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
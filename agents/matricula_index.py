@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import take
+
+from .schema import ensure_int
+
+
+class MatriculaIndex:
+    """
+    Índice de MATRICULA compartilhado pelos agentes.
+
+    Construído uma única vez após a validação: as matrículas de todas as bases
+    são fatorizadas em um mesmo universo ordenado de códigos inteiros e, para
+    cada base, guarda-se a linha correspondente a cada código. Toda junção por
+    matrícula passa a ser uma indexação de arrays, sem `set_index`, `map` ou
+    filtros linha a linha.
+
+    Matrículas repetidas são detectadas explicitamente (`duplicadas`); nas
+    consultas de valor único vale a primeira ocorrência na base.
+    """
+
+    def __init__(self, bases: dict, coluna: str = "MATRICULA"):
+        series = {
+            nome: ensure_int(df[coluna]) for nome, df in bases.items()
+            if isinstance(df, pd.DataFrame) and not df.empty and coluna in df.columns
+        }
+        valores = [s.dropna().to_numpy(dtype="int64") for s in series.values()]
+        self.universo = np.unique(np.concatenate(valores)) if valores else np.array([], dtype="int64")
+        self.bases = {nome: bases[nome] for nome in series}
+        self.codigos = {}     # base -> código de cada linha (-1 se a matrícula estiver vazia)
+        self.linhas = {}      # base -> linha da primeira ocorrência de cada código (-1 se ausente)
+        self.duplicadas = {}  # base -> matrículas que aparecem mais de uma vez
+
+        for nome, s in series.items():
+            codigos = self.codigos_de(s)
+            validos = codigos >= 0
+            unicos, primeira = np.unique(codigos[validos], return_index=True)
+            linhas = np.full(len(self.universo), -1, dtype="int64")
+            linhas[unicos] = np.flatnonzero(validos)[primeira]
+            self.codigos[nome] = codigos
+            self.linhas[nome] = linhas
+
+            contagem = np.bincount(codigos[validos], minlength=len(self.universo))
+            repetidas = self.universo[contagem > 1]
+            if repetidas.size:
+                self.duplicadas[nome] = repetidas.tolist()
+
+    def codigos_de(self, matriculas: pd.Series) -> np.ndarray:
+        """Converte matrículas em códigos do universo (-1 para vazias ou desconhecidas)."""
+        s = ensure_int(matriculas)
+        if not len(self.universo):
+            return np.full(len(s), -1, dtype="int64")
+        valores = s.to_numpy(dtype="int64", na_value=0)
+        pos = np.minimum(np.searchsorted(self.universo, valores), len(self.universo) - 1)
+        achou = s.notna().to_numpy() & (self.universo[pos] == valores)
+        return np.where(achou, pos, -1)
+
+    def linhas_de(self, base: str, codigos: np.ndarray) -> np.ndarray:
+        """Linha da base para cada código (-1 quando a matrícula não está na base)."""
+        linhas = self.linhas.get(base)
+        if linhas is None or not len(linhas):
+            return np.full(len(codigos), -1, dtype="int64")
+        return np.where(codigos >= 0, linhas[codigos], -1)
+
+    def contem(self, base: str, codigos: np.ndarray) -> np.ndarray:
+        return self.linhas_de(base, codigos) >= 0
+
+    def valores(self, base: str, coluna: str, codigos: np.ndarray, index=None) -> pd.Series:
+        """
+        Traz a `coluna` da base para cada código (primeira ocorrência), com
+        valor ausente onde a matrícula não existe na base.
+        """
+        df = self.bases.get(base)
+        if df is None or coluna not in df.columns:
+            return pd.Series(pd.NA, index=index if index is not None else pd.RangeIndex(len(codigos)), dtype="object")
+        linhas = self.linhas_de(base, codigos)
+        return pd.Series(take(df[coluna].array, linhas, allow_fill=True), index=index, name=coluna)
+
+    def soma(self, base: str, coluna: str, codigos: np.ndarray) -> np.ndarray:
+        """Soma da `coluna` por matrícula na base (todas as ocorrências), para cada código."""
+        df = self.bases.get(base)
+        if df is None or coluna not in df.columns:
+            return np.zeros(len(codigos))
+        base_codigos = self.codigos[base]
+        validos = base_codigos >= 0
+        pesos = pd.to_numeric(df[coluna], errors="coerce").to_numpy(dtype="float64", na_value=0.0)
+        totais = np.bincount(base_codigos[validos], weights=np.nan_to_num(pesos[validos]), minlength=len(self.universo))
+        return np.where(codigos >= 0, totais[np.maximum(codigos, 0)], 0.0)
@@ -0,0 +1,40 @@
+import numpy as np
+
+# Os valores monetários do cálculo (VALOR_UNITARIO, VR_TOTAL, EMPRESA_80 e
+# COLABORADOR_20) são inteiros em centavos (int64). A conversão para reais só
+# acontece na escrita das planilhas e na exibição.
+
+CENTAVOS_POR_REAL = 100
+
+# Percentuais da divisão empresa/profissional em pontos-base (1/10000)
+PONTOS_BASE = 10_000
+
+
+def para_centavos(reais) -> np.ndarray:
+    """Converte valores em reais (NaN vira 0) para centavos inteiros, arredondando ao centavo mais próximo."""
+    valores = np.nan_to_num(np.asarray(reais, dtype="float64"), nan=0.0)
+    return np.round(valores * CENTAVOS_POR_REAL).astype("int64")
+
+
+def para_reais(centavos) -> np.ndarray:
+    return np.asarray(centavos, dtype="int64") / CENTAVOS_POR_REAL
+
+
+def dividir(total_centavos, percentual_empresa) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Divide o total entre empresa e profissional sem perder centavos: a parte da
+    empresa é arredondada ao centavo (meio centavo para cima) e o profissional
+    fica com o restante, de modo que as duas partes sempre somam o total.
+    """
+    total = np.asarray(total_centavos, dtype="int64")
+    pontos = np.round(np.asarray(percentual_empresa, dtype="float64") * PONTOS_BASE).astype("int64")
+    empresa = (total * pontos + PONTOS_BASE // 2) // PONTOS_BASE
+    return empresa, total - empresa
+
+
+def formatar_reais(centavos) -> str:
+    """Formata centavos como 'R$ 1.234,56' sem passar por ponto flutuante."""
+    centavos = int(centavos)
+    sinal = "-" if centavos < 0 else ""
+    reais, resto = divmod(abs(centavos), CENTAVOS_POR_REAL)
+    return f"{sinal}R$ {reais:,}".replace(",", ".") + f",{resto:02d}"
@@ -1,14 +1,24 @@
+import json
+import os
 import pandas as pd
 import logging
+import time
 import yaml
 
 # Importa as classes dos outros agentes
 from .collector_agent import CollectorAgent
-from .validator_agent import ValidatorAgent
+from .validator_agent import PreparoBase, ValidatorAgent
 from .eligibility_agent import EligibilityAgent
 from .calculator_agent import CalculatorAgent
 from .context import Contexto
+from .incremental_state import EstadoIncremental
+from .matricula_index import MatriculaIndex
+from .money import formatar_reais
 from .reporter_agent import ReporterAgent
+from .result_cache import ResultCache
+from .schema import ensure_int
+from .run_metrics import MedidorEtapas
+from .stage_dag import ChamadasPrincipais, Checkpoints, Etapa, StageDAG
 
 class OrchestratorAgent:
     """
@@ -18,10 +28,13 @@ class OrchestratorAgent:
     def __init__(self, config_path: str = 'config.yaml'):
         self.config = self._load_config(config_path)
         self.collector = CollectorAgent(self.config)
-        self.validator = ValidatorAgent()
-        self.eligibility = EligibilityAgent()
-        self.calculator = CalculatorAgent()
-        self.reporter = ReporterAgent()
+        self.validator = ValidatorAgent(self.config)
+        self.eligibility = EligibilityAgent(self.config)
+        self.calculator = CalculatorAgent(self.config)
+        self.reporter = ReporterAgent(self.config)
+        self.estado = EstadoIncremental.from_config(self.config)
+        self.resultados = ResultCache.from_config(self.config)
+        self.checkpoints = Checkpoints.from_config(self.config)
 
     def _load_config(self, config_path: str) -> dict:
         logging.info(f"Orquestrador: Carregando configuração de '{config_path}'.")
@@ -35,111 +48,500 @@ class OrchestratorAgent:
             logging.error(f"Erro ao carregar o arquivo de configuração: {e}")
             raise
 
-    def run(self, input_dir: str, output_dir: str, competencia_str: str, progress_callback=None) -> dict:
+    @staticmethod
+    def _format_bytes(n: int) -> str:
+        if n >= 2**20:
+            return f"{n / 2**20:.1f} MB"
+        return f"{n / 2**10:.1f} KB"
+
+    def clear_ingest_cache(self) -> int:
         """
-        Executa o pipeline completo de processamento do VR, narrando cada etapa.
+        Remove todas as entradas do cache de coleta. Retorna a quantidade removida.
         """
-        def report(step, message):
-            logging.info(f"[{step}] {message}")
-            if progress_callback:
-                progress_callback(step, message)
+        return self.collector.cache.clear()
+
+    def clear_result_cache(self) -> int:
+        """
+        Remove todas as entradas do cache de resultados. Retorna a quantidade removida.
+        """
+        return self.resultados.clear()
+
+    def _arquivos_gerados(self) -> list[str]:
+        """Arquivos gravados pelo último relatório, incluindo os das partições."""
+        arquivos = list(self.reporter.arquivos)
+        if self.reporter.particoes is not None and arquivos:
+            diretorio = os.path.splitext(arquivos[0])[0]
+            arquivos += [os.path.join(diretorio, a) for a in self.reporter.particoes["ARQUIVO"]]
+        return arquivos
+
+    def _build_context(self, competencia_str: str) -> Contexto:
+        """
+        Monta o contexto da execução: o período do benefício é o mês selecionado
+        e o período dos eventos de ajuste é o mês anterior.
+        """
+        competencia_selecionada = pd.to_datetime(competencia_str)
+
+        # Define o período do benefício (mês selecionado)
+        periodo_beneficio_ini = competencia_selecionada.replace(day=1)
+        periodo_beneficio_fim = competencia_selecionada + pd.offsets.MonthEnd(0)
+
+        # Define o período dos eventos (mês anterior ao do benefício)
+        mes_eventos = competencia_selecionada - pd.DateOffset(months=1)
+        periodo_eventos_ini = mes_eventos.replace(day=1)
+        periodo_eventos_fim = mes_eventos + pd.offsets.MonthEnd(0)
+
+        return Contexto(
+            periodo_beneficio_ini=periodo_beneficio_ini,
+            periodo_beneficio_fim=periodo_beneficio_fim,
+            periodo_eventos_ini=periodo_eventos_ini,
+            periodo_eventos_fim=periodo_eventos_fim,
+            competencia=competencia_selecionada,
+            pos15_regra=(self.config.get('regras', {}) or {}).get('pos15_regra', 'integral'),
+        )
+
+    @staticmethod
+    def expandir_competencias(spec: str) -> list[str]:
+        """
+        Converte a especificação de competências em datas 'YYYY-MM-01'.
+        Aceita intervalos ('2025-01..2025-12'), listas ('2025-01,2025-03')
+        ou combinações dos dois.
+        """
+        competencias = []
+        for parte in (p.strip() for p in spec.split(",")):
+            if not parte:
+                continue
+            if ".." in parte:
+                ini_str, fim_str = parte.split("..", 1)
+                ini, fim = pd.Period(ini_str.strip(), freq="M"), pd.Period(fim_str.strip(), freq="M")
+                if fim < ini:
+                    raise ValueError(f"Intervalo de competências invertido: '{parte}'.")
+                competencias.extend(pd.period_range(ini, fim, freq="M"))
+            else:
+                competencias.append(pd.Period(parte, freq="M"))
+        if not competencias:
+            raise ValueError(f"Nenhuma competência informada em '{spec}'.")
+        return [p.start_time.strftime("%Y-%m-%d") for p in sorted(set(competencias))]
+
+    def _contexto_lote(self, contextos: list[Contexto]) -> Contexto:
+        """Contexto que cobre todos os meses do lote, usado na validação única das bases."""
+        return Contexto(
+            periodo_beneficio_ini=contextos[0].periodo_beneficio_ini,
+            periodo_beneficio_fim=contextos[-1].periodo_beneficio_fim,
+            periodo_eventos_ini=contextos[0].periodo_eventos_ini,
+            periodo_eventos_fim=contextos[-1].periodo_eventos_fim,
+            competencia=contextos[0].competencia,
+            pos15_regra=contextos[0].pos15_regra,
+        )
+
+    def preflight(self, input_dir: str, competencia_str: str) -> dict:
+        """
+        Pré-validação rápida dos arquivos de entrada: lê apenas o cabeçalho e uma
+        amostra de cada base e verifica colunas obrigatórias e mês de competência.
+        """
+        inicio = time.perf_counter()
+        ctx = self._build_context(competencia_str)
+        linhas = int((self.config.get('preflight', {}) or {}).get('linhas_amostra', 200))
+        amostras, file_report = self.collector.sample(input_dir, nrows=linhas)
+        erros, avisos = self.validator.preflight(amostras, file_report, ctx)
+        duracao = time.perf_counter() - inicio
+        logging.info(f"Pré-validação concluída em {duracao:.2f}s: {len(erros)} erro(s), {len(avisos)} aviso(s).")
+        return {"erros": erros, "avisos": avisos, "file_report": file_report, "duracao": duracao}
+
+    def _coletar(self, input_dir: str, use_cache: bool, report) -> tuple[dict, dict]:
+        bases, file_report = self.collector.execute(input_dir, use_cache=use_cache)
+        cache_status = self.collector.cache_status
+        for base_name, filename in file_report.items():
+            status = cache_status.get(base_name)
+            sufixo = f" (cache: {status})" if status else ""
+            report("coleta", f"Base `{base_name}`: Carregada do arquivo `{filename}` com **{len(bases.get(base_name, []))}** registros{sufixo}.")
+        memoria = self.collector.memory_report
+        antes = sum(m[0] for m in memoria.values() if m[0] is not None)
+        depois = sum(m[1] for m in memoria.values())
+        if antes:
+            report("coleta", f"Memória das bases lidas: **{self._format_bytes(antes)}** antes da tipagem, **{self._format_bytes(depois)}** depois.")
+        else:
+            report("coleta", f"Memória das bases carregadas: **{self._format_bytes(depois)}**.")
+        if not use_cache or not self.collector.cache.enabled:
+            report("coleta", "Cache de leitura desativado nesta execução.")
+        else:
+            hits = sum(1 for s in cache_status.values() if s == "hit")
+            misses = sum(1 for s in cache_status.values() if s == "miss")
+            report("coleta", f"Cache de leitura: **{hits}** hit(s), **{misses}** miss(es).")
+        return bases, file_report
+
+    def _validar(self, bases: dict, ctx: Contexto, report, checar_competencia: bool = True,
+                 preparos: dict[str, PreparoBase] | None = None) -> tuple[dict, MatriculaIndex]:
+        if preparos is None:
+            bases_validadas, avisos = self.validator.execute(bases, ctx, checar_competencia=checar_competencia)
+        else:
+            bases_validadas, avisos = self.validator.consolidar(bases, preparos, ctx, checar_competencia=checar_competencia)
+        violacoes = self.validator.violations
+        report("validacao", "Estruturas de dados internas preparadas e normalizadas.")
+        if avisos:
+            for aviso in avisos:
+                report("validacao", f"⚠️ **Aviso:** {aviso}")
+        if not violacoes.empty:
+            report("validacao", f"**{len(violacoes)}** ocorrência(s) registradas na tabela de violações (aba `Violações` do relatório).")
+        index = self.validator.index
+        report("validacao", f"Índice de matrículas construído: **{len(index.universo)}** matrículas distintas em {len(index.linhas)} base(s).")
+        report("validacao", "Checagem de consistência de dados concluída.")
+        return bases_validadas, index
+
+    def _elegibilidade(self, bases_validadas: dict, index: MatriculaIndex, ctx: Contexto, report) -> pd.DataFrame:
+        ativos_antes = len(bases_validadas.get("ATIVOS", pd.DataFrame()))
+        base_elegiveis = self.eligibility.execute(bases_validadas, index, ctx)
+        elegiveis_depois = len(base_elegiveis)
+        report("elegibilidade", f"Base inicial com **{ativos_antes}** colaboradores ativos.")
+        for motivo, quantidade in self.eligibility.resumo().items():
+            report("elegibilidade", f"Regra `{motivo}`: **{quantidade}** colaborador(es) atingido(s).")
+        report("elegibilidade", f"Após aplicar as regras de exclusão (Diretores, Estagiários, etc.), **{elegiveis_depois}** colaboradores permaneceram.")
+        report("elegibilidade", f"Total de **{ativos_antes - elegiveis_depois}** colaboradores removidos da base de cálculo.")
+        return base_elegiveis
+
+    def _calcular(self, base_elegiveis: pd.DataFrame, bases_validadas: dict, index: MatriculaIndex, ctx: Contexto, report) -> pd.DataFrame:
+        base_calculada = self.calculator.execute(base_elegiveis, bases_validadas, ctx, index)
+        report("calculo", "Fatores de ajuste para admissões e desligamentos foram calculados.")
+        report("calculo", "Dias de férias foram descontados dos dias a serem pagos.")
+        report("calculo", "Valor final do benefício foi calculado multiplicando os dias devidos pelo valor do sindicato.")
+
+        # Resumo dos ajustes para o log
+        admitidos_ajustados = (base_calculada["FATOR_ADMISSAO"] < 1.0).sum()
+        deslig_zerados = (base_calculada["FATOR_DESLIG"] == 0.0).sum()
+        ferias_ajustadas = (base_calculada["FERIAS_DIAS"] > 0).sum()
+        report("calculo", f"Resumo dos Ajustes: **{admitidos_ajustados}** com VR proporcional (admissão), **{deslig_zerados}** com VR zerado (desligamento), **{ferias_ajustadas}** com desconto de dias por férias.")
+        return base_calculada
+
+    def _recalcular_incremental(self, anterior: dict, assinatura: dict, bases_validadas: dict, ctx: Contexto,
+                                report) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+        """
+        Recalcula apenas as matrículas cujas linhas mudaram desde a execução
+        anterior e corrige a base final salva. Retorna None quando a mudança
+        exige o recálculo completo.
+        """
+        alteradas, motivo = EstadoIncremental.matriculas_alteradas(anterior["assinatura"], assinatura)
+        if alteradas is None:
+            report("calculo", f"Recálculo incremental: {motivo}; executando o cálculo completo.")
+            return None
+        report("calculo", f"Recálculo incremental: **{len(alteradas)}** matrícula(s) com alteração desde a última execução.")
+
+        def afetadas(df: pd.DataFrame):
+            return ensure_int(df["MATRICULA"]).isin(alteradas).to_numpy(dtype=bool)
+
+        bases_parciais = {
+            nome: df[afetadas(df)] if isinstance(df, pd.DataFrame) and "MATRICULA" in df.columns else df
+            for nome, df in bases_validadas.items()
+        }
+        index_parcial = MatriculaIndex(bases_parciais)
+
+        # Elegibilidade só das matrículas alteradas; as demais exclusões são reaproveitadas
+        elegiveis = self.eligibility.execute(bases_parciais, index_parcial, ctx)
+        exclusoes = anterior["exclusoes"].copy()
+        exclusoes.loc[afetadas(bases_validadas["ATIVOS"]), "MOTIVOS_EXCLUSAO"] = self.eligibility.exclusoes["MOTIVOS_EXCLUSAO"].to_numpy(dtype="uint32")
+        self.eligibility.exclusoes = exclusoes
+        report("elegibilidade", f"Recálculo incremental: elegibilidade reavaliada para **{len(bases_parciais['ATIVOS'])}** colaborador(es).")
+        for regra, quantidade in self.eligibility.resumo().items():
+            report("elegibilidade", f"Regra `{regra}`: **{quantidade}** colaborador(es) atingido(s).")
+
+        # Cálculo das linhas alteradas, recolocadas na posição original da base final
+        base_anterior = anterior["base_final"]
+        mantidas = base_anterior[~afetadas(base_anterior)]
+        if elegiveis.empty:
+            base_calculada = mantidas
+        else:
+            recalculadas = self.calculator.execute(elegiveis, bases_parciais, ctx, index_parcial)
+            base_calculada = pd.concat([mantidas, recalculadas]).sort_index(kind="stable")
+        # As entradas do núcleo cobrem só as linhas recalculadas; não servem para simulações
+        self.calculator.entradas = {}
+        ativos = bases_validadas["ATIVOS"]
+        for coluna in base_calculada.columns:
+            if coluna in ativos.columns and isinstance(ativos[coluna].dtype, pd.CategoricalDtype):
+                base_calculada[coluna] = base_calculada[coluna].astype(ativos[coluna].dtype)
+        report("calculo", f"Recálculo incremental: **{len(base_calculada) - len(mantidas)}** linha(s) recalculada(s), **{len(mantidas)}** reaproveitada(s) da execução anterior.")
+        return base_calculada, exclusoes
+
+    @staticmethod
+    def _formatar_reais(valor: float) -> str:
+        return formatar_reais(round(valor * 100))
+
+    def _relatorio(self, base_calculada: pd.DataFrame, bases_validadas: dict, ctx: Contexto, output_dir: str,
+                   violacoes: pd.DataFrame, index: MatriculaIndex, report, formatos: list[str] | None = None) -> float:
+        output_filename = f"VR MENSAL {ctx.competencia.strftime('%m.%Y')}.xlsx"
+        output_path = f"{output_dir}/{output_filename}"
+        total_vr = self.reporter.execute(base_calculada, bases_validadas, ctx, output_path, violacoes=violacoes, index=index,
+                                         formatos=formatos)
+        for arquivo in self.reporter.arquivos:
+            if arquivo == output_path:
+                report("relatorio", f"Planilha final gerada em: `{arquivo}`")
+            else:
+                report("relatorio", f"Exportação gerada em: `{arquivo}`")
+        if self.reporter.particoes is not None:
+            particoes = self.reporter.particoes
+            report("relatorio", f"Saída particionada: {particoes['PARTICAO'].nunique()} partição(ões) em "
+                                f"{len(particoes)} arquivo(s); soma das partições conferida com o total.")
+        report("relatorio", f"Valor total do benefício consolidado: **{self._formatar_reais(total_vr)}**")
+        return total_vr
+
+    def _metricas(self, medidor: MedidorEtapas, ctx: Contexto, output_dir: str, report) -> dict:
+        """Fecha as métricas da execução e grava o registro JSON ao lado do relatório."""
+        metricas = medidor.resumo(competencia=f"{ctx.competencia:%Y-%m-%d}")
+        if (self.config.get("metricas", {}) or {}).get("registro_json", True):
+            caminho = os.path.join(output_dir, f"VR MENSAL {ctx.competencia.strftime('%m.%Y')} - METRICAS.json")
+            MedidorEtapas.gravar(metricas, caminho)
+            report("relatorio", f"Métricas da execução gravadas em: `{caminho}`")
+        etapas = sorted(metricas["etapas"], key=lambda e: e["tempo_s"], reverse=True)
+        if etapas:
+            report("relatorio", "Tempo por etapa: " + ", ".join(f"{e['etapa']} {e['tempo_s']:.2f}s" for e in etapas)
+                                + f" (total {metricas['tempo_total_s']:.2f}s).")
+        return metricas
+
+    def _pipeline(self, input_dir: str, output_dir: str, ctx: Contexto, use_cache: bool, incremental: bool,
+                  verificar_incremental: bool, formatos: list[str] | None, report) -> StageDAG:
+        """
+        Etapas do processamento mensal com as entradas e saídas de cada uma.
+        Contexto e coleta não dependem uma da outra e rodam juntas; dentro da
+        coleta, os arquivos já são lidos em paralelo (processamento.coleta_paralela).
+        Cada base de ValidatorAgent.PREPARACOES é preparada e validada na sua
+        própria etapa (preparo_dias_uteis, preparo_sind_valor, preparo_desligados),
+        que rodam juntas; a etapa validacao reúne as bases preparadas.
+        No modo incremental, elegibilidade e cálculo formam uma única etapa.
+        """
+        def contexto() -> dict:
+            meses_pt = [
+                "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
+            ]
+            mes_comp = meses_pt[ctx.competencia.month - 1]
+            mes_ref = meses_pt[ctx.periodo_eventos_ini.month - 1]
+            report("contexto", f"Mês de Competência (Benefício): **{mes_comp}**")
+            report("contexto", f"Mês de Referência para Eventos (Admissão/Demissão): **{mes_ref}**")
+            return {"ctx": ctx}
+
+        def coleta() -> dict:
+            bases, file_report = self._coletar(input_dir, use_cache, report)
+            return {"bases": bases, "file_report": file_report}
+
+        def preparo(nome: str):
+            def preparar(bases: dict, ctx: Contexto) -> dict:
+                preparado = self.validator.preparar_base(nome, bases, ctx)
+                if preparado.base is not None and not preparado.mensagens_colunas:
+                    report("validacao", f"Base `{nome}` preparada: **{len(preparado.base)}** registro(s).")
+                return {nome.lower(): preparado}
+            return preparar
+
+        preparacoes = list(ValidatorAgent.PREPARACOES)
+
+        def validacao(bases: dict, ctx: Contexto, **preparos: PreparoBase) -> dict:
+            preparos = {nome: preparos[nome.lower()] for nome in preparacoes}
+            bases_validadas, index = self._validar(bases, ctx, report, preparos=preparos)
+            return {"bases_validadas": bases_validadas, "index": index, "violacoes": self.validator.violations}
+
+        def elegibilidade(bases_validadas: dict, index: MatriculaIndex, ctx: Contexto) -> dict:
+            base_elegiveis = self._elegibilidade(bases_validadas, index, ctx, report)
+            return {"base_elegiveis": base_elegiveis, "exclusoes": self.eligibility.exclusoes}
+
+        def calculo(base_elegiveis: pd.DataFrame, bases_validadas: dict, index: MatriculaIndex, ctx: Contexto) -> dict:
+            if base_elegiveis.empty:
+                return {"base_calculada": pd.DataFrame(), "entradas_calculo": {}}
+            base_calculada = self._calcular(base_elegiveis, bases_validadas, index, ctx, report)
+            return {"base_calculada": base_calculada, "entradas_calculo": self.calculator.entradas}
+
+        def calculo_incremental(bases_validadas: dict, index: MatriculaIndex, ctx: Contexto) -> dict:
+            # Recálculo incremental a partir do estado da execução anterior
+            saidas = {"verificacao_incremental": None, "entradas_calculo": {}}
+            base_calculada = None
+            chave = EstadoIncremental.chave(input_dir, ctx)
+            assinatura = self.estado.assinatura(bases_validadas, ctx, self.config, self.calculator.calendario.feriados)
+            anterior = self.estado.carregar(chave)
+            if anterior is None:
+                report("calculo", "Recálculo incremental: nenhum estado salvo para esta competência; executando o cálculo completo.")
+            else:
+                parcial = self._recalcular_incremental(anterior, assinatura, bases_validadas, ctx, report)
+                if parcial is not None:
+                    base_calculada, saidas["exclusoes"] = parcial
+
+            if base_calculada is None or verificar_incremental:
+                completa = elegibilidade(bases_validadas, index, ctx)
+                completa.update(calculo(completa["base_elegiveis"], bases_validadas, index, ctx))
+                if base_calculada is not None:
+                    divergentes = EstadoIncremental.divergencias(base_calculada, completa["base_calculada"])
+                    saidas["verificacao_incremental"] = divergentes
+                    if divergentes:
+                        report("calculo", f"⚠️ **Aviso:** o recálculo incremental divergiu do completo em **{len(divergentes)}** matrícula(s) (ex.: {divergentes[:5]}). Usando o resultado completo.")
+                    else:
+                        report("calculo", "Verificação: o recálculo incremental é idêntico ao cálculo completo.")
+                base_calculada, saidas["exclusoes"] = completa["base_calculada"], completa["exclusoes"]
+                saidas["entradas_calculo"] = completa["entradas_calculo"]
+
+            self.estado.salvar(chave, {"assinatura": assinatura, "base_final": base_calculada, "exclusoes": saidas["exclusoes"]})
+            saidas["base_calculada"] = base_calculada
+            return saidas
 
+        def relatorio(base_calculada: pd.DataFrame, bases_validadas: dict, ctx: Contexto, violacoes: pd.DataFrame,
+                      index: MatriculaIndex) -> dict:
+            if base_calculada.empty:
+                report("calculo", "AVISO: Nenhum colaborador elegível encontrado. Cálculos não serão executados.")
+                return {"total_vr": 0.0, "agregados": {}, "particoes": None, "arquivos": []}
+            total_vr = self._relatorio(base_calculada, bases_validadas, ctx, output_dir, violacoes, index, report, formatos)
+            return {
+                "total_vr": total_vr, "agregados": self.reporter.agregados,
+                "particoes": self.reporter.particoes, "arquivos": self._arquivos_gerados(),
+            }
+
+        etapas = [
+            Etapa("contexto", contexto, saidas=("ctx",)),
+            Etapa("coleta", coleta, saidas=("bases", "file_report")),
+        ]
+        etapas += [Etapa(f"preparo_{nome.lower()}", preparo(nome), ("bases", "ctx"), (nome.lower(),)) for nome in preparacoes]
+        etapas.append(Etapa(
+            "validacao", validacao, ("bases", "ctx", *(nome.lower() for nome in preparacoes)),
+            ("bases_validadas", "index", "violacoes"),
+        ))
+        if incremental:
+            etapas.append(Etapa(
+                "calculo", calculo_incremental, ("bases_validadas", "index", "ctx"),
+                ("base_calculada", "exclusoes", "entradas_calculo", "verificacao_incremental"),
+                assinatura=f"incremental|{verificar_incremental}",
+            ))
+        else:
+            etapas += [
+                Etapa("elegibilidade", elegibilidade, ("bases_validadas", "index", "ctx"), ("base_elegiveis", "exclusoes")),
+                Etapa("calculo", calculo, ("base_elegiveis", "bases_validadas", "index", "ctx"), ("base_calculada", "entradas_calculo")),
+            ]
+        exportacao = json.dumps(self.config.get("exportacao"), sort_keys=True, default=str)
+        etapas.append(Etapa(
+            "relatorio", relatorio, ("base_calculada", "bases_validadas", "ctx", "violacoes", "index"),
+            ("total_vr", "agregados", "particoes", "arquivos"),
+            assinatura=f"{os.path.abspath(output_dir)}|{formatos or self.reporter.formatos}|{exportacao}",
+        ))
+        return StageDAG(etapas)
+
+    def run(self, input_dir: str, output_dir: str, competencia_str: str, progress_callback=None, use_cache: bool = True,
+            incremental: bool | None = None, verificar_incremental: bool = False, formatos: list[str] | None = None,
+            retomar: bool = False, etapas: list[str] | None = None) -> dict:
+        """
+        Executa o pipeline completo de processamento do VR, narrando cada etapa.
+
+        As etapas (contexto, coleta, preparo_dias_uteis, preparo_sind_valor,
+        preparo_desligados, validacao, elegibilidade, calculo e relatorio)
+        formam um grafo de dependências e as saídas de cada uma são
+        gravadas como checkpoint (seção `checkpoints` do config.yaml). Com
+        `retomar`, a execução continua da última etapa concluída com as mesmas
+        entradas; com `etapas`, só as etapas informadas e as que dependem delas
+        são reexecutadas (ex.: ["relatorio"] após uma mudança de layout).
+
+        Com `use_cache`, uma execução idêntica (mesmos arquivos de entrada,
+        configuração, feriados, competência e formatos) é servida pelo cache de
+        resultados, que regrava os arquivos gerados em `output_dir`.
+
+        Com `incremental` (padrão: `incremental.habilitado` do config.yaml), o
+        estado da execução é salvo e, na reexecução da mesma competência, só as
+        matrículas alteradas nas bases são recalculadas. `verificar_incremental`
+        também executa o cálculo completo e compara os dois resultados.
+        `formatos` substitui `exportacao.formatos` do config.yaml (xlsx, csv,
+        parquet, largura_fixa).
+
+        Etapas independentes rodam em paralelo (processamento.etapas_paralelas),
+        mas `progress_callback` é sempre chamado na thread que chamou `run`.
+        """
         results = {
             "total_vr": 0.0, "base_final": pd.DataFrame(), "bases": {},
-            "file_report": {}, "logs": {},
-            "competencia": None
+            "file_report": {}, "logs": {}, "violacoes": pd.DataFrame(), "exclusoes": pd.DataFrame(),
+            "competencia": None, "entradas_calculo": {}, "agregados": {}, "particoes": None
         }
         logs = {
             "contexto": [], "coleta": [], "validacao": [],
             "elegibilidade": [], "calculo": [], "relatorio": []
         }
 
-        def report(step, message):
+        def narrar(step, message):
             logging.info(f"[{step}] {message}")
             if step in logs:
                 logs[step].append(message)
             if progress_callback:
                 progress_callback(step, message)
 
+        # Etapas no pool de threads narram através da thread que chamou run
+        chamadas = ChamadasPrincipais()
+
+        def report(step, message):
+            chamadas.chamar(narrar, step, message)
+
+        # Métricas por etapa: em results["metrics"], no progress_callback("metricas", registro) e em JSON
+        cfg_metricas = self.config.get("metricas", {}) or {}
+        medidor = MedidorEtapas(
+            usar_tracemalloc=cfg_metricas.get("tracemalloc", False),
+            ao_medir=(lambda registro: chamadas.chamar(progress_callback, "metricas", registro)) if progress_callback else None,
+        )
+
         try:
-            # Etapa 1: Contexto
-            competencia_selecionada = pd.to_datetime(competencia_str)
             results["competencia"] = competencia_str # Salva a competência nos resultados
-            
-            # Define o período do benefício (mês selecionado)
-            periodo_beneficio_ini = competencia_selecionada.replace(day=1)
-            periodo_beneficio_fim = competencia_selecionada + pd.offsets.MonthEnd(0)
-
-            # Define o período dos eventos (mês anterior ao do benefício)
-            mes_eventos = competencia_selecionada - pd.DateOffset(months=1)
-            periodo_eventos_ini = mes_eventos.replace(day=1)
-            periodo_eventos_fim = mes_eventos + pd.offsets.MonthEnd(0)
-
-            ctx = Contexto(
-                periodo_beneficio_ini=periodo_beneficio_ini,
-                periodo_beneficio_fim=periodo_beneficio_fim,
-                periodo_eventos_ini=periodo_eventos_ini,
-                periodo_eventos_fim=periodo_eventos_fim,
-                competencia=competencia_selecionada
-            )
-            meses_pt = [
-                "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"
-            ]
-            mes_comp = meses_pt[ctx.competencia.month - 1]
-            mes_ref = meses_pt[mes_eventos.month - 1]
-            report("contexto", f"Mês de Competência (Benefício): **{mes_comp}**")
-            report("contexto", f"Mês de Referência para Eventos (Admissão/Demissão): **{mes_ref}**")
+            ctx = self._build_context(competencia_str)
+            feriados = self.calculator.calendario.feriados
 
-            # Etapa 2: Coleta
-            bases, file_report = self.collector.execute(input_dir)
-            results["bases"] = bases
-            results["file_report"] = file_report
-            for base_name, filename in file_report.items():
-                report("coleta", f"Base `{base_name}`: Carregada do arquivo `{filename}` com **{len(bases.get(base_name, []))}** registros.")
-
-            # Etapa 3: Validação
-            bases_validadas, avisos = self.validator.execute(bases, ctx)
-            report("validacao", "Estruturas de dados internas preparadas e normalizadas.")
-            if avisos:
-                for aviso in avisos:
-                    report("validacao", f"⚠️ **Aviso:** {aviso}")
-            report("validacao", "Checagem de consistência de dados concluída.")
-
-            # Etapa 4: Elegibilidade
-            ativos_antes = len(bases_validadas.get("ATIVOS", pd.DataFrame()))
-            base_elegiveis = self.eligibility.execute(bases_validadas)
-            elegiveis_depois = len(base_elegiveis)
-            report("elegibilidade", f"Base inicial com **{ativos_antes}** colaboradores ativos.")
-            report("elegibilidade", f"Após aplicar as regras de exclusão (Diretores, Estagiários, etc.), **{elegiveis_depois}** colaboradores permaneceram.")
-            report("elegibilidade", f"Total de **{ativos_antes - elegiveis_depois}** colaboradores removidos da base de cálculo.")
+            # Execução idêntica a uma anterior: resultados e arquivos vêm do cache
+            chave_resultado = None
+            if use_cache and self.resultados.enabled and not (verificar_incremental or retomar or etapas):
+                chave_resultado = self.resultados.chave_execucao(
+                    input_dir, self.config, ctx, formatos or self.reporter.formatos, feriados
+                )
 
-            if base_elegiveis.empty:
-                report("calculo", "AVISO: Nenhum colaborador elegível encontrado. Cálculos não serão executados.")
-                return results
+                def restaurar() -> dict | None:
+                    restaurado = self.resultados.restaurar(chave_resultado, output_dir) if chave_resultado else None
+                    return None if restaurado is None else dict(zip(("resultados", "arquivos"), restaurado))
+
+                restaurado = medidor.medir("cache_resultado", restaurar, origem="cache")
+                if restaurado is not None:
+                    anteriores, arquivos = restaurado["resultados"], restaurado["arquivos"]
+                    results.update(anteriores)
+                    logs.update({etapa: list(mensagens) for etapa, mensagens in anteriores["logs"].items()})
+                    for arquivo in arquivos:
+                        report("relatorio", f"Arquivo restaurado do cache de resultados: `{arquivo}`")
+                    report("relatorio", "Resultado idêntico ao de uma execução anterior; cálculo não reexecutado.")
+                    results["metrics"] = self._metricas(medidor, ctx, output_dir, report)
+                    results["logs"] = logs
+                    return results
+
+            incremental = self.estado.enabled if incremental is None else incremental
+            incremental = incremental or verificar_incremental
+            dag = self._pipeline(input_dir, output_dir, ctx, use_cache, incremental, verificar_incremental, formatos, report)
+
+            # Checkpoints valem para os mesmos arquivos, configuração (exceto exportação) e competência
+            checkpoints, assinatura = None, ""
+            if self.checkpoints.enabled:
+                config_calculo = {k: v for k, v in self.config.items() if k != "exportacao"}
+                assinatura = self.resultados.chave_execucao(input_dir, config_calculo, ctx, [], feriados) or ""
+                checkpoints = self.checkpoints if assinatura else None
+            elif retomar or etapas:
+                raise ValueError("Retomar ou reexecutar etapas requer `checkpoints.habilitado: true` no config.yaml.")
+            max_workers = int((self.config.get("processamento", {}) or {}).get("etapas_paralelas") or 1)
+            valores = dag.executar(
+                checkpoints, EstadoIncremental.chave(input_dir, ctx), assinatura,
+                retomar=retomar, etapas=etapas, max_workers=max_workers, medidor=medidor, chamadas=chamadas,
+            )
+            for etapa, origem in dag.origem.items():
+                if origem == "checkpoint":
+                    passo = etapa if etapa in logs else "validacao" if etapa.startswith("preparo_") else "contexto"
+                    report(passo, f"Etapa `{etapa}` carregada do checkpoint da execução anterior.")
 
-            # Etapa 5: Cálculo
-            base_calculada = self.calculator.execute(base_elegiveis, bases_validadas, ctx)
-            results["base_final"] = base_calculada
-            report("calculo", "Fatores de ajuste para admissões e desligamentos foram calculados.")
-            report("calculo", "Dias de férias foram descontados dos dias a serem pagos.")
-            report("calculo", "Valor final do benefício foi calculado multiplicando os dias devidos pelo valor do sindicato.")
-            
-            # Resumo dos ajustes para o log
-            admitidos_ajustados = (base_calculada["FATOR_ADMISSAO"] < 1.0).sum()
-            deslig_zerados = (base_calculada["FATOR_DESLIG"] == 0.0).sum()
-            ferias_ajustadas = (base_calculada["FERIAS_DIAS"] > 0).sum()
-            report("calculo", f"Resumo dos Ajustes: **{admitidos_ajustados}** com VR proporcional (admissão), **{deslig_zerados}** com VR zerado (desligamento), **{ferias_ajustadas}** com desconto de dias por férias.")
-
-            # Etapa 6: Relatório
-            output_filename = f"VR MENSAL {competencia_selecionada.strftime('%m.%Y')}.xlsx"
-            output_path = f"{output_dir}/{output_filename}"
-            total_vr = self.reporter.execute(base_calculada, bases_validadas, ctx, output_path)
-            results["total_vr"] = total_vr
-            total_formatado = f"R$ {total_vr:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            report("relatorio", f"Planilha final gerada em: `{output_path}`")
-            report("relatorio", f"Valor total do benefício consolidado: **{total_formatado}**")
+            results["bases"] = valores["bases"]
+            results["file_report"] = valores["file_report"]
+            results["violacoes"] = valores["violacoes"]
+            results["exclusoes"] = valores["exclusoes"]
+            if valores.get("verificacao_incremental") is not None:
+                results["verificacao_incremental"] = valores["verificacao_incremental"]
+            if valores["base_calculada"].empty:
+                results["metrics"] = self._metricas(medidor, ctx, output_dir, report)
+                return results
+            results["base_final"] = valores["base_calculada"]
+            results["entradas_calculo"] = valores["entradas_calculo"]
+            results["total_vr"] = valores["total_vr"]
+            results["agregados"] = valores["agregados"]
+            results["particoes"] = valores["particoes"]
 
             results["logs"] = logs
+            if chave_resultado:
+                self.resultados.guardar(chave_resultado, results, valores["arquivos"], output_dir)
+            # Depois de guardar, para as métricas desta execução não irem para o cache de resultados
+            results["metrics"] = self._metricas(medidor, ctx, output_dir, report)
             return results
 
         except (FileNotFoundError, ValueError) as e:
@@ -149,4 +551,120 @@ class OrchestratorAgent:
         except Exception as e:
             logging.error(f"Erro inesperado no orquestrador: {e}", exc_info=True)
             report("validacao", f"**ERRO INESPERADO:** {e}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            medidor.encerrar()
+
+    def run_batch(self, input_dir: str, output_dir: str, competencias: list[str], progress_callback=None, use_cache: bool = True,
+                  formatos: list[str] | None = None) -> dict:
+        """
+        Executa várias competências de uma vez: as bases são lidas e validadas uma
+        única vez, e elegibilidade, cálculo e relatório rodam para cada mês com o
+        seu próprio Contexto. Gera um relatório por mês e um consolidado do período.
+
+        O cálculo é vetorizado dentro de cada mês (um mês por chamada do núcleo);
+        entre os meses, são compartilhados as bases validadas, o índice de
+        matrículas, a resolução de sindicatos e os feriados de cada UF. Sem o
+        grafo de etapas de `run`: não há checkpoints nem cache de resultados.
+        As métricas do lote (coleta e validação) ficam em results["metrics"] e as
+        de cada mês (elegibilidade, cálculo e relatório) em
+        results["competencias"][AAAA-MM]["metrics"], com o registro JSON do mês.
+        """
+        logs = {"contexto": [], "coleta": [], "validacao": [], "competencias": {}}
+        results = {
+            "total_vr": 0.0, "bases": {}, "file_report": {}, "violacoes": pd.DataFrame(),
+            "competencias": {}, "consolidado": None, "logs": logs,
+        }
+
+        def reporter_para(destino: dict):
+            def report(step, message):
+                logging.info(f"[{step}] {message}")
+                destino.setdefault(step, []).append(message)
+                if progress_callback:
+                    progress_callback(step, message)
+            return report
+
+        report = reporter_para(logs)
+        cfg_metricas = self.config.get("metricas", {}) or {}
+
+        def novo_medidor() -> MedidorEtapas:
+            return MedidorEtapas(
+                usar_tracemalloc=cfg_metricas.get("tracemalloc", False),
+                ao_medir=(lambda registro: progress_callback("metricas", registro)) if progress_callback else None,
+            )
+
+        medidor = novo_medidor()
+        try:
+            # Etapa 1: Contextos
+            contextos = [self._build_context(c) for c in sorted(competencias)]
+            if not contextos:
+                raise ValueError("Nenhuma competência informada para o processamento em lote.")
+            report("contexto", f"Processamento em lote de **{len(contextos)}** competência(s): "
+                               f"{contextos[0].competencia.strftime('%m/%Y')} a {contextos[-1].competencia.strftime('%m/%Y')}.")
+
+            # Etapas 2 e 3: Coleta e validação, uma única vez para todo o lote
+            coletadas = medidor.medir("coleta", lambda: dict(zip(("bases", "file_report"), self._coletar(input_dir, use_cache, report))))
+            bases, file_report = coletadas["bases"], coletadas["file_report"]
+            results["bases"], results["file_report"] = bases, file_report
+            try:
+                validadas = medidor.medir("validacao", lambda: dict(zip(
+                    ("bases_validadas", "index"),
+                    self._validar(bases, self._contexto_lote(contextos), report, checar_competencia=False),
+                )), {"bases": bases})
+                bases_validadas, index = validadas["bases_validadas"], validadas["index"]
+            finally:
+                results["violacoes"] = self.validator.violations
+
+            # Etapas 4 a 6 para cada competência
+            calculadas = []
+            for ctx in contextos:
+                chave = ctx.competencia.strftime("%Y-%m")
+                logs_mes = logs["competencias"].setdefault(chave, {})
+                report_mes = reporter_para(logs_mes)
+                resultado = {"total_vr": 0.0, "base_final": pd.DataFrame(), "exclusoes": pd.DataFrame(), "agregados": {}, "logs": logs_mes}
+                results["competencias"][chave] = resultado
+
+                medidor_mes = novo_medidor()
+                base_elegiveis = medidor_mes.medir("elegibilidade", lambda: {
+                    "base_elegiveis": self._elegibilidade(bases_validadas, index, ctx, report_mes),
+                }, {"bases_validadas": bases_validadas})["base_elegiveis"]
+                resultado["exclusoes"] = self.eligibility.exclusoes
+                if base_elegiveis.empty:
+                    report_mes("calculo", "AVISO: Nenhum colaborador elegível encontrado. Cálculos não serão executados.")
+                    resultado["metrics"] = self._metricas(medidor_mes, ctx, output_dir, report_mes)
+                    continue
+                base_calculada = medidor_mes.medir("calculo", lambda: {
+                    "base_calculada": self._calcular(base_elegiveis, bases_validadas, index, ctx, report_mes),
+                }, {"base_elegiveis": base_elegiveis})["base_calculada"]
+                resultado["base_final"] = base_calculada
+                resultado["entradas_calculo"] = self.calculator.entradas
+                resultado["total_vr"] = medidor_mes.medir("relatorio", lambda: {
+                    "total_vr": self._relatorio(base_calculada, bases_validadas, ctx, output_dir, results["violacoes"], index, report_mes, formatos),
+                }, {"base_calculada": base_calculada})["total_vr"]
+                resultado["agregados"] = self.reporter.agregados
+                resultado["particoes"] = self.reporter.particoes
+                resultado["metrics"] = self._metricas(medidor_mes, ctx, output_dir, report_mes)
+                calculadas.append((ctx, base_calculada))
+
+            # Consolidado do período
+            results["total_vr"] = sum(r["total_vr"] for r in results["competencias"].values())
+            if calculadas:
+                ini, fim = contextos[0].competencia, contextos[-1].competencia
+                consolidado_path = f"{output_dir}/VR CONSOLIDADO {ini.strftime('%m.%Y')} a {fim.strftime('%m.%Y')}.xlsx"
+                self.reporter.consolidar(calculadas, consolidado_path)
+                results["consolidado"] = consolidado_path
+                report("relatorio", f"Planilha consolidada gerada em: `{consolidado_path}`")
+            report("relatorio", f"Valor total do benefício no período: **{self._formatar_reais(results['total_vr'])}**")
+            results["metrics"] = medidor.resumo(competencias=[f"{ctx.competencia:%Y-%m-%d}" for ctx in contextos])
+            return results
+
+        except (FileNotFoundError, ValueError) as e:
+            logging.error(f"Erro de negócio tratado: {e}")
+            report("validacao", f"**ERRO:** {e}")
+            raise
+        except Exception as e:
+            logging.error(f"Erro inesperado no orquestrador: {e}", exc_info=True)
+            report("validacao", f"**ERRO INESPERADO:** {e}")
+            raise
+        finally:
+            medidor.encerrar()
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from .matricula_index import MatriculaIndex
+from .money import para_reais
+from .schema import ensure_datetime
+from .sindicato_resolver import SEM_SINDICATO, UF_POR_ESTADO
+
+SEM_UF = "(sem UF)"
+
+# Tipos de ajuste do mês; a posição define o bit de cada um na máscara AJUSTES
+AJUSTES = ("Admissão", "Desligamento", "Férias")
+SEM_AJUSTE = "Sem ajuste"
+
+# Somas acumuladas por grupo (em centavos, exceto Dias)
+METRICAS = {
+    "Dias": "DIAS_CALCULADOS",
+    "TOTAL": "VR_TOTAL",
+    "Custo empresa": "EMPRESA_80",
+    "Desconto profissional": "COLABORADOR_20",
+}
+COLUNAS_VALOR = ["TOTAL", "Custo empresa", "Desconto profissional"]
+
+
+def _codigos(s: pd.Series, ausente: str) -> tuple[np.ndarray, list[str]]:
+    codigos, rotulos = pd.factorize(s.astype(object).fillna(ausente), sort=True)
+    return codigos, [str(r) for r in rotulos]
+
+
+def _desligamento_comunicado(base: pd.DataFrame, desligados: pd.DataFrame | None) -> np.ndarray:
+    """
+    Linhas com "Desligado em ..." na OBS GERAL: matrícula em DESLIGADOS com data
+    e comunicado OK, buscada pelo índice de matrículas como no cálculo (vale a
+    primeira ocorrência), esteja ou não a data no período de eventos.
+    """
+    if desligados is None or desligados.empty or not {"MATRICULA", "DATA DEMISSÃO", "OK"} <= set(desligados.columns):
+        return np.zeros(len(base), dtype=bool)
+    index = MatriculaIndex({"DESLIGADOS": desligados})
+    codigos = index.codigos_de(base["MATRICULA"])
+    data = ensure_datetime(index.valores("DESLIGADOS", "DATA DEMISSÃO", codigos))
+    ok = index.valores("DESLIGADOS", "OK", codigos)
+    return (data.notna() & ok.eq(True)).to_numpy(dtype=bool)
+
+
+def mascara_ajustes(base: pd.DataFrame, desligados: pd.DataFrame | None = None) -> np.ndarray:
+    """Bits de ajuste de cada linha: admissão proporcional, desligamento e férias (mesmos critérios da OBS GERAL)."""
+    condicoes = [
+        (base["ADMISSAO"].notna() & (base["FATOR_ADMISSAO"] < 1.0)).to_numpy(dtype=bool),
+        _desligamento_comunicado(base, desligados),
+        (base["FERIAS_DIAS"] > 0).to_numpy(dtype=bool),
+    ]
+    mascara = np.zeros(len(base), dtype="int64")
+    for bit, condicao in enumerate(condicoes):
+        mascara |= condicao.astype("int64") << bit
+    return mascara
+
+
+def calcular_agregados(base: pd.DataFrame, bases: dict) -> dict:
+    """
+    Agregados do relatório em uma única passada sobre a base calculada: cada
+    linha recebe uma chave (sindicato, UF, máscara de ajustes) e as métricas são
+    somadas por chave de uma só vez. Os quadros por sindicato, por UF e por tipo
+    de ajuste saem do cubo resultante, que tem no máximo sindicatos x UFs x 8
+    células. Valores em centavos; `para_reais_quadros` converte para a escrita.
+    """
+    n_ajustes = 1 << len(AJUSTES)
+    cod_sind, sindicatos = _codigos(base["SINDICATO"], SEM_SINDICATO)
+    cod_uf, estados = _codigos(base["ESTADO"], SEM_UF)
+    chave = (cod_sind * len(estados) + cod_uf) * n_ajustes + mascara_ajustes(base, bases.get("DESLIGADOS"))
+    forma = (len(sindicatos), len(estados), n_ajustes)
+    tamanho = int(np.prod(forma))
+
+    cubos = {"Colaboradores": np.bincount(chave, minlength=tamanho).reshape(forma)}
+    for nome, coluna in METRICAS.items():
+        pesos = base[coluna].to_numpy(dtype="int64")
+        # bincount soma em float64; os centavos são inteiros exatos até 2**53
+        cubos[nome] = np.rint(np.bincount(chave, weights=pesos, minlength=tamanho)).astype("int64").reshape(forma)
+
+    por_sindicato = pd.DataFrame({nome: c.sum(axis=(1, 2)) for nome, c in cubos.items()},
+                                 index=pd.Index(sindicatos, name="Sindicato"))
+    por_uf = pd.DataFrame({nome: c.sum(axis=(0, 2)) for nome, c in cubos.items()},
+                          index=pd.Index(estados, name="Estado"))
+    por_uf.insert(0, "UF", [UF_POR_ESTADO.get(e, "") for e in estados])
+
+    # Um colaborador com mais de um ajuste entra em cada tipo correspondente
+    mascaras = np.arange(n_ajustes)
+    selecoes = [((mascaras >> bit) & 1) == 1 for bit in range(len(AJUSTES))] + [mascaras == 0]
+    por_ajuste = pd.DataFrame(
+        {nome: [int(c.sum(axis=(0, 1))[sel].sum()) for sel in selecoes] for nome, c in cubos.items()},
+        index=pd.Index(list(AJUSTES) + [SEM_AJUSTE], name="Ajuste"),
+    )
+
+    des = bases.get("DESLIGADOS", pd.DataFrame())
+    des_ok_ate15 = des_pos15 = 0
+    if not des.empty and "DATA DEMISSÃO" in des.columns and "OK" in des.columns:
+        dia = des["DATA DEMISSÃO"].dt.day
+        des_ok_ate15 = int(((dia <= 15) & des["OK"]).sum())
+        des_pos15 = int((dia >= 16).sum())
+    sv = bases.get("SIND_VALOR", pd.DataFrame())
+    sind_resumo = ", ".join(f"{e}: {v:.2f}" for e, v in zip(sv.get("ESTADO", []), sv.get("VALOR", [])))
+
+    resumo = {
+        "total": int(por_sindicato["TOTAL"].sum()),
+        "custo_empresa": int(por_sindicato["Custo empresa"].sum()),
+        "desconto_profissional": int(por_sindicato["Desconto profissional"].sum()),
+        "dias": int(por_sindicato["Dias"].sum()),
+        "colaboradores": len(base),
+        "afastados": len(bases.get("AFASTAMENTOS", pd.DataFrame())),
+        "desligados": len(des),
+        "admitidos": len(bases.get("ADMISSAO", pd.DataFrame())),
+        "ferias_dias": int(bases.get("FERIAS", pd.DataFrame()).get("DIAS DE FÉRIAS", pd.Series(dtype="int64")).sum()),
+        "estagiarios": len(bases.get("ESTAGIO", pd.DataFrame())),
+        "aprendizes": len(bases.get("APRENDIZ", pd.DataFrame())),
+        "desligados_ate15": des_ok_ate15,
+        "desligados_pos16": des_pos15,
+        "exterior": len(bases.get("EXTERIOR", pd.DataFrame())),
+        "ativos": len(bases.get("ATIVOS", pd.DataFrame())),
+        "sindicatos_valor": sind_resumo,
+    }
+    return {"resumo": resumo, "por_sindicato": por_sindicato, "por_uf": por_uf, "por_ajuste": por_ajuste}
+
+
+def para_reais_quadros(quadro: pd.DataFrame) -> pd.DataFrame:
+    """Cópia do quadro com as colunas monetárias em reais e o índice como coluna, pronta para a planilha."""
+    quadro = quadro.copy()
+    for coluna in COLUNAS_VALOR:
+        quadro[coluna] = para_reais(quadro[coluna])
+    return quadro.reset_index()
@@ -1,97 +1,330 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
 import logging
 from .context import Contexto
+from .exporters import criar_exportador, validar_formatos
+from .matricula_index import MatriculaIndex
+from .money import formatar_reais, para_reais
+from .report_aggregates import calcular_agregados, para_reais_quadros
+from .xlsx_writer import StreamingXlsxWriter
+
+# Nome da partição para linhas sem valor na coluna de particionamento
+SEM_VALOR = "SEM VALOR"
+
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _escrever_particao(config: dict, particao: str, base: pd.DataFrame, ctx: Contexto, destino_base: str,
+                       formatos: list[str]) -> list[dict]:
+    """
+    Ponto de entrada dos processos do pool de partições. Grava o detalhe de uma
+    partição em cada formato e devolve as linhas do manifesto (uma por arquivo).
+    """
+    total = int(base["VR_TOTAL"].sum())
+    registros = []
+    for formato, arquivo, linhas in ReporterAgent(config)._escrever_detalhe(base, ctx, destino_base, formatos):
+        registros.append({
+            "PARTICAO": particao, "FORMATO": formato, "ARQUIVO": os.path.basename(arquivo),
+            "LINHAS": linhas, "TOTAL": total, "SHA256": _sha256(arquivo),
+        })
+    return registros
+
 
 class ReporterAgent:
     """
     Agente que formata e gera o arquivo de saída final.
     """
 
-    def execute(self, base_calculada: pd.DataFrame, bases: dict, ctx: Contexto, out_xlsx: str) -> float:
-        """
-        Recebe a base final calculada e a exporta para uma planilha Excel formatada.
-        """
-        logging.info("Agente Relator: Iniciando geração do relatório final.")
-        if base_calculada.empty:
-            logging.warning("Agente Relator: Base calculada está vazia. Nenhum relatório será gerado.")
-            return 0.0
+    # Limite de linhas de uma aba do Excel (descontando o cabeçalho)
+    MAX_LINHAS_ABA = 1_048_575
 
-        df = base_calculada.copy()
+    FINAL_COLS = [
+        "Matricula", "Admissão", "Sindicato do Colaborador", "Competência", "Dias",
+        "VALOR DIÁRIO VR", "TOTAL", "Custo empresa", "Desconto profissional", "OBS GERAL"
+    ]
 
-        final_cols = [
-            "Matricula", "Admissão", "Sindicato do Colaborador", "Competência", "Dias", 
-            "VALOR DIÁRIO VR", "TOTAL", "Custo empresa", "Desconto profissional", "OBS GERAL"
-        ]
-        
+    def __init__(self, config: dict | None = None):
+        self.config = config or {}
+        exportacao = self.config.get("exportacao", {}) or {}
+        self.formatos = validar_formatos(exportacao.get("formatos") or ["xlsx"])
+        self.linhas_por_bloco = int(exportacao.get("linhas_por_bloco") or 50_000)
+        self.arquivos: list[str] = []
+        self.agregados: dict = {}
+        self.particoes: pd.DataFrame | None = None
+
+    @classmethod
+    def _layout_final(cls, df: pd.DataFrame, ctx: Contexto) -> pd.DataFrame:
+        """Layout das colunas do relatório para um bloco da base calculada."""
         final_df = pd.DataFrame({
             "Matricula": df["MATRICULA"].astype("Int64"),
             "Admissão": df["ADMISSAO"],
             "Sindicato do Colaborador": df["SINDICATO"],
             "Competência": ctx.competencia.strftime('%m/%Y'),
             "Dias": df["DIAS_CALCULADOS"].astype(int),
-            "VALOR DIÁRIO VR": df["VALOR_UNITARIO"].astype(float),
-            "TOTAL": df["VR_TOTAL"].astype(float),
-            "Custo empresa": df["EMPRESA_80"].astype(float),
-            "Desconto profissional": df["COLABORADOR_20"].astype(float),
+            # Valores monetários chegam em centavos e só aqui viram reais
+            "VALOR DIÁRIO VR": para_reais(df["VALOR_UNITARIO"]),
+            "TOTAL": para_reais(df["VR_TOTAL"]),
+            "Custo empresa": para_reais(df["EMPRESA_80"]),
+            "Desconto profissional": para_reais(df["COLABORADOR_20"]),
             "OBS GERAL": df["OBS GERAL"],
-        })
-        final_df = final_df[final_cols]
+        }, index=df.index)
+        return final_df[cls.FINAL_COLS]
 
-        # --- Lógica para a aba de Validações ---
-        valor_total_vr = final_df["TOTAL"].sum()
-        des = bases.get("DESLIGADOS", pd.DataFrame())
-        des_ok_ate15 = 0
-        des_pos15 = 0
-        if not des.empty and "DATA DEMISSÃO" in des.columns and "OK" in des.columns:
-            des_ok_ate15 = ((des["DATA DEMISSÃO"].dt.day <= 15) & (des["OK"])).sum()
-            des_pos15 = (des["DATA DEMISSÃO"].dt.day >= 16).sum()
+    def _blocos(self, df: pd.DataFrame, ctx: Contexto):
+        """Gera o layout final bloco a bloco, sem materializar uma cópia inteira da base."""
+        for inicio in range(0, len(df), self.linhas_por_bloco):
+            yield self._layout_final(df.iloc[inicio:inicio + self.linhas_por_bloco], ctx)
+
+    def _escrever_detalhe(self, df: pd.DataFrame, ctx: Contexto, destino_base: str,
+                          formatos: list[str]) -> list[tuple[str, str, int]]:
+        """
+        Grava só o detalhe (layout final) de `df` em cada formato, no caminho
+        `destino_base` com a extensão do formato. Devolve (formato, arquivo, linhas).
+        """
+        gerados = []
+        for formato in formatos:
+            if formato == "xlsx":
+                destino = destino_base + ".xlsx"
+                with StreamingXlsxWriter(destino) as w:
+                    w.aba(f"VR MENSAL {ctx.competencia.strftime('%m.%Y')}", self._blocos(df, ctx), cabecalho_estilizado=True)
+                linhas = len(df)
+            else:
+                exportador = criar_exportador(formato, self.config)
+                destino = destino_base + exportador.extensao
+                linhas = exportador.escrever(destino, self._blocos(df, ctx), ctx)
+            logging.info(f"Agente Relator: Exportação '{formato}' salva em '{destino}' ({linhas} linhas).")
+            gerados.append((formato, destino, linhas))
+        return gerados
 
-        sv = bases.get("SIND_VALOR", pd.DataFrame())
-        sind_resumo = ", ".join(f"{r.ESTADO}: {r.VALOR:.2f}" for _, r in sv.iterrows())
+    @staticmethod
+    def _nomes_arquivo(particoes: list[str]) -> dict[str, str]:
+        """Nome de arquivo seguro e único para cada partição."""
+        nomes, usados = {}, set()
+        for particao in particoes:
+            base = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", particao).strip(" .")[:80] or SEM_VALOR
+            nome, n = base, 2
+            while nome.upper() in usados:
+                nome, n = f"{base} ({n})", n + 1
+            usados.add(nome.upper())
+            nomes[particao] = nome
+        return nomes
+
+    def _particionar(self, df: pd.DataFrame, ctx: Contexto, out_xlsx: str, formatos: list[str],
+                     cfg: dict, total_centavos: int) -> pd.DataFrame:
+        """
+        Divide a base pela coluna `cfg["coluna"]` (com o `mapa` opcional de valor
+        para partição, ex.: sindicato -> contrato da operadora) e grava as
+        partições em paralelo no diretório "VR MENSAL MM.AAAA", com o
+        MANIFESTO.json (arquivo, linhas, total e SHA-256 de cada arquivo). A
+        soma das partições precisa bater, em centavos, com o total da base.
+        """
+        coluna = cfg["coluna"]
+        if coluna not in df.columns:
+            raise ValueError(f"Particionamento: coluna '{coluna}' não existe na base calculada. Use uma de {list(df.columns)}.")
+        chaves = df[coluna].astype(object)
+        mapa = cfg.get("mapa") or {}
+        if mapa:
+            chaves = chaves.map(mapa).where(chaves.isin(list(mapa)), chaves)
+        chaves = chaves.where(chaves.notna(), SEM_VALOR).astype(str)
+
+        diretorio = os.path.splitext(out_xlsx)[0]
+        os.makedirs(diretorio, exist_ok=True)
+        prefixo = os.path.basename(diretorio)
+        grupos = df.groupby(chaves.to_numpy(), sort=True).indices
+        nomes = self._nomes_arquivo(list(grupos))
+        jobs = [
+            (self.config, particao, df.iloc[posicoes], ctx, os.path.join(diretorio, f"{prefixo} - {nomes[particao]}"), formatos)
+            for particao, posicoes in grupos.items()
+        ]
+
+        workers = min(int(cfg.get("max_workers") or os.cpu_count() or 1), len(jobs), os.cpu_count() or 1)
+        logging.info(f"Agente Relator: Gravando {len(jobs)} partição(ões) por '{coluna}' com {workers} processo(s).")
+        registros = []
+        if workers > 1:
+            # "spawn" pelo mesmo motivo da coleta: o relatório roda em uma thread do pipeline
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                for future in [pool.submit(_escrever_particao, *job) for job in jobs]:
+                    registros.extend(future.result())
+        else:
+            for job in jobs:
+                registros.extend(_escrever_particao(*job))
+        manifesto = pd.DataFrame(registros, columns=["PARTICAO", "FORMATO", "ARQUIVO", "LINHAS", "TOTAL", "SHA256"])
+
+        # Conferência: cada partição conta uma vez, independentemente do número de formatos
+        por_particao = manifesto.drop_duplicates("PARTICAO")
+        soma, linhas = int(por_particao["TOTAL"].sum()), int(por_particao["LINHAS"].sum())
+        if soma != total_centavos or linhas != len(df):
+            raise ValueError(
+                f"Particionamento: as partições somam {formatar_reais(soma)} em {linhas} linhas, "
+                f"mas a base tem {formatar_reais(total_centavos)} em {len(df)} linhas."
+            )
+
+        caminho_manifesto = os.path.join(diretorio, "MANIFESTO.json")
+        with open(caminho_manifesto, "w", encoding="utf-8") as f:
+            json.dump({
+                "competencia": ctx.competencia.strftime("%m/%Y"),
+                "coluna": coluna,
+                "particoes": len(jobs),
+                "linhas": linhas,
+                "total_centavos": soma,
+                "arquivos": [
+                    {("total_centavos" if k == "TOTAL" else k.lower()): v for k, v in r.items()}
+                    for r in manifesto.to_dict("records")
+                ],
+            }, f, ensure_ascii=False, indent=2, default=int)
+        self.arquivos.append(caminho_manifesto)
+        logging.info(f"Agente Relator: {len(manifesto)} arquivo(s) particionado(s) em '{diretorio}'; total conferido: {formatar_reais(soma)}.")
+        return manifesto
+
+    @staticmethod
+    def _quadro_particoes(manifesto: pd.DataFrame) -> pd.DataFrame:
+        """Manifesto para a aba "Partições", em reais e com a linha de total consolidado."""
+        quadro = manifesto.copy()
+        por_particao = quadro.drop_duplicates("PARTICAO")
+        total = {"PARTICAO": "TOTAL", "LINHAS": int(por_particao["LINHAS"].sum()), "TOTAL": int(por_particao["TOTAL"].sum())}
+        quadro = pd.concat([quadro, pd.DataFrame([total])], ignore_index=True)
+        quadro["TOTAL"] = para_reais(quadro["TOTAL"])
+        return quadro
+
+    def execute(self, base_calculada: pd.DataFrame, bases: dict, ctx: Contexto, out_xlsx: str,
+                violacoes: pd.DataFrame | None = None, index: MatriculaIndex | None = None,
+                formatos: list[str] | None = None) -> float:
+        """
+        Recebe a base final calculada e a exporta para uma planilha Excel formatada.
+        Se houver violações de validação, elas são exportadas na aba "Violações";
+        matrículas repetidas detectadas pelo índice entram na aba "Validações".
+        Os demais formatos de `formatos` (padrão: `exportacao.formatos` do
+        config.yaml) são gravados ao lado da planilha, com o mesmo nome e a
+        extensão de cada formato. Os caminhos gerados ficam em `self.arquivos`.
+        Os agregados (resumo e quadros por sindicato, UF e tipo de ajuste) são
+        calculados em uma única passada, gravados nas abas "Por Sindicato",
+        "Por UF" e "Por Ajuste" e guardados em `self.agregados`. Com
+        `exportacao.particionamento.coluna`, o detalhe é gravado em um arquivo
+        por partição e o manifesto fica em `self.particoes`.
+        """
+        logging.info("Agente Relator: Iniciando geração do relatório final.")
+        self.arquivos = []
+        self.agregados = {}
+        self.particoes = None
+        if base_calculada.empty:
+            logging.warning("Agente Relator: Base calculada está vazia. Nenhum relatório será gerado.")
+            return 0.0
+
+        formatos = validar_formatos(formatos) if formatos else self.formatos
+        df = base_calculada
+
+        # --- Lógica para a aba de Validações ---
+        self.agregados = calcular_agregados(df, bases)
+        resumo = self.agregados["resumo"]
+        total_centavos = resumo["total"]
 
         valid_lines = [
-            ("VALOR TOTAL VR", f"R$ {valor_total_vr:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")),
-            ("Colaboradores Processados", len(final_df)),
+            ("VALOR TOTAL VR", formatar_reais(total_centavos)),
+            ("Colaboradores Processados", resumo["colaboradores"]),
             ("---", "---"),
-            ("Afastados / Licenças", len(bases.get("AFASTAMENTOS", pd.DataFrame()))),
-            ("DESLIGADOS GERAL", len(des)),
-            ("Admitidos mês", len(bases.get("ADMISSAO", pd.DataFrame()))),
-            ("Férias (total dias)", int(bases.get("FERIAS", pd.DataFrame()).get("DIAS DE FÉRIAS", 0).sum())),
-            ("ESTAGIARIO", len(bases.get("ESTAGIO", pd.DataFrame()))),
-            ("APRENDIZ", len(bases.get("APRENDIZ", pd.DataFrame()))),
-            ("SINDICATOS x VALOR", sind_resumo),
-            ("DESLIGADOS ATÉ O DIA 15 DO MÊS", int(des_ok_ate15)),
-            ("DESLIGADOS DO DIA 16 EM DIANTE", int(des_pos15)),
-            ("EXTERIOR", len(bases.get("EXTERIOR", pd.DataFrame()))),
-            ("ATIVOS (base original)", len(bases.get("ATIVOS", pd.DataFrame()))),
+            ("Afastados / Licenças", resumo["afastados"]),
+            ("DESLIGADOS GERAL", resumo["desligados"]),
+            ("Admitidos mês", resumo["admitidos"]),
+            ("Férias (total dias)", resumo["ferias_dias"]),
+            ("ESTAGIARIO", resumo["estagiarios"]),
+            ("APRENDIZ", resumo["aprendizes"]),
+            ("SINDICATOS x VALOR", resumo["sindicatos_valor"]),
+            ("DESLIGADOS ATÉ O DIA 15 DO MÊS", resumo["desligados_ate15"]),
+            ("DESLIGADOS DO DIA 16 EM DIANTE", resumo["desligados_pos16"]),
+            ("EXTERIOR", resumo["exterior"]),
+            ("ATIVOS (base original)", resumo["ativos"]),
         ]
+        if index is not None:
+            for nome_base, repetidas in index.duplicadas.items():
+                valid_lines.append((f"MATRÍCULAS REPETIDAS ({nome_base})", len(repetidas)))
         valid_df = pd.DataFrame(valid_lines, columns=["Validações","Check"])
 
-        with pd.ExcelWriter(out_xlsx, engine="openpyxl") as w:
-            sheet_name = f"VR MENSAL {ctx.competencia.strftime('%m.%Y')}"
-            final_df.to_excel(w, sheet_name=sheet_name, index=False)
-            valid_df.to_excel(w, sheet_name="Validações", index=False)
+        particionamento = (self.config.get("exportacao", {}) or {}).get("particionamento", {}) or {}
+        if particionamento.get("coluna"):
+            self.particoes = self._particionar(df, ctx, out_xlsx, formatos, particionamento, total_centavos)
+
+        if "xlsx" in formatos or self.particoes is not None:
+            # Escrita em uma única passada, com o cabeçalho da aba principal já estilizado.
+            # Com particionamento, o detalhe fica nos arquivos das partições e a
+            # planilha principal traz o manifesto na aba "Partições".
+            with StreamingXlsxWriter(out_xlsx) as w:
+                if self.particoes is None:
+                    w.aba(f"VR MENSAL {ctx.competencia.strftime('%m.%Y')}", self._blocos(df, ctx), cabecalho_estilizado=True)
+                else:
+                    w.aba("Partições", self._quadro_particoes(self.particoes), cabecalho_estilizado=True)
+                w.aba("Validações", valid_df)
+                w.aba("Por Sindicato", para_reais_quadros(self.agregados["por_sindicato"]), cabecalho_estilizado=True)
+                w.aba("Por UF", para_reais_quadros(self.agregados["por_uf"]), cabecalho_estilizado=True)
+                w.aba("Por Ajuste", para_reais_quadros(self.agregados["por_ajuste"]), cabecalho_estilizado=True)
+                if violacoes is not None and not violacoes.empty:
+                    if len(violacoes) > self.MAX_LINHAS_ABA:
+                        logging.warning(f"Agente Relator: {len(violacoes)} violações excedem o limite do Excel; apenas as primeiras {self.MAX_LINHAS_ABA} foram exportadas.")
+                    w.aba("Violações", violacoes.head(self.MAX_LINHAS_ABA))
+            self.arquivos.insert(0, out_xlsx)
+            logging.info(f"Agente Relator: Relatório final salvo em '{out_xlsx}'.")
 
-        # --- Ajustes de formatação com openpyxl ---
-        wb = openpyxl.load_workbook(out_xlsx)
-        ws = wb[sheet_name]
+        if self.particoes is None:
+            outros = [f for f in formatos if f != "xlsx"]
+            for _, destino, _ in self._escrever_detalhe(df, ctx, os.path.splitext(out_xlsx)[0], outros):
+                self.arquivos.append(destino)
 
-    # Cabeçalhos permanecem na primeira linha, sem linha de totalização
+        logging.info(f"Agente Relator: Valor total: {formatar_reais(total_centavos)}")
+        return total_centavos / 100
 
-        # 2. Formatação dos headers (linha 2)
-        header_fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
-        header_font = Font(name="Calibri", size=8, bold=True, color="FFFFFF")
-        for col in range(1, ws.max_column + 1):
-            cell = ws.cell(row=1, column=col)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center", vertical="center")
+    def consolidar(self, calculadas: list[tuple[Contexto, pd.DataFrame]], out_xlsx: str) -> pd.DataFrame:
+        """
+        Gera a planilha consolidada de um processamento em lote: a aba "Consolidado"
+        com os totais de cada competência e a aba "Por Colaborador" com o TOTAL de
+        cada matrícula por mês.
+        """
+        logging.info(f"Agente Relator: Gerando consolidado de {len(calculadas)} competência(s).")
+        linhas, partes = [], []
+        for ctx, base in calculadas:
+            competencia = ctx.competencia.strftime("%m/%Y")
+            linhas.append({
+                "Competência": competencia,
+                "Colaboradores": len(base),
+                "Dias": int(base["DIAS_CALCULADOS"].sum()),
+                "TOTAL": int(base["VR_TOTAL"].sum()),
+                "Custo empresa": int(base["EMPRESA_80"].sum()),
+                "Desconto profissional": int(base["COLABORADOR_20"].sum()),
+            })
+            partes.append(pd.DataFrame({
+                "Matricula": base["MATRICULA"].astype("Int64"),
+                "Competência": competencia,
+                "TOTAL": base["VR_TOTAL"].astype("int64"),
+            }))
+        resumo = pd.DataFrame(linhas)
+        totais = resumo.drop(columns="Competência").sum()
+        resumo = pd.concat([resumo, pd.DataFrame([{"Competência": "TOTAL", **totais.to_dict()}])], ignore_index=True)
 
+        ordem = [ctx.competencia.strftime("%m/%Y") for ctx, _ in calculadas]
+        por_colaborador = (
+            pd.concat(partes, ignore_index=True)
+            .pivot_table(index="Matricula", columns="Competência", values="TOTAL", aggfunc="sum", fill_value=0)
+            .reindex(columns=ordem, fill_value=0)
+        )
+        por_colaborador["TOTAL"] = por_colaborador.sum(axis=1)
+        por_colaborador = (por_colaborador / 100).reset_index()
+        por_colaborador.columns.name = None
+        # Somas feitas em centavos; conversão para reais apenas na escrita
+        colunas_valor = ["TOTAL", "Custo empresa", "Desconto profissional"]
+        resumo[colunas_valor] = resumo[colunas_valor] / 100
 
-        wb.save(out_xlsx)
+        with StreamingXlsxWriter(out_xlsx) as w:
+            w.aba("Consolidado", resumo, cabecalho_estilizado=True)
+            w.aba("Por Colaborador", por_colaborador, cabecalho_estilizado=True)
 
-        logging.info(f"Agente Relator: Relatório final salvo em '{out_xlsx}'. Valor total: {valor_total_vr}")
-        return valor_total_vr
\ No newline at end of file
+        logging.info(f"Agente Relator: Consolidado salvo em '{out_xlsx}'. Valor total: {formatar_reais(totais['TOTAL'])}")
+        return resumo
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import os
+
+import pandas as pd
+
+from .context import Contexto
+from .incremental_state import EstadoIncremental
+from .ingest_cache import IngestCache
+
+# Resultados guardados de cada execução. "bases" (as bases lidas) fica de fora
+# por ser o maior item e não ser usado depois do relatório.
+CAMPOS_RESULTADO = (
+    "total_vr", "base_final", "file_report", "violacoes", "exclusoes", "competencia",
+    "entradas_calculo", "agregados", "particoes", "logs",
+)
+
+
+class ResultCache(IngestCache):
+    """
+    Cache em disco dos resultados de `OrchestratorAgent.run`.
+
+    A chave é o hash do conteúdo de todos os arquivos do diretório de entrada,
+    da configuração efetiva, dos feriados carregados, da competência e dos
+    formatos de saída. Cada entrada guarda os resultados (base final, logs,
+    totais e agregados) e o conteúdo dos arquivos gerados, que são regravados
+    no diretório de saída quando a mesma execução se repete. Evicção por idade
+    e tamanho (LRU) e limpeza explícita são as do cache de coleta.
+    """
+
+    NOME = "Cache de resultados"
+    VERSAO = 1
+
+    def __init__(self, cache_dir: str, max_mb: float = 256, max_age_days: float = 30, enabled: bool = True):
+        super().__init__(cache_dir, max_mb, max_age_days, enabled)
+        self._impressoes: dict[tuple, str] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ResultCache":
+        cfg = config.get("cache_resultado", {}) or {}
+        return cls(
+            cache_dir=cfg.get("diretorio", ".cache/resultado"),
+            max_mb=cfg.get("tamanho_max_mb", 256),
+            max_age_days=cfg.get("idade_max_dias", 30),
+            enabled=cfg.get("habilitado", True),
+        )
+
+    def chave_execucao(self, input_dir: str, config: dict, ctx: Contexto, formatos: list[str],
+                       feriados: pd.DataFrame) -> str | None:
+        """Chave da execução, ou None se o diretório de entrada não existir."""
+        if not os.path.isdir(input_dir):
+            return None
+        arquivos = {
+            nome: self._impressao(os.path.join(input_dir, nome))
+            for nome in sorted(os.listdir(input_dir))
+            if os.path.isfile(os.path.join(input_dir, nome))
+        }
+        payload = json.dumps(
+            {
+                "versao": self.VERSAO, "arquivos": arquivos, "config": config,
+                "competencia": f"{ctx.competencia:%Y-%m-%d}", "formatos": formatos,
+                "feriados": EstadoIncremental.hash_base(feriados),
+            },
+            sort_keys=True, ensure_ascii=False, default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _impressao(self, caminho: str) -> str:
+        """Hash do arquivo, reaproveitado enquanto tamanho e mtime não mudarem (a chave é calculada mais de uma vez por execução)."""
+        st = os.stat(caminho)
+        marca = (os.path.abspath(caminho), st.st_size, st.st_mtime_ns)
+        if marca not in self._impressoes:
+            self._impressoes[marca] = self.fingerprint(caminho)
+        return self._impressoes[marca]
+
+    def guardar(self, chave: str, results: dict, arquivos: list[str], output_dir: str) -> None:
+        """Guarda os resultados e o conteúdo dos arquivos gerados (caminhos relativos ao diretório de saída)."""
+        conteudo = {}
+        for arquivo in arquivos:
+            with open(arquivo, "rb") as f:
+                conteudo[os.path.relpath(arquivo, output_dir)] = f.read()
+        self.put(chave, {
+            "versao": self.VERSAO,
+            "resultados": {campo: results.get(campo) for campo in CAMPOS_RESULTADO},
+            "arquivos": conteudo,
+        })
+
+    def restaurar(self, chave: str, output_dir: str) -> tuple[dict, list[str]] | None:
+        """Regrava os arquivos guardados em `output_dir` e devolve (resultados, caminhos), ou None."""
+        entrada = self.get(chave)
+        if entrada is None or entrada.get("versao") != self.VERSAO:
+            return None
+        caminhos = []
+        for relativo, dados in entrada["arquivos"].items():
+            destino = os.path.join(output_dir, relativo)
+            os.makedirs(os.path.dirname(destino) or ".", exist_ok=True)
+            with open(destino, "wb") as f:
+                f.write(dados)
+            caminhos.append(destino)
+        logging.info(f"{self.NOME}: {len(caminhos)} arquivo(s) restaurado(s) em '{output_dir}'.")
+        return entrada["resultados"], caminhos
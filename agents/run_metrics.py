@@ -0,0 +1,151 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de RSS fica em branco
+    resource = None
+
+
+def contar_linhas(valor) -> int:
+    """Linhas de um DataFrame ou de um dict de DataFrames (ex.: as bases coletadas)."""
+    if isinstance(valor, pd.DataFrame):
+        return len(valor)
+    if isinstance(valor, dict):
+        return sum(len(v) for v in valor.values() if isinstance(v, pd.DataFrame))
+    return 0
+
+
+def memoria_mb(valor) -> float:
+    """Memória ocupada (deep) por um DataFrame ou por um dict de DataFrames, em MB."""
+    if isinstance(valor, pd.DataFrame):
+        return float(valor.memory_usage(deep=True).sum()) / 1024 ** 2
+    if isinstance(valor, dict):
+        return sum(memoria_mb(v) for v in valor.values() if isinstance(v, pd.DataFrame))
+    return 0.0
+
+
+def _rss_pico_mb() -> float | None:
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return round(pico / 1024 ** 2 if sys.platform == "darwin" else pico / 1024, 3)
+
+
+def _rss_atual_mb() -> float | None:
+    """RSS atual do processo, lido de /proc/self/statm (Linux); None onde não há /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+
+
+def _cpu_filhos_s() -> float:
+    if resource is None:
+        return 0.0
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+
+class MedidorEtapas:
+    """
+    Métricas por etapa de uma execução: tempo de parede, tempo de CPU, pico
+    de memória, linhas de entrada e saída e memória dos DataFrames gerados.
+
+    O tempo de CPU é o da thread da etapa somado ao dos processos filhos
+    encerrados durante ela (o pool da coleta). A memória do processo é o RSS
+    atual no fim da etapa e a variação desde o início dela (Linux; em branco
+    onde não há /proc); o pico de RSS da execução fica só no resumo. Com
+    `tracemalloc`, também é medido o pico de alocação da etapa, o que deixa a
+    execução mais lenta. Etapas que rodam ao mesmo tempo compartilham as
+    medidas de memória.
+    """
+
+    def __init__(self, usar_tracemalloc: bool = False, ao_medir: Callable[[dict], None] | None = None):
+        self.usar_tracemalloc = usar_tracemalloc
+        self.ao_medir = ao_medir
+        self.etapas: list[dict] = []
+        self._lock = threading.Lock()
+        self._inicio = time.perf_counter()
+        self._cpu_inicio = time.process_time() + _cpu_filhos_s()
+        self._iniciou_tracemalloc = False
+        if usar_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+
+    def medir(self, etapa: str, executar: Callable[[], dict | None], entradas: dict | None = None,
+              origem: str = "executada") -> dict | None:
+        """
+        Executa `executar` (que devolve as saídas da etapa) e registra as
+        métricas. Um retorno None (ex.: checkpoint ausente) não é registrado.
+        """
+        if self.usar_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        cpu = time.thread_time()
+        cpu_filhos = _cpu_filhos_s()
+        rss_inicio = _rss_atual_mb()
+        saidas = executar()
+        if saidas is None:
+            return None
+        rss_fim = _rss_atual_mb()
+        registro = {
+            "etapa": etapa,
+            "origem": origem,
+            "inicio_s": round(inicio - self._inicio, 4),
+            "tempo_s": round(time.perf_counter() - inicio, 4),
+            "cpu_s": round(time.thread_time() - cpu + _cpu_filhos_s() - cpu_filhos, 4),
+            "rss_mb": round(rss_fim, 3) if rss_fim is not None else None,
+            "rss_variacao_mb": round(rss_fim - rss_inicio, 3) if rss_fim is not None and rss_inicio is not None else None,
+            "memoria_pico_mb": (
+                round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 3) if self.usar_tracemalloc and tracemalloc.is_tracing() else None
+            ),
+            "linhas_entrada": sum(contar_linhas(v) for v in (entradas or {}).values()),
+            "linhas_saida": sum(contar_linhas(v) for v in saidas.values()),
+            "memoria_saida_mb": round(sum(memoria_mb(v) for v in saidas.values()), 3),
+        }
+        with self._lock:
+            self.etapas.append(registro)
+        logging.info(
+            f"Métricas: etapa '{etapa}' ({origem}) em {registro['tempo_s']:.3f}s, CPU {registro['cpu_s']:.3f}s, "
+            f"{registro['linhas_entrada']} -> {registro['linhas_saida']} linha(s)."
+        )
+        if self.ao_medir:
+            self.ao_medir(registro)
+        return saidas
+
+    def encerrar(self) -> None:
+        """Desliga o tracemalloc, se foi este medidor que o ligou."""
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+
+    def resumo(self, **extras) -> dict:
+        """Totais da execução e a lista de etapas na ordem em que terminaram."""
+        self.encerrar()
+        return {
+            **extras,
+            "tempo_total_s": round(time.perf_counter() - self._inicio, 4),
+            "cpu_total_s": round(time.process_time() + _cpu_filhos_s() - self._cpu_inicio, 4),
+            "rss_pico_mb": _rss_pico_mb(),
+            "etapas": list(self.etapas),
+        }
+
+    @staticmethod
+    def gravar(metricas: dict, caminho: str) -> str:
+        """Grava o registro da execução em JSON."""
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(metricas, f, ensure_ascii=False, indent=2, default=str)
+        return caminho
@@ -0,0 +1,117 @@
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .calc_kernel import calcular_beneficio
+from .money import para_reais
+from .sindicato_resolver import ESTADO_POR_UF, SEM_SINDICATO
+
+
+@dataclass
+class Cenario:
+    """
+    Parâmetros de uma simulação. UFs fora de `valores`/`dias_uteis` mantêm os
+    valores da base.
+    """
+    nome: str
+    valores: dict[str, float] = field(default_factory=dict)
+    dias_uteis: dict[str, int] = field(default_factory=dict)
+    percentual_empresa: float = 0.80
+
+
+class ScenarioEngine:
+    """
+    Avalia vários cenários de parâmetros do benefício de uma só vez sobre as
+    entradas do núcleo de cálculo guardadas pelo CalculatorAgent
+    (`calculator.entradas`). Os parâmetros de cada cenário viram matrizes
+    cenários x colaboradores, e o núcleo é executado em blocos de até
+    `max_elementos` células.
+    """
+
+    def __init__(self, entradas: dict, max_elementos: int = 10_000_000):
+        if not entradas:
+            raise ValueError("Entradas do cálculo indisponíveis. Execute o cálculo antes de simular cenários.")
+        self.entradas = entradas
+        self.max_elementos = max_elementos
+        self.codigos_uf, self.ufs = pd.factorize(pd.Series(entradas["ufs"], dtype=object))
+        sindicatos = pd.Series(entradas["sindicatos"], dtype=object).fillna(SEM_SINDICATO)
+        self.codigos_sindicato, self.sindicatos = pd.factorize(sindicatos, sort=True)
+
+    def parametros_atuais(self) -> pd.DataFrame:
+        """Valor diário e dias úteis em vigor para cada UF da base (ponto de partida dos cenários)."""
+        df = pd.DataFrame({
+            "UF": self.entradas["ufs"],
+            "VALOR": para_reais(self.entradas["valor_unitario"]),
+            "DIAS_UTEIS": self.entradas["dias_uteis_base"],
+        })
+        return df.dropna(subset=["UF"]).drop_duplicates("UF").sort_values("UF").reset_index(drop=True)
+
+    def _tabela_uf(self, cenarios: list[Cenario], atributo: str) -> np.ndarray:
+        """Matriz cenários x UFs com os valores informados (NaN = mantém o da base)."""
+        tabela = np.full((len(cenarios), len(self.ufs) + 1), np.nan)
+        posicao = {uf: i for i, uf in enumerate(self.ufs)}
+        for i, cenario in enumerate(cenarios):
+            for uf, valor in getattr(cenario, atributo).items():
+                uf = uf.upper()
+                if uf not in ESTADO_POR_UF:
+                    raise ValueError(f"Cenário '{cenario.nome}': UF desconhecida '{uf}'.")
+                if uf in posicao:
+                    tabela[i, posicao[uf]] = valor
+        return tabela
+
+    def _avaliar_bloco(self, cenarios: list[Cenario]) -> dict[str, np.ndarray]:
+        e = self.entradas
+        # A coluna extra das tabelas (índice -1) atende as linhas sem UF e fica sempre NaN
+        # Valores informados em reais; o núcleo trabalha em centavos
+        valores = self._tabela_uf(cenarios, "valores")[:, self.codigos_uf] * 100
+        dias = self._tabela_uf(cenarios, "dias_uteis")[:, self.codigos_uf]
+        percentuais = np.array([[c.percentual_empresa] for c in cenarios], dtype="float64")
+        return calcular_beneficio(
+            dias_uteis_base=np.where(np.isnan(dias), e["dias_uteis_base"], dias).astype("int64"),
+            valor_unitario=np.where(np.isnan(valores), e["valor_unitario"], np.round(valores)).astype("int64"),
+            adm_offset=e["adm_offset"],
+            des_offset=e["des_offset"],
+            des_ok=e["des_ok"],
+            ferias_dias=e["ferias_dias"],
+            uteis=e["uteis"],
+            uf_linha=e["uf_linha"],
+            percentual_empresa=percentuais,
+        )
+
+    def avaliar(self, cenarios: list[Cenario]) -> pd.DataFrame:
+        """
+        Total do benefício de cada cenário por sindicato, mais TOTAL, custo da
+        empresa e desconto do profissional (uma linha por cenário).
+        """
+        if not cenarios:
+            raise ValueError("Nenhum cenário informado.")
+        for c in cenarios:
+            if not 0 <= c.percentual_empresa <= 1:
+                raise ValueError(f"Cenário '{c.nome}': percentual_empresa deve estar entre 0 e 1.")
+
+        n_sind = len(self.sindicatos)
+        n = len(self.codigos_sindicato)
+        por_sindicato = np.zeros((len(cenarios), n_sind), dtype="int64")
+        empresa = np.zeros(len(cenarios), dtype="int64")
+        colaborador = np.zeros(len(cenarios), dtype="int64")
+        bloco = max(1, self.max_elementos // max(n, 1))
+
+        for inicio in range(0, len(cenarios), bloco):
+            linhas = np.arange(inicio, min(inicio + bloco, len(cenarios)))
+            resultado = self._avaliar_bloco([cenarios[i] for i in linhas])
+            # Soma por sindicato de todos os cenários do bloco de uma só vez (em centavos)
+            chaves = (np.arange(len(linhas))[:, None] * n_sind + self.codigos_sindicato).ravel()
+            somas = np.zeros(len(linhas) * n_sind, dtype="int64")
+            np.add.at(somas, chaves, resultado["VR_TOTAL"].ravel())
+            por_sindicato[linhas] = somas.reshape(len(linhas), n_sind)
+            empresa[linhas] = resultado["EMPRESA_80"].sum(axis=1)
+            colaborador[linhas] = resultado["COLABORADOR_20"].sum(axis=1)
+
+        tabela = pd.DataFrame(para_reais(por_sindicato), columns=list(self.sindicatos), index=pd.Index([c.nome for c in cenarios], name="Cenário"))
+        tabela["TOTAL"] = para_reais(por_sindicato.sum(axis=1))
+        tabela["Custo empresa"] = para_reais(empresa)
+        tabela["Desconto profissional"] = para_reais(colaborador)
+        logging.info(f"Simulação: {len(cenarios)} cenário(s) avaliados sobre {n} colaborador(es).")
+        return tabela
@@ -0,0 +1,86 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Tipos aceitos na seção `tipos` do config.yaml.
+INT_DTYPES = {"Int8", "Int16", "Int32", "Int64"}
+SUPPORTED_DTYPES = INT_DTYPES | {"category", "datetime", "float32", "float64", "string"}
+
+
+def ensure_int(s: pd.Series) -> pd.Series:
+    """
+    Retorna a série como inteiro anulável. Séries já tipadas na coleta
+    são devolvidas sem cópia nem nova conversão.
+    """
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s
+    return pd.to_numeric(s, errors="coerce").astype("Int64")
+
+
+def ensure_datetime(s: pd.Series) -> pd.Series:
+    """
+    Retorna a série como datetime64, convertendo apenas se necessário.
+    """
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        return s
+    return pd.to_datetime(s, errors="coerce")
+
+
+def memory_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum()) if not df.empty else 0
+
+
+class SchemaRegistry:
+    """
+    Registro dos tipos de cada base, declarados em `tipos` no config.yaml e
+    aplicados uma única vez pelo CollectorAgent ao carregar os dados.
+    """
+
+    def __init__(self, schemas: dict[str, dict[str, str]]):
+        for base, cols in schemas.items():
+            invalidos = {c: t for c, t in cols.items() if t not in SUPPORTED_DTYPES}
+            if invalidos:
+                raise ValueError(f"Tipos não suportados para a base '{base}' em config.yaml: {invalidos}")
+        self.schemas = schemas
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SchemaRegistry":
+        return cls(config.get("tipos", {}) or {})
+
+    def get(self, config_key: str) -> dict[str, str]:
+        return self.schemas.get(config_key, {}) or {}
+
+    def apply(self, config_key: str, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converte as colunas declaradas para a base. Colunas ausentes são ignoradas
+        (a validação de colunas obrigatórias fica a cargo do ValidatorAgent).
+        """
+        schema = self.get(config_key)
+        if not schema or df.empty:
+            return df
+        df = df.copy()
+        for col, dtype in schema.items():
+            if col in df.columns:
+                df[col] = self._convert(df[col], dtype, f"{config_key}.{col}")
+        return df
+
+    def _convert(self, s: pd.Series, dtype: str, nome: str) -> pd.Series:
+        if dtype in INT_DTYPES:
+            num = pd.to_numeric(s, errors="coerce")
+            fracionarios = num.notna() & (num % 1 != 0)
+            if fracionarios.any():
+                logging.warning(f"Tipos: {int(fracionarios.sum())} valor(es) não inteiro(s) em '{nome}' descartado(s).")
+                num = num.mask(fracionarios)
+            info = np.iinfo(dtype.lower())
+            if num.notna().any() and (num.min() < info.min or num.max() > info.max):
+                logging.warning(f"Tipos: valores de '{nome}' excedem {dtype}. Usando Int64.")
+                dtype = "Int64"
+            return num.astype(dtype)
+        if dtype == "datetime":
+            return ensure_datetime(s)
+        if dtype == "category":
+            return s.astype("category")
+        if dtype in ("float32", "float64"):
+            return pd.to_numeric(s, errors="coerce").astype(dtype)
+        return s.astype(dtype)
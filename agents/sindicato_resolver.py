@@ -0,0 +1,93 @@
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from .business_calendar import UF_POR_ESTADO
+
+ESTADO_POR_UF = {uf: estado for estado, uf in UF_POR_ESTADO.items()}
+
+# Rótulo das linhas sem sindicato nos agrupamentos (relatório e simulação).
+SEM_SINDICATO = "(sem sindicato)"
+
+# UFs atendidas originalmente: a sigla vale como palavra isolada em qualquer
+# posição do nome, como antes.
+UFS_ORIGINAIS = ["SP", "RJ", "RS", "PR"]
+
+# As demais siglas coincidem com palavras comuns (SE, MA, TO, AL, ES, PA, AM...)
+# e só valem em posição inequívoca: logo após a sigla do sindicato
+# ("SINDPD MG - ..."), depois de " - " ou "/", ou no fim do nome.
+DEMAIS_UFS = sorted(set(ESTADO_POR_UF) - set(UFS_ORIGINAIS))
+POSICOES_SIGLA = r"(?:^\S+ {uf} -|(?:^| )- ?{uf}\b|/ ?{uf}\b| {uf}\.?$)"
+
+# Nomes de estado que também são palavras comuns e não servem de padrão.
+NOMES_AMBIGUOS = {"PARA"}
+
+
+def normalizar(nome) -> str:
+    """Nome sem acentos, em maiúsculas e com espaços simples."""
+    texto = unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode("utf-8")
+    return " ".join(texto.upper().split())
+
+
+class SindicatoResolver:
+    """
+    Resolve a UF de cada sindicato.
+
+    A ordem de resolução é:
+    1. a tabela exata de `sindicatos.tabela` no config.yaml (nome normalizado -> UF);
+    2. os padrões (regex) de `sindicatos.padroes`;
+    3. os padrões internos: o nome do estado por extenso; a sigla de SP, RJ,
+       RS ou PR como palavra isolada; e as demais siglas só em posição
+       inequívoca (`POSICOES_SIGLA`), já que muitas são palavras comuns.
+
+    Cada nome distinto é resolvido uma única vez (memoizado) e o resultado é
+    expandido para as linhas pelos códigos do factorize.
+    """
+
+    def __init__(self, tabela: dict[str, str] | None = None, padroes: list[dict] | None = None):
+        self.tabela = {normalizar(nome): uf.upper() for nome, uf in (tabela or {}).items()}
+        self.padroes = [(re.compile(p["padrao"], re.IGNORECASE), p["uf"].upper()) for p in (padroes or [])]
+        nomes = sorted(
+            ((normalizar(estado), uf) for estado, uf in UF_POR_ESTADO.items() if normalizar(estado) not in NOMES_AMBIGUOS),
+            key=lambda item: -len(item[0]),
+        )
+        self.padroes += [(re.compile(rf"\b{nome}\b"), uf) for nome, uf in nomes]
+        self.padroes += [(re.compile(rf"(?:^| ){uf}(?: |$)"), uf) for uf in UFS_ORIGINAIS]
+        self.padroes += [(re.compile(POSICOES_SIGLA.format(uf=uf)), uf) for uf in DEMAIS_UFS]
+        invalidas = {uf for uf in list(self.tabela.values()) + [uf for _, uf in self.padroes] if uf not in ESTADO_POR_UF}
+        if invalidas:
+            raise ValueError(f"UF(s) desconhecida(s) na seção `sindicatos` do config.yaml: {sorted(invalidas)}")
+        self._memo: dict[str, str | None] = {}
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SindicatoResolver":
+        cfg = config.get("sindicatos", {}) or {}
+        return cls(cfg.get("tabela"), cfg.get("padroes"))
+
+    def resolver_um(self, nome) -> str | None:
+        if not isinstance(nome, str):
+            return None
+        if nome not in self._memo:
+            chave = normalizar(nome)
+            uf = self.tabela.get(chave)
+            if uf is None:
+                uf = next((uf for padrao, uf in self.padroes if padrao.search(chave)), None)
+            self._memo[nome] = uf
+        return self._memo[nome]
+
+    def ufs(self, sindicatos: pd.Series) -> pd.Series:
+        """UF de cada linha; nomes repetidos são resolvidos uma vez só."""
+        codigos, nomes = pd.factorize(sindicatos)
+        # O None final atende o código -1 (sindicato vazio)
+        resolvidas = np.array([self.resolver_um(n) for n in nomes] + [None], dtype=object)
+        return pd.Series(resolvidas[codigos], index=sindicatos.index, dtype=object)
+
+    def estados(self, sindicatos: pd.Series) -> pd.Series:
+        """Nome do estado de cada linha (None quando o sindicato não é resolvido)."""
+        return self.ufs(sindicatos).map(ESTADO_POR_UF)
+
+    def nao_resolvidos(self, sindicatos: pd.Series) -> pd.Series:
+        """Máscara das linhas com sindicato preenchido mas sem UF identificada."""
+        return sindicatos.notna() & self.ufs(sindicatos).isna()
@@ -0,0 +1,222 @@
+import hashlib
+import logging
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .ingest_cache import IngestCache
+from .run_metrics import MedidorEtapas
+
+
+@dataclass
+class Etapa:
+    """
+    Etapa do pipeline. `funcao` recebe as entradas declaradas como argumentos
+    nomeados e devolve um dict com exatamente as saídas declaradas.
+    `assinatura` entra na validade do checkpoint da etapa (ex.: parâmetros que
+    só ela usa, como os formatos de saída do relatório).
+    """
+    nome: str
+    funcao: Callable[..., dict]
+    entradas: tuple[str, ...] = ()
+    saidas: tuple[str, ...] = ()
+    assinatura: str = ""
+
+
+class Checkpoints(IngestCache):
+    """
+    Saídas de cada etapa gravadas em pickle (binário nativo do pandas, que
+    preserva os dtypes) em `<diretorio>/<execução>-<etapa>.pkl`. Cada arquivo
+    leva a assinatura da execução e da etapa; um checkpoint com assinatura
+    diferente é ignorado. Evicção por idade e tamanho como no cache de coleta.
+    """
+
+    NOME = "Checkpoints"
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Checkpoints":
+        cfg = config.get("checkpoints", {}) or {}
+        return cls(
+            cache_dir=cfg.get("diretorio", ".cache/checkpoints"),
+            max_mb=cfg.get("tamanho_max_mb", 1024),
+            max_age_days=cfg.get("idade_max_dias", 7),
+            enabled=cfg.get("habilitado", True),
+        )
+
+    @staticmethod
+    def _chave(execucao: str, etapa: str) -> str:
+        return f"{execucao}-{etapa}"
+
+    def carregar(self, execucao: str, etapa: str, assinatura: str) -> dict | None:
+        entrada = self.get(self._chave(execucao, etapa))
+        if entrada is None or entrada.get("assinatura") != assinatura:
+            return None
+        return entrada["saidas"]
+
+    def salvar(self, execucao: str, etapa: str, assinatura: str, saidas: dict) -> None:
+        self.put(self._chave(execucao, etapa), {"assinatura": assinatura, "saidas": saidas})
+
+
+class ChamadasPrincipais:
+    """
+    Encaminha à thread que criou o objeto (a que executa o pipeline) as chamadas
+    feitas pelas etapas que rodam no pool, como o progress_callback da
+    interface, que não deve ser chamado de outra thread. Na própria thread a
+    chamada é imediata; nas demais, fica na fila até o StageDAG atendê-la.
+    """
+
+    def __init__(self):
+        self._thread = threading.get_ident()
+        self._fila = queue.SimpleQueue()
+
+    def chamar(self, funcao: Callable, *args) -> None:
+        if threading.get_ident() == self._thread:
+            funcao(*args)
+        else:
+            self._fila.put((funcao, args))
+
+    def atender(self, futures: list[Future]) -> None:
+        """Executa as chamadas enfileiradas, na ordem em que chegaram, até todos os `futures` terminarem."""
+        for future in futures:
+            future.add_done_callback(lambda _: self._fila.put(None))
+        restantes = len(futures)
+        while restantes:
+            item = self._fila.get()
+            if item is None:
+                restantes -= 1
+            else:
+                funcao, args = item
+                funcao(*args)
+
+
+class StageDAG:
+    """
+    Executa etapas ligadas pelas entradas e saídas declaradas. As etapas
+    prontas (todas as entradas disponíveis) rodam juntas em um pool de threads;
+    com checkpoints, as saídas de cada etapa concluída são gravadas, o que
+    permite retomar a partir da última etapa bem-sucedida (`retomar`) ou
+    reexecutar só algumas etapas e as que dependem delas (`etapas`), carregando
+    as demais dos checkpoints. Chamadas feitas pelas etapas através de
+    `chamadas` (ex.: narração do progresso) rodam sempre na thread que chamou
+    `executar`.
+    """
+
+    def __init__(self, etapas: list[Etapa]):
+        self.etapas = {e.nome: e for e in etapas}
+        if len(self.etapas) != len(etapas):
+            raise ValueError("Pipeline: nomes de etapa repetidos.")
+        self.produtor = {}
+        for etapa in etapas:
+            for saida in etapa.saidas:
+                if saida in self.produtor:
+                    raise ValueError(f"Pipeline: '{saida}' é produzida por '{self.produtor[saida]}' e '{etapa.nome}'.")
+                self.produtor[saida] = etapa.nome
+        for etapa in etapas:
+            faltantes = [e for e in etapa.entradas if e not in self.produtor]
+            if faltantes:
+                raise ValueError(f"Pipeline: a etapa '{etapa.nome}' usa {faltantes}, que nenhuma etapa produz.")
+        self.dependencias = {
+            e.nome: {self.produtor[entrada] for entrada in e.entradas} for e in etapas
+        }
+        self.ordem = self._ordenar()
+        self.origem: dict[str, str] = {}
+
+    def _ordenar(self) -> list[str]:
+        """Ordem topológica estável (na ordem de declaração entre etapas independentes)."""
+        ordem, feitas = [], set()
+        while len(ordem) < len(self.etapas):
+            prontas = [n for n in self.etapas if n not in feitas and self.dependencias[n] <= feitas]
+            if not prontas:
+                raise ValueError(f"Pipeline: dependência circular entre {sorted(set(self.etapas) - feitas)}.")
+            ordem.extend(prontas)
+            feitas.update(prontas)
+        return ordem
+
+    def dependentes(self, nomes) -> set[str]:
+        """As etapas informadas e todas as que dependem delas, direta ou indiretamente."""
+        resultado = set(nomes)
+        for nome in self.ordem:
+            if self.dependencias[nome] & resultado:
+                resultado.add(nome)
+        return resultado
+
+    def executar(self, checkpoints: Checkpoints | None = None, execucao: str = "", assinatura: str = "",
+                 retomar: bool = False, etapas: list[str] | None = None, max_workers: int = 1,
+                 medidor: MedidorEtapas | None = None, chamadas: ChamadasPrincipais | None = None) -> dict:
+        """
+        Executa o pipeline e devolve todas as saídas. `self.origem` registra, para
+        cada etapa, se ela foi "executada" ou carregada do "checkpoint"; com
+        `medidor`, cada etapa (inclusive a carga do checkpoint) é medida.
+        `chamadas` deve ter sido criado na thread que chama este método.
+        """
+        medidor = medidor or MedidorEtapas()
+        chamadas = chamadas or ChamadasPrincipais()
+        usar_checkpoints = checkpoints is not None and checkpoints.enabled
+        if etapas:
+            desconhecidas = [e for e in etapas if e not in self.etapas]
+            if desconhecidas:
+                raise ValueError(f"Pipeline: etapa(s) desconhecida(s) {desconhecidas}. Use {self.ordem}.")
+            if not usar_checkpoints:
+                raise ValueError("Pipeline: reexecutar etapas isoladas requer os checkpoints habilitados.")
+            forcadas = self.dependentes(etapas)
+        else:
+            forcadas = None if retomar else set(self.etapas)
+
+        def assinatura_etapa(nome: str) -> str:
+            return hashlib.sha256(f"{assinatura}|{nome}|{self.etapas[nome].assinatura}".encode("utf-8")).hexdigest()
+
+        valores, executadas = {}, set()
+        self.origem = {}
+        pendentes = list(self.ordem)
+        while pendentes:
+            prontas = [n for n in pendentes if self.dependencias[n] <= set(self.origem)]
+            pendentes = [n for n in pendentes if n not in prontas]
+
+            a_executar = []
+            for nome in prontas:
+                # Com `retomar`, uma etapa só sai do checkpoint se nada antes dela foi reexecutado
+                reaproveitar = (
+                    usar_checkpoints
+                    and (nome not in forcadas if forcadas is not None else not (self.dependencias[nome] & executadas))
+                )
+                saidas = medidor.medir(
+                    nome, lambda nome=nome: checkpoints.carregar(execucao, nome, assinatura_etapa(nome)), origem="checkpoint"
+                ) if reaproveitar else None
+                if saidas is not None:
+                    valores.update(saidas)
+                    self.origem[nome] = "checkpoint"
+                elif forcadas is not None and nome not in forcadas and etapas:
+                    raise ValueError(f"Pipeline: sem checkpoint válido da etapa '{nome}'. Execute o pipeline completo antes.")
+                else:
+                    a_executar.append(nome)
+
+            resultados = self._rodar(a_executar, valores, max_workers, medidor, chamadas)
+            for nome in a_executar:
+                saidas = resultados[nome]
+                if set(saidas) != set(self.etapas[nome].saidas):
+                    raise ValueError(f"Pipeline: a etapa '{nome}' devolveu {sorted(saidas)}, mas declara {sorted(self.etapas[nome].saidas)}.")
+                valores.update(saidas)
+                self.origem[nome] = "executada"
+                executadas.add(nome)
+                if usar_checkpoints:
+                    checkpoints.salvar(execucao, nome, assinatura_etapa(nome), saidas)
+        return valores
+
+    def _rodar(self, nomes: list[str], valores: dict, max_workers: int, medidor: MedidorEtapas,
+               chamadas: ChamadasPrincipais) -> dict[str, dict]:
+        def chamar(nome: str) -> dict:
+            etapa = self.etapas[nome]
+            logging.info(f"Pipeline: executando a etapa '{nome}'.")
+            argumentos = {entrada: valores[entrada] for entrada in etapa.entradas}
+            return medidor.medir(nome, lambda: etapa.funcao(**argumentos), argumentos)
+
+        workers = min(max_workers, len(nomes))
+        if workers <= 1:
+            return {nome: chamar(nome) for nome in nomes}
+        # As etapas rodam no pool enquanto esta thread atende às chamadas que elas enfileiram
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {nome: pool.submit(chamar, nome) for nome in nomes}
+            chamadas.atender(list(futures.values()))
+        return {nome: future.result() for nome, future in futures.items()}
@@ -0,0 +1,134 @@
+import glob
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import yaml
+
+from .orchestrator_agent import OrchestratorAgent
+
+
+def _run_tenant_worker(config_path: str, input_dir: str, output_dir: str, competencias: list[str],
+                       use_cache: bool, coleta_paralela: bool) -> dict:
+    """
+    Ponto de entrada dos processos do pool de clientes. Executa o pipeline
+    completo de um cliente e devolve apenas o resumo (sem os DataFrames), para
+    que o retorno entre processos seja leve. Falhas ficam isoladas no resumo.
+    """
+    inicio = time.perf_counter()
+    resumo = {
+        "CLIENTE": os.path.basename(os.path.normpath(input_dir)),
+        "DIRETORIO": input_dir,
+        "STATUS": "OK",
+        "COLABORADORES": 0,
+        "TOTAL_VR": 0.0,
+        "DURACAO_S": 0.0,
+        "ERRO": "",
+    }
+    try:
+        orquestrador = OrchestratorAgent(config_path=config_path)
+        if not coleta_paralela:
+            # Com vários clientes em paralelo, a coleta e a gravação das partições
+            # de cada um rodam em série para não multiplicar os processos além
+            # dos núcleos disponíveis.
+            orquestrador.config.setdefault("processamento", {})["coleta_paralela"] = False
+            particionamento = (orquestrador.config.get("exportacao") or {}).get("particionamento")
+            if particionamento:
+                particionamento["max_workers"] = 1
+        os.makedirs(output_dir, exist_ok=True)
+        if len(competencias) == 1:
+            resultado = orquestrador.run(input_dir, output_dir, competencias[0], use_cache=use_cache)
+            colaboradores = len(resultado["base_final"])
+        else:
+            resultado = orquestrador.run_batch(input_dir, output_dir, competencias, use_cache=use_cache)
+            colaboradores = sum(len(r["base_final"]) for r in resultado["competencias"].values())
+        resumo["COLABORADORES"] = colaboradores
+        if not colaboradores:
+            resumo["STATUS"] = "VAZIO"
+        resumo["TOTAL_VR"] = float(resultado["total_vr"])
+    except Exception as e:
+        logging.error(f"Execução multi-cliente: falha no cliente '{resumo['CLIENTE']}': {e}")
+        resumo["STATUS"] = "ERRO"
+        resumo["ERRO"] = f"{type(e).__name__}: {e}"
+    resumo["DURACAO_S"] = round(time.perf_counter() - inicio, 3)
+    return resumo
+
+
+class TenantRunner:
+    """
+    Executa o pipeline para vários clientes, cada um com o seu diretório de
+    entrada, em um pool de processos. A saída de cada cliente vai para
+    `<output_dir>/<nome do diretório de entrada>` e a falha de um cliente não
+    interrompe os demais.
+    """
+
+    def __init__(self, config_path: str = "config.yaml", max_workers: int | None = None):
+        self.config_path = config_path
+        if max_workers is None:
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+            max_workers = (config.get("processamento", {}) or {}).get("max_workers_clientes")
+        self.max_workers = int(max_workers or os.cpu_count() or 1)
+
+    @staticmethod
+    def resolver_diretorios(padroes: list[str]) -> list[str]:
+        """Expande diretórios e padrões glob, sem repetições e em ordem alfabética."""
+        diretorios = set()
+        for padrao in padroes:
+            encontrados = glob.glob(padrao) if glob.has_magic(padrao) else [padrao]
+            diretorios.update(os.path.normpath(d) for d in encontrados if os.path.isdir(d))
+        nomes = [os.path.basename(d) for d in diretorios]
+        repetidos = sorted({n for n in nomes if nomes.count(n) > 1})
+        if repetidos:
+            raise ValueError(f"Diretórios de clientes com o mesmo nome: {repetidos}. As saídas se sobreporiam.")
+        return sorted(diretorios)
+
+    def execute(self, padroes: list[str], output_dir: str, competencias: list[str], use_cache: bool = True,
+                progress_callback=None) -> pd.DataFrame:
+        """
+        Roda todos os clientes e devolve o resumo (um registro por cliente),
+        também gravado em `<output_dir>/RESUMO CLIENTES.xlsx`.
+        """
+        diretorios = self.resolver_diretorios(padroes)
+        if not diretorios:
+            raise FileNotFoundError(f"Nenhum diretório de entrada encontrado para {padroes}.")
+
+        workers = min(self.max_workers, len(diretorios), os.cpu_count() or 1)
+        logging.info(f"Execução multi-cliente: {len(diretorios)} cliente(s) com {workers} processo(s).")
+        jobs = [
+            (self.config_path, d, os.path.join(output_dir, os.path.basename(d)), competencias, use_cache, workers == 1)
+            for d in diretorios
+        ]
+
+        resumos = []
+
+        def registrar(resumo: dict):
+            resumos.append(resumo)
+            mensagem = (f"{resumo['CLIENTE']}: {resumo['STATUS']} em {resumo['DURACAO_S']:.2f}s"
+                        + (f" - {resumo['ERRO']}" if resumo["ERRO"] else ""))
+            logging.info(f"Execução multi-cliente: {mensagem}")
+            if progress_callback:
+                progress_callback("clientes", mensagem)
+
+        inicio = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run_tenant_worker, *job) for job in jobs]
+                for future in futures:
+                    registrar(future.result())
+        else:
+            for job in jobs:
+                registrar(_run_tenant_worker(*job))
+        duracao = time.perf_counter() - inicio
+
+        resumo = pd.DataFrame(resumos)
+        os.makedirs(output_dir, exist_ok=True)
+        resumo.to_excel(os.path.join(output_dir, "RESUMO CLIENTES.xlsx"), index=False)
+        falhas = int((resumo["STATUS"] == "ERRO").sum())
+        logging.info(
+            f"Execução multi-cliente: {len(resumo) - falhas} cliente(s) processado(s), {falhas} com erro; "
+            f"total R$ {resumo['TOTAL_VR'].sum():,.2f} em {duracao:.2f}s."
+        )
+        return resumo
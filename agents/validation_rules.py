@@ -0,0 +1,146 @@
+import pandas as pd
+
+from .context import Contexto, limite_data
+from .schema import ensure_datetime, ensure_int
+
+VIOLATION_COLUMNS = ["BASE", "REGRA", "NIVEL", "COLUNA", "MATRICULA", "VALOR"]
+
+
+class RuleEngine:
+    """
+    Motor de regras de validação declaradas em `validacoes` no config.yaml.
+
+    Cada regra é avaliada com uma única operação vetorizada sobre a coluna
+    envolvida, e todas as ocorrências são reunidas em uma tabela de violações
+    (base, regra, matrícula, valor) exportada junto com o relatório.
+
+    Tipos de regra suportados:
+    - colunas_obrigatorias: `colunas` que devem existir na base.
+    - unica: valores de `coluna` não podem se repetir.
+    - referencia: valores de `coluna` devem existir em `referencia.coluna_referencia`.
+    - intervalo_datas: datas de `coluna` entre `inicio` e `fim` (datas ou atributos do Contexto).
+    - intervalo_numerico: valores de `coluna` entre `min` e `max`.
+    """
+
+    TIPOS = ("colunas_obrigatorias", "unica", "referencia", "intervalo_datas", "intervalo_numerico")
+
+    def __init__(self, rules: list[dict]):
+        for rule in rules:
+            if rule.get("regra") not in self.TIPOS:
+                raise ValueError(f"Regra de validação desconhecida em config.yaml: {rule}")
+        self.rules = rules
+
+    @classmethod
+    def from_config(cls, config: dict, default_rules: list[dict]) -> "RuleEngine":
+        return cls(config.get("validacoes") or default_rules)
+
+    def run(self, bases: dict, ctx: Contexto | None = None, tipos: tuple[str, ...] | None = None) -> tuple[list[str], pd.DataFrame]:
+        """
+        Avalia as regras (opcionalmente apenas as dos `tipos` informados).
+        Retorna as mensagens no formato 'ERRO: ...'/'AVISO: ...' e a tabela de violações.
+        """
+        mensagens, violacoes = [], []
+        for rule in self.rules:
+            if tipos and rule["regra"] not in tipos:
+                continue
+            df = bases.get(rule["base"], pd.DataFrame())
+            if df.empty:
+                continue
+            mensagem, tabela = getattr(self, f"_{rule['regra']}")(rule, df, bases, ctx)
+            if mensagem:
+                nivel = rule.get("nivel", "aviso").upper()
+                mensagens.append(f"{nivel}: {mensagem}")
+                tabela.insert(0, "BASE", rule["base"])
+                tabela.insert(1, "REGRA", rule.get("nome", rule["regra"]))
+                tabela.insert(2, "NIVEL", nivel)
+                violacoes.append(tabela)
+        if not violacoes:
+            return mensagens, pd.DataFrame(columns=VIOLATION_COLUMNS)
+        return mensagens, pd.concat(violacoes, ignore_index=True)[VIOLATION_COLUMNS]
+
+    def _ocorrencias(self, df: pd.DataFrame, mask: pd.Series, coluna: str) -> pd.DataFrame:
+        sel = df.loc[mask]
+        matricula = ensure_int(sel["MATRICULA"]) if "MATRICULA" in sel.columns else pd.Series(pd.NA, index=sel.index, dtype="Int64")
+        return pd.DataFrame({
+            "COLUNA": coluna,
+            "MATRICULA": matricula.astype("Int64").to_numpy(),
+            "VALOR": sel[coluna].astype(str).to_numpy(),
+        })
+
+    @staticmethod
+    def _exemplos(valores: pd.Series) -> list:
+        return valores.dropna().head(5).tolist()
+
+    def _colunas_obrigatorias(self, rule, df, bases, ctx):
+        faltantes = [c for c in rule["colunas"] if c not in df.columns]
+        if not faltantes:
+            return None, None
+        tabela = pd.DataFrame({"COLUNA": faltantes, "MATRICULA": pd.array([pd.NA] * len(faltantes), dtype="Int64"), "VALOR": "coluna ausente"})
+        return f"Na base '{rule['base']}', colunas obrigatórias não encontradas: {faltantes}", tabela
+
+    def _unica(self, rule, df, bases, ctx):
+        col = rule["coluna"]
+        if col not in df.columns:
+            return None, None
+        valores = ensure_int(df[col]) if col == "MATRICULA" else df[col]
+        mask = valores.notna() & valores.duplicated(keep=False)
+        n = int(mask.sum())
+        if not n:
+            return None, None
+        return (f"Na base '{rule['base']}', {n} registro(s) com '{col}' repetido: {self._exemplos(valores[mask].drop_duplicates())}",
+                self._ocorrencias(df, mask, col))
+
+    def _referencia(self, rule, df, bases, ctx):
+        col = rule["coluna"]
+        ref_df = bases.get(rule["referencia"], pd.DataFrame())
+        ref_col = rule.get("coluna_referencia", col)
+        if col not in df.columns or ref_df.empty or ref_col not in ref_df.columns:
+            return None, None
+        if col == "MATRICULA":
+            valores, referencia = ensure_int(df[col]), ensure_int(ref_df[ref_col])
+        else:
+            valores, referencia = df[col], ref_df[ref_col]
+        mask = valores.notna() & ~valores.isin(referencia.dropna().unique())
+        n = int(mask.sum())
+        if not n:
+            return None, None
+        return (f"Matrículas de {rule['base']} não encontradas em {rule['referencia']}: {self._exemplos(valores[mask])} ({n} no total)",
+                self._ocorrencias(df, mask, col))
+
+    def _intervalo_datas(self, rule, df, bases, ctx):
+        col = rule["coluna"]
+        if col not in df.columns:
+            return None, None
+        inicio, fim = limite_data(rule.get("inicio"), ctx), limite_data(rule.get("fim"), ctx)
+        datas = ensure_datetime(df[col])
+        mask = pd.Series(False, index=df.index)
+        if inicio is not None:
+            mask |= datas < inicio
+        if fim is not None:
+            mask |= datas > fim
+        if not rule.get("permite_vazio", True):
+            mask |= datas.isna()
+        n = int(mask.sum())
+        if not n:
+            return None, None
+        periodo = f"{inicio.date() if inicio is not None else '...'} a {fim.date() if fim is not None else '...'}"
+        return (f"Na base '{rule['base']}', {n} registro(s) com '{col}' fora do período {periodo}",
+                self._ocorrencias(df, mask, col))
+
+    def _intervalo_numerico(self, rule, df, bases, ctx):
+        col = rule["coluna"]
+        if col not in df.columns:
+            return None, None
+        valores = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        mask = pd.Series(False, index=df.index)
+        if rule.get("min") is not None:
+            mask |= valores < rule["min"]
+        if rule.get("max") is not None:
+            mask |= valores > rule["max"]
+        if not rule.get("permite_vazio", True):
+            mask |= valores.isna()
+        n = int(mask.sum())
+        if not n:
+            return None, None
+        return (f"Na base '{rule['base']}', {n} registro(s) com '{col}' fora do intervalo [{rule.get('min')}, {rule.get('max')}]",
+                self._ocorrencias(df, mask, col))
@@ -1,13 +1,68 @@
 
 import pandas as pd
 import logging
+from dataclasses import dataclass, field
 from .context import Contexto
+from .matricula_index import MatriculaIndex
+from .schema import ensure_int, ensure_datetime
+from .sindicato_resolver import SindicatoResolver
+from .validation_rules import VIOLATION_COLUMNS, RuleEngine
+
+@dataclass
+class PreparoBase:
+    """
+    Resultado da preparação de uma base de `ValidatorAgent.PREPARACOES`: a base
+    preparada (None se ela não foi coletada) e as mensagens e violações das
+    regras declaradas para ela, com as de colunas obrigatórias à parte.
+    """
+    base: pd.DataFrame | None
+    mensagens_colunas: list[str] = field(default_factory=list)
+    violacoes_colunas: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=VIOLATION_COLUMNS))
+    mensagens: list[str] = field(default_factory=list)
+    violacoes: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=VIOLATION_COLUMNS))
+
 
 class ValidatorAgent:
     """
     Agente que garante a qualidade e a integridade dos dados.
     """
 
+    COLUNAS_ESPERADAS = {
+        "ATIVOS": ["MATRICULA", "TITULO DO CARGO", "SINDICATO"],
+        "DESLIGADOS": ["MATRICULA", "DATA DEMISSÃO", "COMUNICADO DE DESLIGAMENTO"],
+        "FERIAS": ["MATRICULA", "DIAS DE FÉRIAS"],
+        "ADMISSAO": ["MATRICULA", "ADMISSAO"],
+        "SIND_VALOR": ["ESTADO", "VALOR"]
+    }
+
+    # Regras usadas quando o config.yaml não declara a seção `validacoes`.
+    REGRAS_PADRAO = [
+        {"regra": "colunas_obrigatorias", "base": base, "colunas": colunas, "nivel": "erro"}
+        for base, colunas in COLUNAS_ESPERADAS.items()
+    ] + [
+        {"regra": "referencia", "base": "DESLIGADOS", "coluna": "MATRICULA", "referencia": "ATIVOS", "nivel": "aviso"},
+    ]
+
+    # Bases consultadas por valor único de matrícula nos cálculos.
+    BASES_CHAVE_UNICA = ("ADMISSAO", "DESLIGADOS")
+
+    # Preparação de cada base que precisa de tratamento especial.
+    PREPARACOES = {
+        "DIAS_UTEIS": "_preparar_dias_uteis",
+        "SIND_VALOR": "_preparar_sind_valor",
+        "DESLIGADOS": "_preparar_desligados",
+    }
+
+    # Bases cujas colunas obrigatórias só existem depois da preparação: SIND_VALOR
+    # tem as duas primeiras colunas renomeadas pela posição, seja qual for o cabeçalho.
+    COLUNAS_APOS_PREPARO = ("SIND_VALOR",)
+
+    def __init__(self, config: dict | None = None):
+        self.rules = RuleEngine.from_config(config or {}, self.REGRAS_PADRAO)
+        self.sindicatos = SindicatoResolver.from_config(config or {})
+        self.violations = pd.DataFrame()
+        self.index: MatriculaIndex | None = None
+
     def _preparar_dias_uteis(self, df: pd.DataFrame) -> pd.DataFrame:
         if df.empty: return pd.DataFrame(columns=["SINDICATO","DIAS_UTEIS"])
         df = df.copy()
@@ -20,6 +75,7 @@ class ValidatorAgent:
 
     def _preparar_sind_valor(self, df: pd.DataFrame) -> pd.DataFrame:
         if df.empty: return pd.DataFrame(columns=["ESTADO","VALOR"])
+        if len(df.columns) < 2: return df  # a checagem de colunas obrigatórias aponta a falta
         df = df.copy()
         df = df.rename(columns={df.columns[0]:"ESTADO", df.columns[1]:"VALOR"})
         df["VALOR"] = pd.to_numeric(df["VALOR"], errors="coerce")
@@ -29,61 +85,122 @@ class ValidatorAgent:
         if df.empty: return pd.DataFrame(columns=["MATRICULA", "DATA DEMISSÃO", "OK"])
         des = df.copy()
         des.columns = [c.strip() for c in des.columns]
-        des["MATRICULA"] = pd.to_numeric(des["MATRICULA"], errors="coerce").astype("Int64")
-        des["DATA DEMISSÃO"] = pd.to_datetime(des["DATA DEMISSÃO"], errors="coerce")
+        des["MATRICULA"] = ensure_int(des["MATRICULA"])
+        des["DATA DEMISSÃO"] = ensure_datetime(des["DATA DEMISSÃO"])
         des["OK"] = des["COMUNICADO DE DESLIGAMENTO"].astype(str).str.strip().str.upper().eq("OK")
         return des
 
-    def _validar_dados(self, bases: dict) -> list[str]:
-        mensagens = []
-        colunas_esperadas = {
-            "ATIVOS": ["MATRICULA", "TITULO DO CARGO", "SINDICATO"],
-            "DESLIGADOS": ["MATRICULA", "DATA DEMISSÃO", "COMUNICADO DE DESLIGAMENTO"],
-            "FERIAS": ["MATRICULA", "DIAS DE FÉRIAS"],
-            "ADMISSAO": ["MATRICULA", "ADMISSAO"],
-            "SIND_VALOR": ["ESTADO", "VALOR"]
-        }
+    def _preparar(self, bases: dict, nomes) -> dict:
+        """Cópia rasa de `bases` com as bases informadas preparadas."""
+        preparadas = bases.copy()
+        for nome in nomes:
+            if nome in preparadas:
+                preparadas[nome] = getattr(self, self.PREPARACOES[nome])(preparadas[nome])
+        return preparadas
 
-        for nome_base, df in bases.items():
-            if nome_base in colunas_esperadas and not df.empty:
-                colunas_faltantes = [col for col in colunas_esperadas[nome_base] if col not in df.columns]
-                if colunas_faltantes:
-                    mensagens.append(f"ERRO: Na base '{nome_base}', colunas obrigatórias não encontradas: {colunas_faltantes}")
-
-        if "ATIVOS" in bases and "DESLIGADOS" in bases:
-            ativos_df, desligados_df = bases["ATIVOS"], bases["DESLIGADOS"]
-            if not ativos_df.empty and not desligados_df.empty and "MATRICULA" in ativos_df.columns and "MATRICULA" in desligados_df.columns:
-                matriculas_ativos = set(pd.to_numeric(ativos_df["MATRICULA"], errors='coerce').dropna())
-                matriculas_desligados = set(pd.to_numeric(desligados_df["MATRICULA"], errors='coerce').dropna())
-                desligados_nao_encontrados = matriculas_desligados - matriculas_ativos
-                if desligados_nao_encontrados:
-                    mensagens.append(f"AVISO: Matrículas de DESLIGADOS não encontradas em ATIVOS: {list(desligados_nao_encontrados)[:5]}")
-        return mensagens
+    def _regra_da_preparacao(self, rule: dict) -> bool:
+        """
+        Regras avaliadas junto com a preparação da sua base: as das bases de
+        PREPARACOES, exceto referências a outra base que também é preparada.
+        """
+        referencia = rule.get("referencia", rule["base"])
+        return rule["base"] in self.PREPARACOES and (referencia == rule["base"] or referencia not in self.PREPARACOES)
 
-    def execute(self, bases: dict, ctx: Contexto) -> tuple[dict, list[str]]:
+    @staticmethod
+    def _juntar(tabelas: list[pd.DataFrame]) -> pd.DataFrame:
+        tabelas = [t for t in tabelas if not t.empty]
+        return pd.concat(tabelas, ignore_index=True) if tabelas else pd.DataFrame(columns=VIOLATION_COLUMNS)
+
+    def preparar_base(self, nome: str, bases: dict, ctx: Contexto) -> PreparoBase:
+        """
+        Prepara uma base de PREPARACOES e avalia as regras declaradas para ela.
+        Não altera o estado do agente nem depende das outras preparações, que
+        podem rodar ao mesmo tempo. Com colunas obrigatórias ausentes, a base
+        volta sem preparo e só com as violações de colunas.
         """
-        Executa todas as validações, separando erros críticos de avisos.
-        Retorna as bases preparadas e uma lista de avisos.
+        if nome not in bases:
+            return PreparoBase(None)
+        rules = RuleEngine([rule for rule in self.rules.rules if rule["base"] == nome and self._regra_da_preparacao(rule)])
+        preparar = getattr(self, self.PREPARACOES[nome])
+        df = bases[nome]
+
+        # Colunas obrigatórias são checadas antes da preparação, que depende delas
+        # (exceto nas bases de COLUNAS_APOS_PREPARO, preparadas primeiro)
+        if nome in self.COLUNAS_APOS_PREPARO:
+            df = preparar(df)
+        mensagens_colunas, violacoes_colunas = rules.run({**bases, nome: df}, ctx, tipos=("colunas_obrigatorias",))
+        if self._separar_mensagens(mensagens_colunas)[0]:
+            return PreparoBase(df, mensagens_colunas, violacoes_colunas)
+        if nome not in self.COLUNAS_APOS_PREPARO:
+            df = preparar(df)
+
+        tipos_restantes = tuple(t for t in RuleEngine.TIPOS if t != "colunas_obrigatorias")
+        mensagens, violacoes = rules.run({**bases, nome: df}, ctx, tipos=tipos_restantes)
+        return PreparoBase(df, mensagens_colunas, violacoes_colunas, mensagens, violacoes)
+
+    def execute(self, bases: dict, ctx: Contexto, checar_competencia: bool = True) -> tuple[dict, list[str]]:
+        """
+        Executa todas as validações, separando erros críticos de avisos: prepara
+        cada base de PREPARACOES (`preparar_base`) e consolida o resultado.
+        Com `checar_competencia=False` (lote de várias competências) o mês
+        predominante das admissões não é comparado ao mês de eventos.
+        Retorna as bases preparadas e uma lista de avisos. A tabela completa de
+        violações fica disponível em `self.violations` e o índice de matrículas
+        das bases preparadas em `self.index`.
         Levanta um ValueError se encontrar erros críticos.
         """
-        logging.info("Agente Validador: Iniciando validação e preparação dos dados.")
+        preparos = {nome: self.preparar_base(nome, bases, ctx) for nome in self.PREPARACOES}
+        return self.consolidar(bases, preparos, ctx, checar_competencia)
+
+    def consolidar(self, bases: dict, preparos: dict[str, PreparoBase], ctx: Contexto,
+                   checar_competencia: bool = True) -> tuple[dict, list[str]]:
+        """
+        Reúne as bases preparadas por `preparar_base` e executa as validações que
+        envolvem mais de uma base: regras das demais bases, competência,
+        sindicatos e índice de matrículas. Mesmo retorno e exceções de `execute`.
+        """
+        logging.info("Agente Validador: Iniciando a validação das bases preparadas.")
+        self.violations = pd.DataFrame()
+        self.index = None
+        rules = RuleEngine([rule for rule in self.rules.rules if not self._regra_da_preparacao(rule)])
+
         bases_preparadas = bases.copy()
-        
-        # Prepara as bases que precisam de tratamento especial
-        if "DIAS_UTEIS" in bases_preparadas:
-            bases_preparadas["DIAS_UTEIS"] = self._preparar_dias_uteis(bases_preparadas["DIAS_UTEIS"])
-        if "SIND_VALOR" in bases_preparadas:
-            bases_preparadas["SIND_VALOR"] = self._preparar_sind_valor(bases_preparadas["SIND_VALOR"])
-        if "DESLIGADOS" in bases_preparadas:
-            bases_preparadas["DESLIGADOS"] = self._preparar_desligados(bases_preparadas["DESLIGADOS"])
+        for nome, preparo in preparos.items():
+            if preparo.base is not None:
+                bases_preparadas[nome] = preparo.base
+
+        # Colunas obrigatórias ausentes interrompem antes das demais regras
+        mensagens_colunas, violacoes_colunas = rules.run(bases_preparadas, ctx, tipos=("colunas_obrigatorias",))
+        mensagens_colunas = [m for p in preparos.values() for m in p.mensagens_colunas] + mensagens_colunas
+        violacoes_colunas = self._juntar([p.violacoes_colunas for p in preparos.values()] + [violacoes_colunas])
+        erros, _ = self._separar_mensagens(mensagens_colunas)
+        if erros:
+            self.violations = violacoes_colunas
+            raise ValueError("Erros de validação impediram o cálculo: " + "; ".join(erros))
 
         # Coleta todas as mensagens de validação
-        mensagens_validacao = self._validar_dados(bases_preparadas)
-        mensagens_validacao.extend(self._validar_competencia(bases_preparadas, ctx))
+        tipos_restantes = tuple(t for t in RuleEngine.TIPOS if t != "colunas_obrigatorias")
+        mensagens_validacao, violacoes = rules.run(bases_preparadas, ctx, tipos=tipos_restantes)
+        mensagens_validacao = mensagens_colunas + [m for p in preparos.values() for m in p.mensagens] + mensagens_validacao
+        self.violations = self._juntar([violacoes_colunas] + [p.violacoes for p in preparos.values()] + [violacoes])
+        if checar_competencia:
+            mensagens_validacao.extend(self._validar_competencia(bases_preparadas, ctx))
+        mensagens_sindicatos, violacoes_sindicatos = self._validar_sindicatos(bases_preparadas)
+        mensagens_validacao.extend(mensagens_sindicatos)
+        if not violacoes_sindicatos.empty:
+            self.violations = pd.concat([self.violations, violacoes_sindicatos], ignore_index=True)
+
+        self.index = MatriculaIndex(bases_preparadas)
+        for nome_base in self.BASES_CHAVE_UNICA:
+            repetidas = self.index.duplicadas.get(nome_base)
+            if repetidas:
+                mensagens_validacao.append(
+                    f"AVISO: {len(repetidas)} matrícula(s) repetida(s) em {nome_base} {repetidas[:5]}; "
+                    f"nos cálculos vale a primeira ocorrência."
+                )
 
         # Separa erros de avisos
-        erros = [m.replace("ERRO: ", "") for m in mensagens_validacao if m.startswith("ERRO")]
-        avisos = [m.replace("AVISO: ", "") for m in mensagens_validacao if m.startswith("AVISO")]
+        erros, avisos = self._separar_mensagens(mensagens_validacao)
 
         if erros:
             # Levanta uma exceção apenas com os erros críticos para parar o processo
@@ -93,6 +210,48 @@ class ValidatorAgent:
         # Retorna as bases e a lista de avisos para o orquestrador
         return bases_preparadas, avisos
 
+    def _separar_mensagens(self, mensagens: list[str]) -> tuple[list[str], list[str]]:
+        erros = [m.replace("ERRO: ", "") for m in mensagens if m.startswith("ERRO")]
+        avisos = [m.replace("AVISO: ", "") for m in mensagens if m.startswith("AVISO")]
+        return erros, avisos
+
+    def preflight(self, amostras: dict, file_report: dict, ctx: Contexto) -> tuple[list[str], list[str]]:
+        """
+        Pré-validação sobre o cabeçalho e uma amostra de cada base: arquivos
+        ausentes, colunas obrigatórias e mês predominante das admissões.
+        Retorna todos os erros e avisos encontrados, sem interromper na primeira falha.
+        """
+        mensagens = []
+        for nome_base, arquivo in file_report.items():
+            if arquivo == "Não encontrado":
+                nivel = "ERRO" if nome_base == "ATIVOS" else "AVISO"
+                mensagens.append(f"{nivel}: Arquivo da base '{nome_base}' não encontrado.")
+        amostras = self._preparar(amostras, self.COLUNAS_APOS_PREPARO)
+        mensagens.extend(self.rules.run(amostras, ctx, tipos=("colunas_obrigatorias",))[0])
+        mensagens.extend(self._validar_competencia(amostras, ctx))
+        return self._separar_mensagens(mensagens)
+
+    def _validar_sindicatos(self, bases: dict) -> tuple[list[str], pd.DataFrame]:
+        """Avisa sobre sindicatos de ATIVOS sem UF identificada (ficariam com valor 0)."""
+        ativos = bases.get("ATIVOS", pd.DataFrame())
+        if ativos.empty or "SINDICATO" not in ativos.columns:
+            return [], pd.DataFrame(columns=VIOLATION_COLUMNS)
+        mask = self.sindicatos.nao_resolvidos(ativos["SINDICATO"])
+        if not mask.any():
+            return [], pd.DataFrame(columns=VIOLATION_COLUMNS)
+        nomes = ativos.loc[mask, "SINDICATO"].astype(str).unique().tolist()
+        tabela = pd.DataFrame({
+            "BASE": "ATIVOS", "REGRA": "sindicato_sem_uf", "NIVEL": "AVISO", "COLUNA": "SINDICATO",
+            "MATRICULA": ensure_int(ativos.loc[mask, "MATRICULA"]).astype("Int64").to_numpy(),
+            "VALOR": ativos.loc[mask, "SINDICATO"].astype(str).to_numpy(),
+        })
+        mensagem = (
+            f"AVISO: {len(nomes)} sindicato(s) sem UF identificada ({int(mask.sum())} colaborador(es)), "
+            f"que ficarão com valor e dias úteis zerados: {nomes[:5]}. "
+            f"Inclua-os na seção `sindicatos` do config.yaml."
+        )
+        return [mensagem], tabela
+
     def _validar_competencia(self, bases: dict, ctx: Contexto) -> list[str]:
         """Verifica se o mês de competência é compatível com as datas nos arquivos."""
         mensagens = []
@@ -102,7 +261,7 @@ class ValidatorAgent:
         def get_mes_predominante(df: pd.DataFrame, col_data: str) -> int | None:
             if df.empty or col_data not in df.columns:
                 return None
-            datas_validas = pd.to_datetime(df[col_data], errors='coerce').dropna()
+            datas_validas = ensure_datetime(df[col_data]).dropna()
             if datas_validas.empty:
                 return None
             return datas_validas.dt.month.mode()[0]
@@ -0,0 +1,100 @@
+from collections.abc import Iterable
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+# Cabeçalho que o pandas.ExcelWriter gravava (até o pandas 2.x): negrito, borda
+# fina e centralizado. As abas sem estilo próprio mantêm esse visual.
+CABECALHO_BORDA = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+CABECALHO_PADRAO_FONTE = Font(bold=True)
+CABECALHO_PADRAO_ALINHAMENTO = Alignment(horizontal="center", vertical="top")
+
+# Estilo do cabeçalho das abas principais do relatório (fonte, fundo e alinhamento sobre o padrão)
+CABECALHO_FONTE = Font(name="Calibri", size=8, bold=True, color="FFFFFF")
+CABECALHO_FUNDO = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
+CABECALHO_ALINHAMENTO = Alignment(horizontal="center", vertical="center")
+
+# Mesmo formato de data/hora que o pandas.ExcelWriter aplicava
+FORMATO_DATA = "YYYY-MM-DD HH:MM:SS"
+
+
+class StreamingXlsxWriter:
+    """
+    Escreve planilhas em uma única passada, no modo `write_only` do openpyxl:
+    as linhas vão direto para o arquivo à medida que são geradas, com o estilo
+    do cabeçalho aplicado na própria célula. Sem reabrir o arquivo para
+    formatar, a memória fica constante no número de linhas.
+    """
+
+    LINHAS_POR_BLOCO = 10_000
+
+    def __init__(self, path: str):
+        self.path = path
+        self.wb = Workbook(write_only=True)
+
+    def __enter__(self) -> "StreamingXlsxWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.wb.save(self.path)
+        else:
+            self.wb.close()
+
+    def aba(self, nome: str, df: pd.DataFrame | Iterable[pd.DataFrame], cabecalho_estilizado: bool = False) -> None:
+        """
+        Escreve a aba a partir de um DataFrame ou de blocos de DataFrame com as
+        mesmas colunas (o cabeçalho vem do primeiro bloco).
+        """
+        ws = self.wb.create_sheet(nome)
+        if isinstance(df, pd.DataFrame):
+            # As linhas são convertidas em blocos para que só um bloco exista como objetos Python
+            blocos = (df.iloc[i:i + self.LINHAS_POR_BLOCO] for i in range(0, len(df), self.LINHAS_POR_BLOCO))
+            self._cabecalho(ws, df.columns, cabecalho_estilizado)
+            cabecalho_pendente = False
+        else:
+            blocos, cabecalho_pendente = df, True
+
+        for bloco in blocos:
+            if cabecalho_pendente:
+                self._cabecalho(ws, bloco.columns, cabecalho_estilizado)
+                cabecalho_pendente = False
+            colunas = [self._valores(ws, bloco[coluna]) for coluna in bloco.columns]
+            for linha in zip(*colunas):
+                ws.append(linha)
+
+    @staticmethod
+    def _cabecalho(ws, colunas, estilizado: bool) -> None:
+        cabecalho = []
+        for coluna in colunas:
+            cell = WriteOnlyCell(ws, value=str(coluna))
+            cell.border = CABECALHO_BORDA
+            if estilizado:
+                cell.font = CABECALHO_FONTE
+                cell.fill = CABECALHO_FUNDO
+                cell.alignment = CABECALHO_ALINHAMENTO
+            else:
+                cell.font = CABECALHO_PADRAO_FONTE
+                cell.alignment = CABECALHO_PADRAO_ALINHAMENTO
+            cabecalho.append(cell)
+        ws.append(cabecalho)
+
+    @staticmethod
+    def _valores(ws, s: pd.Series) -> list:
+        """Valores Python da coluna, com None para ausentes e datas já formatadas."""
+        if pd.api.types.is_datetime64_any_dtype(s):
+            if s.dt.tz is not None:
+                s = s.dt.tz_localize(None)
+            valores = []
+            for d in s.to_numpy(dtype="datetime64[us]").astype(object):
+                if d is None:
+                    valores.append(None)
+                else:
+                    cell = WriteOnlyCell(ws, value=d)
+                    cell.number_format = FORMATO_DATA
+                    valores.append(cell)
+            return valores
+        # tolist() devolve tipos nativos do Python (int, float, str), como o openpyxl espera
+        return s.astype(object).where(s.notna(), None).tolist()
@@ -8,6 +8,9 @@ import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 from agents.orchestrator_agent import OrchestratorAgent
+from agents.scenario_engine import Cenario, ScenarioEngine
+from agents.money import formatar_reais
+from agents.report_aggregates import para_reais_quadros
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -51,11 +54,24 @@ def executar_calculo_vr_agente(competencia: str, input_dir: str = "documentos",
         output_filename = f"VR MENSAL {pd.to_datetime(competencia).strftime('%m.%Y')}.xlsx"
         total_formatado = f"R$ {total_vr:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
-        return f"Processo concluído com sucesso! Valor total do benefício: **{total_formatado}**. A planilha foi salva em '{output_dir}/{output_filename}'."
+        resumo = results.get("agregados", {}).get("resumo", {})
+        detalhes = ""
+        if resumo:
+            detalhes = (f" Colaboradores: {resumo['colaboradores']}; custo da empresa: "
+                        f"**{formatar_reais(resumo['custo_empresa'])}**; desconto dos profissionais: "
+                        f"**{formatar_reais(resumo['desconto_profissional'])}**.")
+
+        return f"Processo concluído com sucesso! Valor total do benefício: **{total_formatado}**.{detalhes} A planilha foi salva em '{output_dir}/{output_filename}'."
     except Exception as e:
         logging.error(f"Falha na ferramenta de cálculo: {e}", exc_info=True)
         return f"Ocorreu um erro ao executar o cálculo: {e}"
 
+def salvar_uploads(uploaded_files, temp_path: Path):
+    """Grava os arquivos enviados pelo usuário no diretório temporário informado."""
+    for uploaded_file in uploaded_files:
+        with open(temp_path / uploaded_file.name, "wb") as f:
+            f.write(uploaded_file.getbuffer())
+
 def get_agent():
     """Monta e retorna o agente de IA com a ferramenta refatorada."""
     llm = get_llm()
@@ -128,26 +144,62 @@ if modo == "Interface Gráfica":
         num_mes = map_mes_num[mes_selecionado]
         competencia_str = f"{ano_selecionado}-{num_mes:02d}-01"
 
+        st.divider()
+        st.header("Cache de Leitura")
+        usar_cache = st.checkbox(
+            "Reaproveitar arquivos já lidos",
+            value=True,
+            help="Quando marcado, arquivos idênticos a execuções anteriores são carregados do cache em disco, "
+                 "e uma execução idêntica (mesmos arquivos, configuração e competência) reaproveita o resultado anterior."
+        )
+        if st.button("Limpar cache de leitura", use_container_width=True):
+            removidos = OrchestratorAgent(config_path='config.yaml').clear_ingest_cache()
+            st.success(f"{removidos} entrada(s) removida(s) do cache.")
+        if st.button("Limpar cache de resultados", use_container_width=True):
+            removidos = OrchestratorAgent(config_path='config.yaml').clear_result_cache()
+            st.success(f"{removidos} resultado(s) removido(s) do cache.")
+
 
     # --- Coluna da Direita: Upload e Execução ---
     st.header("1. Upload dos Arquivos de Entrada")
     uploaded_files = st.file_uploader(
         "Selecione os arquivos Excel necessários (ATIVOS, DESLIGADOS, FÉRIAS, etc.)",
-        type=["xlsx"],
+        type=["xlsx", "csv", "parquet"],
         accept_multiple_files=True,
         label_visibility="collapsed"
     )
 
-    st.header("2. Execução do Processo")
+    st.header("2. Pré-validação dos Arquivos")
+    if st.button("Verificar Arquivos", disabled=not uploaded_files, use_container_width=True):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = Path(temp_dir)
+            salvar_uploads(uploaded_files, temp_path)
+            try:
+                preflight = OrchestratorAgent(config_path='config.yaml').preflight(
+                    input_dir=str(temp_path),
+                    competencia_str=competencia_str
+                )
+            except Exception as e:
+                st.error(f"Atenção: Não foi possível pré-validar os arquivos: {e}")
+                preflight = None
+        if preflight:
+            for erro in preflight["erros"]:
+                st.error(erro)
+            for aviso in preflight["avisos"]:
+                st.warning(aviso)
+            if not preflight["erros"] and not preflight["avisos"]:
+                st.success(f"Arquivos verificados em {preflight['duracao']:.2f}s. Nenhum problema encontrado.")
+            else:
+                st.caption(f"Pré-validação concluída em {preflight['duracao']:.2f}s.")
+
+    st.header("3. Execução do Processo")
     if st.button("Iniciar Processamento", type="primary", disabled=not uploaded_files, use_container_width=True):
         if not os.path.exists("output"):
             os.makedirs("output")
         
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
-            for uploaded_file in uploaded_files:
-                with open(temp_path / uploaded_file.name, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
+            salvar_uploads(uploaded_files, temp_path)
             
             logs = {
                 "contexto": [], "coleta": [], "validacao": [],
@@ -165,7 +217,8 @@ if modo == "Interface Gráfica":
                         input_dir=str(temp_path), 
                         output_dir="output",
                         competencia_str=competencia_str,
-                        progress_callback=progress_callback
+                        progress_callback=progress_callback,
+                        use_cache=usar_cache
                     )
             except Exception as e:
                 st.error(f"Atenção: Ocorreu um erro durante a execução: {e}")
@@ -182,19 +235,66 @@ if modo == "Interface Gráfica":
         # --- Container de Dashboards ---
         with st.container(border=True):
             st.subheader("Resumo Geral")
-            base_final = results.get("base_final", pd.DataFrame())
+            # Agregados calculados pelo relator (valores em centavos)
+            agregados = results.get("agregados", {})
+            resumo = agregados.get("resumo", {})
             total_vr = results.get("total_vr", 0.0)
-            custo_empresa = base_final["EMPRESA_80"].sum()
 
             col1, col2, col3 = st.columns(3)
             col1.metric("Valor Total do Benefício", f"R$ {total_vr:,.2f}")
-            col2.metric("Custo Total para Empresa", f"R$ {custo_empresa:,.2f}")
-            col3.metric("Colaboradores Beneficiados", f"{len(base_final)}")
-            
-            st.divider()
-            st.subheader("Custo Total de VR por Sindicato")
-            custo_sindicato = base_final.groupby("SINDICATO")["VR_TOTAL"].sum()
-            st.bar_chart(custo_sindicato)
+            col2.metric("Custo Total para Empresa", f"R$ {resumo.get('custo_empresa', 0) / 100:,.2f}")
+            col3.metric("Colaboradores Beneficiados", f"{resumo.get('colaboradores', 0)}")
+
+            if agregados:
+                st.divider()
+                st.subheader("Custo Total de VR por Sindicato")
+                st.bar_chart(agregados["por_sindicato"]["TOTAL"] / 100)
+
+                col_uf, col_ajuste = st.columns(2)
+                col_uf.subheader("Por UF")
+                col_uf.dataframe(para_reais_quadros(agregados["por_uf"]), hide_index=True)
+                col_ajuste.subheader("Por Tipo de Ajuste")
+                col_ajuste.dataframe(para_reais_quadros(agregados["por_ajuste"]), hide_index=True)
+
+        # --- Container de Simulação de Cenários ---
+        with st.container(border=True):
+            st.subheader("Simulação de Cenários")
+            entradas = results.get("entradas_calculo", {})
+            if not entradas:
+                st.info("Simulação indisponível para esta execução (recálculo incremental ou nenhum colaborador calculado).")
+            else:
+                engine = ScenarioEngine(entradas)
+                atuais = engine.parametros_atuais()
+                st.caption(
+                    "Cada linha é um cenário. Altere o valor diário ou os dias úteis de cada UF e o percentual "
+                    "pago pela empresa; adicione linhas para novos cenários."
+                )
+                padrao = {"Cenário": "Atual", "% empresa": 80.0}
+                for r in atuais.itertuples():
+                    padrao[f"Valor {r.UF}"] = float(r.VALOR)
+                    padrao[f"Dias {r.UF}"] = int(r.DIAS_UTEIS)
+                editados = st.data_editor(
+                    pd.DataFrame([padrao]),
+                    num_rows="dynamic",
+                    use_container_width=True,
+                    key="cenarios",
+                )
+                if st.button("Simular Cenários", use_container_width=True):
+                    cenarios = [
+                        Cenario(
+                            nome=str(linha["Cenário"] or f"Cenário {i + 1}"),
+                            valores={uf: linha[f"Valor {uf}"] for uf in atuais["UF"] if pd.notna(linha[f"Valor {uf}"])},
+                            dias_uteis={uf: linha[f"Dias {uf}"] for uf in atuais["UF"] if pd.notna(linha[f"Dias {uf}"])},
+                            percentual_empresa=float(linha["% empresa"]) / 100,
+                        )
+                        for i, linha in editados.reset_index(drop=True).iterrows()
+                    ]
+                    try:
+                        tabela = engine.avaliar(cenarios)
+                        st.dataframe(tabela.style.format("R$ {:,.2f}"), use_container_width=True)
+                        st.bar_chart(tabela["TOTAL"])
+                    except ValueError as e:
+                        st.error(f"Atenção: {e}")
 
         # --- Container de Logs ---
         with st.container(border=True):
@@ -216,7 +316,29 @@ if modo == "Interface Gráfica":
                             st.markdown(f"- {msg}")
                     else:
                         st.write("Nenhum detalhe registrado para esta etapa.")
-        
+
+            # Tempo e memória por etapa (results["metrics"])
+            metricas = results.get("metrics") or {}
+            if metricas.get("etapas"):
+                with st.expander("Tempo por Etapa", expanded=True):
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Tempo Total", f"{metricas['tempo_total_s']:.2f}s")
+                    col2.metric("Tempo de CPU", f"{metricas['cpu_total_s']:.2f}s")
+                    if metricas.get("rss_pico_mb") is not None:
+                        col3.metric("Pico de Memória (RSS)", f"{metricas['rss_pico_mb']:.0f} MB")
+                    tabela = pd.DataFrame(metricas["etapas"]).set_index("etapa")
+                    st.bar_chart(tabela["tempo_s"])
+                    st.dataframe(
+                        tabela.rename(columns={
+                            "origem": "Origem", "inicio_s": "Início (s)", "tempo_s": "Tempo (s)", "cpu_s": "CPU (s)",
+                            "rss_mb": "RSS no Fim (MB)", "rss_variacao_mb": "Variação RSS (MB)",
+                            "memoria_pico_mb": "Alocação Pico (MB)",
+                            "linhas_entrada": "Linhas Entrada", "linhas_saida": "Linhas Saída",
+                            "memoria_saida_mb": "Memória Saída (MB)",
+                        }),
+                        use_container_width=True,
+                    )
+
         # --- Botão de Download ---
         num_mes = pd.to_datetime(results["competencia"]).month
         ano_selecionado = pd.to_datetime(results["competencia"]).year
@@ -241,7 +363,7 @@ elif modo == "Interface de Chat (IA)":
     st.subheader("1. Upload dos Arquivos de Entrada")
     uploaded_files_chat = st.file_uploader(
         "Selecione os arquivos Excel necessários (ATIVOS, DESLIGADOS, FÉRIAS, etc.) para o cálculo via chat.",
-        type=["xlsx"],
+        type=["xlsx", "csv", "parquet"],
         accept_multiple_files=True,
         key="chat_file_uploader" # Chave única para este uploader
     )
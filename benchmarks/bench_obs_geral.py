@@ -0,0 +1,78 @@
+"""
+Benchmark da montagem da coluna OBS GERAL: versão linha a linha
+(`_gerar_observacoes` via apply) contra a versão vetorizada
+(`_montar_observacoes`). Confere também que os textos são idênticos.
+
+Uso:
+    python benchmarks/bench_obs_geral.py [--linhas 10000 100000 1000000] [--max-linha-a-linha 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.calculator_agent import CalculatorAgent
+from agents.context import Contexto
+
+
+def gerar_base(n: int, seed: int = 0) -> tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """Base calculada sintética com a mesma proporção de eventos de uma competência real."""
+    rng = np.random.default_rng(seed)
+    abril = pd.date_range("2025-04-01", "2025-04-30").to_numpy()
+    admissao = pd.Series(np.where(rng.random(n) < 0.05, rng.choice(abril, n), np.datetime64("NaT")), dtype="datetime64[ns]")
+    base = pd.DataFrame({
+        "ADMISSAO": admissao,
+        "FATOR_ADMISSAO": np.where(admissao.notna(), rng.choice([0.5, 0.8, 1.0], n), 1.0),
+        "FERIAS_DIAS": np.where(rng.random(n) < 0.1, rng.integers(1, 31, n), 0),
+    })
+    des_data = pd.Series(np.where(rng.random(n) < 0.03, rng.choice(abril, n), np.datetime64("NaT")), dtype="datetime64[ns]")
+    des_ok = pd.Series(np.where(des_data.notna(), rng.random(n) < 0.8, pd.NA), dtype="object")
+    return base, des_data, des_ok
+
+
+def linha_a_linha(agent: CalculatorAgent, base, des_data, des_ok, ctx) -> pd.Series:
+    obs = base.assign(**{"DATA DEMISSÃO": des_data, "DESLIG_OK": des_ok})
+    return obs.apply(lambda row: agent._gerar_observacoes(row, ctx), axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da coluna OBS GERAL.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-linha-a-linha", type=int, default=1_000_000,
+                        help="Acima deste tamanho a versão linha a linha não é executada.")
+    args = parser.parse_args()
+
+    ctx = Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"),
+    )
+    agent = CalculatorAgent()
+
+    print(f"{'linhas':>10} {'linha a linha (s)':>18} {'vetorizado (s)':>15} {'speedup':>8}")
+    for n in args.linhas:
+        base, des_data, des_ok = gerar_base(n)
+
+        inicio = time.perf_counter()
+        vetorizado = agent._montar_observacoes(base, des_data, des_ok, ctx)
+        t_vet = time.perf_counter() - inicio
+
+        if n > args.max_linha_a_linha:
+            print(f"{n:>10} {'-':>18} {t_vet:>15.3f} {'-':>8}")
+            continue
+
+        inicio = time.perf_counter()
+        referencia = linha_a_linha(agent, base, des_data, des_ok, ctx)
+        t_ref = time.perf_counter() - inicio
+
+        if referencia.tolist() != vetorizado.tolist():
+            raise SystemExit(f"Textos divergentes para {n} linhas.")
+        print(f"{n:>10} {t_ref:>18.3f} {t_vet:>15.3f} {t_ref / t_vet:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
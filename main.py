@@ -2,7 +2,10 @@
 import argparse
 import logging
 import os
+import sys
 from agents.orchestrator_agent import OrchestratorAgent
+from agents.tenant_runner import TenantRunner
+from agents.exporters import FORMATOS, validar_formatos
 
 def main():
     """
@@ -23,12 +26,87 @@ def main():
         default="output",
         help="Diretório para salvar o relatório final. Padrão: 'output'"
     )
-    parser.add_argument(
+    competencia = parser.add_mutually_exclusive_group()
+    competencia.add_argument(
         "-c", "--competencia", 
-        required=True, 
         help="Data de competência no formato YYYY-MM-DD (ex: 2024-05-01)"
     )
+    competencia.add_argument(
+        "--competencias",
+        help="Processa várias competências de uma vez, lendo as bases uma única vez "
+             "(ex: 2025-01..2025-12 ou 2025-01,2025-03)"
+    )
+    parser.add_argument(
+        "--clientes",
+        nargs="+",
+        help="Diretórios (ou padrões glob) de entrada de vários clientes, processados em paralelo. "
+             "A saída de cada cliente vai para <output>/<nome do diretório>."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Processos usados com --clientes (padrão: processamento.max_workers_clientes ou núcleos da máquina)."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Recalcula só as matrículas alteradas desde a última execução da mesma competência."
+    )
+    parser.add_argument(
+        "--verificar-incremental",
+        action="store_true",
+        help="Com --incremental, também executa o cálculo completo e compara os resultados."
+    )
+    parser.add_argument(
+        "--formatos",
+        help=f"Formatos de saída separados por vírgula, entre {', '.join(FORMATOS)} "
+             "(padrão: exportacao.formatos do config.yaml; com --clientes vale sempre o config.yaml)."
+    )
+    parser.add_argument(
+        "--preflight",
+        action="store_true",
+        help="Apenas pré-valida os arquivos de entrada (cabeçalho e amostra), sem executar o cálculo."
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="Ignora os caches de coleta e de resultados e relê todos os arquivos de entrada."
+    )
+    parser.add_argument(
+        "--limpar-cache",
+        action="store_true",
+        help="Remove todas as entradas do cache de coleta antes de executar."
+    )
+    parser.add_argument(
+        "--limpar-resultados",
+        action="store_true",
+        help="Remove todas as entradas do cache de resultados antes de executar."
+    )
+    parser.add_argument(
+        "--retomar",
+        action="store_true",
+        help="Retoma a execução a partir dos checkpoints da última execução com as mesmas entradas."
+    )
+    parser.add_argument(
+        "--etapas",
+        help="Reexecuta só as etapas informadas, separadas por vírgula, e as que dependem delas "
+             "(ex.: relatorio); as demais são carregadas dos checkpoints."
+    )
     args = parser.parse_args()
+    if not args.competencia and not args.competencias and not (args.limpar_cache or args.limpar_resultados):
+        parser.error("um dos argumentos -c/--competencia ou --competencias é obrigatório")
+    competencias = []
+    if args.competencias:
+        try:
+            competencias = OrchestratorAgent.expandir_competencias(args.competencias)
+        except ValueError as e:
+            parser.error(f"--competencias inválido: {e}")
+    formatos = None
+    if args.formatos:
+        try:
+            formatos = validar_formatos(args.formatos.split(","))
+        except ValueError as e:
+            parser.error(f"--formatos inválido: {e}")
 
     # Garante que o diretório de saída exista
     if not os.path.exists(args.output):
@@ -37,10 +115,56 @@ def main():
     # Instancia e executa o orquestrador
     try:
         orchestrator = OrchestratorAgent(config_path='config.yaml')
+        if args.limpar_cache:
+            removidos = orchestrator.clear_ingest_cache()
+            print(f"Cache de coleta limpo: {removidos} entrada(s) removida(s).")
+        if args.limpar_resultados:
+            removidos = orchestrator.clear_result_cache()
+            print(f"Cache de resultados limpo: {removidos} entrada(s) removida(s).")
+        if (args.limpar_cache or args.limpar_resultados) and not args.competencia and not competencias:
+            return
+        if args.preflight:
+            resultado = orchestrator.preflight(input_dir=args.input, competencia_str=args.competencia or competencias[0])
+            for erro in resultado["erros"]:
+                print(f"ERRO: {erro}")
+            for aviso in resultado["avisos"]:
+                print(f"AVISO: {aviso}")
+            if not resultado["erros"] and not resultado["avisos"]:
+                print("Pré-validação concluída sem problemas.")
+            print(f"Tempo da pré-validação: {resultado['duracao']:.2f}s")
+            if resultado["erros"]:
+                sys.exit(1)
+            return
+        if args.clientes:
+            resumo = TenantRunner(config_path='config.yaml', max_workers=args.workers).execute(
+                padroes=args.clientes,
+                output_dir=args.output,
+                competencias=competencias or [args.competencia],
+                use_cache=not args.sem_cache
+            )
+            print(resumo.to_string(index=False))
+            if (resumo["STATUS"] == "ERRO").any():
+                sys.exit(1)
+            return
+        if competencias:
+            orchestrator.run_batch(
+                input_dir=args.input,
+                output_dir=args.output,
+                competencias=competencias,
+                use_cache=not args.sem_cache,
+                formatos=formatos
+            )
+            return
         orchestrator.run(
             input_dir=args.input,
             output_dir=args.output,
-            competencia_str=args.competencia
+            competencia_str=args.competencia,
+            use_cache=not args.sem_cache,
+            incremental=args.incremental or None,
+            verificar_incremental=args.verificar_incremental,
+            formatos=formatos,
+            retomar=args.retomar,
+            etapas=[e.strip() for e in args.etapas.split(",") if e.strip()] if args.etapas else None
         )
     except Exception as e:
         logging.error(f"Falha na execução do processo: {e}")
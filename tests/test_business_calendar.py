@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.business_calendar import BusinessCalendar
+from agents.calculator_agent import CalculatorAgent
+from agents.context import Contexto
+
+FERIADOS_DIR = os.path.join(os.path.dirname(__file__), '..', 'feriados')
+
+
+def test_feriados_nacionais_estaduais_e_municipais():
+    cal = BusinessCalendar(BusinessCalendar.load_feriados(FERIADOS_DIR))
+    abril_ini, abril_fim = pd.Timestamp("2025-04-01"), pd.Timestamp("2025-04-30")
+
+    assert cal.dias_uteis(abril_ini, abril_fim) == 20          # 22 dias de semana - Sexta-feira Santa - Tiradentes
+    assert cal.dias_uteis(abril_ini, abril_fim, "RJ") == 19    # + São Jorge
+    janeiro_ini, janeiro_fim = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-31")
+    assert cal.dias_uteis(janeiro_ini, janeiro_fim, "SP") == 22
+    assert cal.dias_uteis(janeiro_ini, janeiro_fim, "SP", "Sao Paulo") == 21  # + aniversário da cidade
+
+
+def test_consultas_vetorizadas_equivalem_a_busday_count():
+    cal = BusinessCalendar(BusinessCalendar.load_feriados(FERIADOS_DIR))
+    mes = cal.mes(pd.Timestamp("2025-04-01"), pd.Timestamp("2025-04-30"), ["RJ", "SP"])
+    datas = pd.Series(pd.to_datetime(["2025-04-10", "2025-04-23", None, "2025-05-02"]))
+    ufs = ["RJ", "SP", "SP", None]
+
+    for i, (d, uf) in enumerate(zip(datas, ufs)):
+        if pd.isna(d) or d.month != 4:
+            assert mes.dias_ate(datas, ufs)[i] == 0 and mes.dias_desde(datas, ufs)[i] == 0
+            continue
+        feriados = cal.datas_feriados(uf)
+        dia = np.datetime64(d.date(), "D")
+        assert mes.dias_ate(datas, ufs)[i] == np.busday_count(np.datetime64("2025-04-01"), dia + 1, holidays=feriados)
+        assert mes.dias_desde(datas, ufs)[i] == np.busday_count(dia, np.datetime64("2025-05-01"), holidays=feriados)
+    assert mes.total(ufs).tolist() == [19, 20, 20, 20]
+
+
+def test_dias_uteis_derivados_sem_planilha():
+    ctx = Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"),
+    )
+    elegiveis = pd.DataFrame({"MATRICULA": [1, 2], "SINDICATO": ["SINDPD SP", "SINDICATO X"]})
+    bases = {
+        "SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo"], "VALOR": [10.0]}),
+        "FERIAS": pd.DataFrame({"MATRICULA": [], "DIAS DE FÉRIAS": []}),
+    }
+    agent = CalculatorAgent({"calendario": {"diretorio_feriados": FERIADOS_DIR}})
+
+    base = agent.execute(elegiveis, bases, ctx)
+
+    assert base["DIAS_UTEIS_BASE"].tolist() == [21, 0]  # maio/2025: 22 dias de semana - Dia do Trabalho
+    assert base["VR_TOTAL"].tolist() == [21000, 0]  # centavos
@@ -0,0 +1,112 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.calculator_agent import CalculatorAgent
+from agents.context import Contexto
+from agents.money import dividir, formatar_reais
+from benchmarks.bench_obs_geral import gerar_base, linha_a_linha
+
+FERIADOS_DIR = os.path.join(os.path.dirname(__file__), '..', 'feriados')
+
+
+@pytest.mark.parametrize("pos15_regra", ["integral", "pro-rata"])
+def test_obs_geral_vetorizada_identica_a_linha_a_linha(pos15_regra):
+    ctx = Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"), pos15_regra=pos15_regra,
+    )
+    agent = CalculatorAgent()
+    base, des_data, des_ok = gerar_base(5000, seed=7)
+
+    vetorizado = agent._montar_observacoes(base, des_data, des_ok, ctx)
+
+    assert vetorizado.tolist() == linha_a_linha(agent, base, des_data, des_ok, ctx).tolist()
+    assert vetorizado.str.contains(" | ").any()
+
+
+def _bases_sinteticas(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    abril = pd.date_range("2025-03-25", "2025-05-05").to_numpy()
+    sindicatos = ["SINDPD SP", "SINDPD RJ", "SINDPPD RS", "SITEPD PR", "SEM UF"]
+    matriculas = np.arange(1, n + 1)
+    elegiveis = pd.DataFrame({"MATRICULA": matriculas, "SINDICATO": rng.choice(sindicatos, n)})
+    adm = rng.choice(matriculas, n // 10, replace=False)
+    des = rng.choice(matriculas, n // 10, replace=False)
+    fer = rng.choice(matriculas, n // 5)
+    bases = {
+        "DIAS_UTEIS": pd.DataFrame({"SINDICATO": sindicatos[:4], "DIAS_UTEIS": [22, 21, 21, 22]}),
+        "SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo", "Rio de Janeiro", "Rio Grande do Sul", "Paraná"], "VALOR": [37.5, 35.0, 35.0, 35.0]}),
+        "ADMISSAO": pd.DataFrame({"MATRICULA": adm, "ADMISSAO": rng.choice(abril, len(adm))}),
+        "DESLIGADOS": pd.DataFrame({"MATRICULA": des, "DATA DEMISSÃO": rng.choice(abril, len(des)), "OK": rng.random(len(des)) < 0.8}),
+        "FERIAS": pd.DataFrame({"MATRICULA": fer, "DIAS DE FÉRIAS": rng.integers(1, 20, len(fer))}),
+    }
+    return elegiveis, bases
+
+
+@pytest.mark.parametrize("pos15_regra", ["integral", "pro-rata"])
+def test_nucleo_vetorizado_identico_ao_legado(pos15_regra):
+    ctx = Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"), pos15_regra=pos15_regra,
+    )
+    config = {"calendario": {"diretorio_feriados": FERIADOS_DIR}}
+    elegiveis, bases = _bases_sinteticas(800, seed=3)
+
+    vetorizado = CalculatorAgent(config).execute(elegiveis, bases, ctx)
+    legado = CalculatorAgent({**config, "processamento": {"motor_calculo": "legado"}}).execute(elegiveis, bases, ctx)
+
+    colunas = ["FATOR_ADMISSAO", "FATOR_DESLIG", "DIAS_CALCULADOS", "VR_TOTAL", "EMPRESA_80", "COLABORADOR_20", "OBS GERAL"]
+    pd.testing.assert_frame_equal(vetorizado[colunas], legado[colunas], check_dtype=False)
+    assert (vetorizado["FATOR_DESLIG"] == 0).any() and (vetorizado["FATOR_ADMISSAO"] < 1).any()
+
+
+def test_pos15_regra_nao_muda_o_valor():
+    # Desligado (OK) após o dia 15: o valor é sempre proporcional; a regra só muda a observação
+    config = {"calendario": {"diretorio_feriados": FERIADOS_DIR}}
+    elegiveis = pd.DataFrame({"MATRICULA": [1, 2], "SINDICATO": ["SINDPD SP", "SINDPD SP"]})
+    bases = {
+        "DIAS_UTEIS": pd.DataFrame({"SINDICATO": ["SINDPD SP"], "DIAS_UTEIS": [22]}),
+        "SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo"], "VALOR": [37.5]}),
+        "DESLIGADOS": pd.DataFrame({"MATRICULA": [1], "DATA DEMISSÃO": [pd.Timestamp("2025-04-24")], "OK": [True]}),
+    }
+    resultados = {}
+    for regra in ("integral", "pro-rata"):
+        ctx = Contexto(
+            periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+            periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+            competencia=pd.Timestamp("2025-05-01"), pos15_regra=regra,
+        )
+        for motor in CalculatorAgent.MOTORES:
+            agente = CalculatorAgent({**config, "processamento": {"motor_calculo": motor}})
+            resultados[regra, motor] = agente.execute(elegiveis, bases, ctx)
+
+    calendario = CalculatorAgent(config).calendario
+    fator = calendario.dias_uteis(pd.Timestamp("2025-04-01"), pd.Timestamp("2025-04-24"), "SP") / \
+        calendario.dias_uteis(pd.Timestamp("2025-04-01"), pd.Timestamp("2025-04-30"), "SP")
+    for base in resultados.values():
+        assert base["FATOR_DESLIG"].tolist() == [fator, 1.0] and fator < 1
+        assert base["DIAS_CALCULADOS"].tolist() == [round(22 * fator), 22]
+    assert "compra integral" in resultados["integral", "vetorizado"].loc[0, "OBS GERAL"]
+
+
+def test_motor_desconhecido():
+    with pytest.raises(ValueError):
+        CalculatorAgent({"processamento": {"motor_calculo": "gpu"}})
+
+
+def test_divisao_em_centavos_sempre_soma_o_total():
+    rng = np.random.default_rng(11)
+    total = rng.integers(0, 10**9, 100_000)
+    for percentual in (0.80, 0.70, 0.333):
+        empresa, colaborador = dividir(total, percentual)
+        assert (empresa + colaborador == total).all()
+        assert (np.abs(empresa - total * percentual) <= 0.5 + 1e-6).all()
+    assert dividir(np.array([1, 5, 12345]), 0.80)[0].tolist() == [1, 4, 9876]
+    assert formatar_reais(102540250) == "R$ 1.025.402,50" and formatar_reais(7) == "R$ 0,07"
@@ -0,0 +1,90 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.collector_agent import CollectorAgent
+
+
+@pytest.fixture
+def config():
+    return {
+        "arquivos_entrada": {"ativos": "ATIVOS", "desligados": "DESLIGADOS"},
+        "sheets": {"ativos": "ATIVOS", "desligados": "DESLIGADOS"},
+        "colunas": {
+            "ativos": {"obrigatorias": ["MATRICULA", "TITULO DO CARGO", "SINDICATO"], "opcionais": ["EMPRESA"]},
+        },
+        "cache_coleta": {"habilitado": False},
+    }
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    ativos = pd.DataFrame({
+        "Chapa": [1, 2, 3],
+        "NOME": ["A", "B", None],
+        "Cargo": ["ANALISTA", "DIRETOR", "ANALISTA"],
+        "Sindicato do Colaborador": ["SINDPD SP", "SINDPD RJ", None],
+        "OUTRA": [None, None, "x"],
+    })
+    ativos.to_excel(tmp_path / "ATIVOS.xlsx", sheet_name="ATIVOS", index=False)
+    return tmp_path
+
+
+def test_projecao_resolve_aliases_e_mantem_linhas(config, input_dir):
+    bases, file_report = CollectorAgent(config).execute(str(input_dir))
+    ativos = bases["ATIVOS"]
+
+    assert list(ativos.columns) == ["MATRICULA", "TITULO DO CARGO", "SINDICATO"]
+    assert len(ativos) == 3
+    assert ativos["MATRICULA"].tolist() == [1, 2, 3]
+    assert file_report["ATIVOS"] == "ATIVOS.xlsx"
+
+
+def test_projecao_equivale_a_leitura_completa(config, input_dir):
+    agente = CollectorAgent(config)
+    projetado = agente.execute(str(input_dir))[0]["ATIVOS"]
+    completo = agente._normalize_cols(agente._read(str(input_dir / "ATIVOS.xlsx"), "ATIVOS"))
+
+    pd.testing.assert_frame_equal(projetado, completo[list(projetado.columns)])
+
+
+def test_arquivo_ausente_gera_base_vazia(config, input_dir):
+    bases, file_report = CollectorAgent(config).execute(str(input_dir))
+
+    assert bases["DESLIGADOS"].empty
+    assert file_report["DESLIGADOS"] == "Não encontrado"
+
+
+def test_csv_em_blocos_equivale_ao_excel(config, input_dir, tmp_path):
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    pd.read_excel(input_dir / "ATIVOS.xlsx").to_csv(csv_dir / "ATIVOS.csv", sep=";", index=False)
+    config["entrada_csv"] = {"separador": ";", "linhas_por_bloco": 1}
+    config["tipos"] = {"ativos": {"MATRICULA": "Int32", "SINDICATO": "category"}}
+    agente = CollectorAgent(config)
+
+    do_csv = agente.execute(str(csv_dir))[0]["ATIVOS"]
+    do_excel = agente.execute(str(input_dir))[0]["ATIVOS"]
+
+    pd.testing.assert_frame_equal(do_csv, do_excel)
+
+
+def test_opcoes_do_csv_entram_na_chave_do_cache(config, tmp_path):
+    csv_dir = tmp_path / "csv"
+    csv_dir.mkdir()
+    (csv_dir / "DESLIGADOS.csv").write_text("MATRICULA;VALOR\n1;37,5\n", encoding="utf-8")
+    config["cache_coleta"] = {"habilitado": True, "diretorio": str(tmp_path / "cache")}
+    config["entrada_csv"] = {"separador": ";", "decimal": "."}
+    agente = CollectorAgent(config)
+    assert agente.execute(str(csv_dir))[0]["DESLIGADOS"]["VALOR"].tolist() == ["37,5"]
+
+    # Corrigida a marca decimal, o arquivo (inalterado) é lido de novo
+    config["entrada_csv"]["decimal"] = ","
+    agente = CollectorAgent(config)
+    assert agente.execute(str(csv_dir))[0]["DESLIGADOS"]["VALOR"].tolist() == [37.5]
+    assert agente.cache_status["DESLIGADOS"] == "miss"
+    agente.execute(str(csv_dir))
+    assert agente.cache_status["DESLIGADOS"] == "hit"
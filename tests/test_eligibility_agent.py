@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.context import Contexto
+from agents.eligibility_agent import EligibilityAgent
+
+
+def _bases():
+    return {
+        "ATIVOS": pd.DataFrame({
+            "MATRICULA": [1, 2, 3, 4, 5],
+            "TITULO DO CARGO": pd.Categorical(["DIRETOR ADJUNTO", "Analista", "diretora", "ANALISTA", "Estagiário"]),
+        }),
+        "ESTAGIO": pd.DataFrame({"MATRICULA": [5]}),
+        "EXTERIOR": pd.DataFrame({"MATRICULA": [2, 5]}),
+        "DESLIGADOS": pd.DataFrame({"MATRICULA": [4], "DATA DEMISSÃO": pd.to_datetime(["2025-03-10"])}),
+    }
+
+
+def test_regras_padrao_compiladas_em_mascara():
+    agent = EligibilityAgent()
+    elegiveis = agent.execute(_bases())
+
+    assert elegiveis["MATRICULA"].tolist() == [4]
+    motivos = dict(zip(agent.exclusoes["MATRICULA"], agent.exclusoes["MOTIVOS_EXCLUSAO"]))
+    assert agent.descrever(motivos[1]) == ["DIRETOR"]
+    assert agent.descrever(motivos[2]) == ["EXTERIOR"]
+    assert agent.descrever(motivos[5]) == ["ESTAGIO", "EXTERIOR"]
+    assert agent.resumo()["EXTERIOR"] == 2
+
+
+def test_regra_de_data_com_limite_do_contexto():
+    config = {"elegibilidade": {"exclusoes": [
+        {"nome": "DESLIGADO_ANTES", "tipo": "data", "base": "DESLIGADOS", "coluna": "DATA DEMISSÃO", "antes_de": "periodo_eventos_ini"},
+    ]}}
+    ctx = Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"),
+    )
+    agent = EligibilityAgent(config)
+
+    elegiveis = agent.execute(_bases(), ctx=ctx)
+
+    assert elegiveis["MATRICULA"].tolist() == [1, 2, 3, 5]
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.context import Contexto
+from agents.exporters import CsvExporter, FixedWidthExporter, ParquetExporter, validar_formatos
+
+CTX = Contexto(
+    periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+    periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+    competencia=pd.Timestamp("2025-05-01"),
+)
+
+
+def _blocos():
+    df = pd.DataFrame({
+        "Matricula": pd.array([35741, 20003, 7], dtype="Int64"),
+        "Admissão": pd.to_datetime(["2025-04-10", None, "2025-04-30"]),
+        "Sindicato do Colaborador": pd.Categorical(["SINDPD SP", "SINDPD RJ - SINDICATO", None]),
+        "TOTAL": [770.0, 735.55, 0.0],
+    })
+    return [df.iloc[:2], df.iloc[2:]]
+
+
+def test_largura_fixa_com_cabecalho_e_rodape(tmp_path):
+    exportador = FixedWidthExporter({
+        "fim_linha": "\n",
+        "cabecalho": "0{competencia}",
+        "rodape": "9{quantidade:04d}{total_centavos:010d}",
+        "campos": [
+            {"valor": "1", "largura": 1},
+            {"coluna": "Matricula", "largura": 6, "tipo": "numero"},
+            {"coluna": "Admissão", "largura": 8, "tipo": "data"},
+            {"coluna": "TOTAL", "largura": 7, "tipo": "valor"},
+            {"coluna": "Sindicato do Colaborador", "largura": 10},
+        ],
+    })
+    out = tmp_path / "saida.txt"
+    linhas = exportador.escrever(str(out), _blocos(), CTX)
+
+    assert linhas == 3
+    assert out.read_text(encoding="latin-1").splitlines() == [
+        "0052025",
+        "1035741100420250077000SINDPD SP ",
+        "1020003        0073555SINDPD RJ ",
+        "1000007300420250000000          ",
+        "900030000150555",
+    ]
+
+    pequeno = FixedWidthExporter({"campos": [{"coluna": "Matricula", "largura": 4, "tipo": "numero"}]})
+    with pytest.raises(ValueError, match="largura"):
+        pequeno.escrever(str(tmp_path / "erro.txt"), _blocos())
+
+
+def test_csv_e_parquet_em_blocos(tmp_path):
+    csv = tmp_path / "saida.csv"
+    assert CsvExporter().escrever(str(csv), _blocos()) == 3
+    lido = pd.read_csv(csv, sep=";", decimal=",", encoding="utf-8-sig")
+    assert list(lido.columns) == ["Matricula", "Admissão", "Sindicato do Colaborador", "TOTAL"]
+    assert lido["Admissão"].tolist()[0] == "10/04/2025"
+    assert lido["TOTAL"].sum() == pytest.approx(1505.55)
+
+    parquet = tmp_path / "saida.parquet"
+    assert ParquetExporter().escrever(str(parquet), _blocos()) == 3
+    lido = pd.read_parquet(parquet)
+    assert lido["Matricula"].tolist() == [35741, 20003, 7]
+    assert lido["Sindicato do Colaborador"].isna().tolist() == [False, False, True]
+
+    assert validar_formatos(["XLSX", "csv", "csv"]) == ["xlsx", "csv"]
+    with pytest.raises(ValueError):
+        validar_formatos(["pdf"])
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.context import Contexto
+from agents.incremental_state import EstadoIncremental
+
+CTX = Contexto(
+    periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+    periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+    competencia=pd.Timestamp("2025-05-01"),
+)
+
+
+def _bases():
+    return {
+        "ATIVOS": pd.DataFrame({"MATRICULA": [1, 2, 3, 4], "SINDICATO": ["SINDPD SP"] * 4}),
+        "FERIAS": pd.DataFrame({"MATRICULA": [1, 2, 2], "DIAS DE FÉRIAS": [5, 3, 4]}),
+        "DESLIGADOS": pd.DataFrame({"MATRICULA": [3], "DATA DEMISSÃO": [pd.Timestamp("2025-04-20")]}),
+        "SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo"], "VALOR": [37.5]}),
+    }
+
+
+def test_matriculas_alteradas():
+    estado = EstadoIncremental("unused")
+    anterior = estado.assinatura(_bases(), CTX, {}, pd.DataFrame())
+
+    bases = _bases()
+    bases["FERIAS"] = pd.DataFrame({"MATRICULA": [1, 2, 2], "DIAS DE FÉRIAS": [5, 4, 3]})  # ordem das linhas da 2 mudou
+    bases["DESLIGADOS"] = bases["DESLIGADOS"].iloc[0:0]
+    alteradas, _ = EstadoIncremental.matriculas_alteradas(anterior, estado.assinatura(bases, CTX, {}, pd.DataFrame()))
+    assert alteradas.tolist() == [2, 3]
+
+    sem_mudanca, _ = EstadoIncremental.matriculas_alteradas(anterior, estado.assinatura(_bases(), CTX, {}, pd.DataFrame()))
+    assert sem_mudanca.tolist() == []
+
+    bases = _bases()
+    bases["SIND_VALOR"].loc[0, "VALOR"] = 40.0
+    completo, motivo = EstadoIncremental.matriculas_alteradas(anterior, estado.assinatura(bases, CTX, {}, pd.DataFrame()))
+    assert completo is None and motivo
+
+    completo, _ = EstadoIncremental.matriculas_alteradas(anterior, estado.assinatura(_bases(), CTX, {"regras": {}}, pd.DataFrame()))
+    assert completo is None
+
+
+def test_divergencias_e_persistencia(tmp_path):
+    base = pd.DataFrame({"MATRICULA": [1, 2, 3], "VR_TOTAL": [10.0, 20.0, None]})
+    outra = base.copy()
+    outra.loc[1, "VR_TOTAL"] = 21.0
+    assert EstadoIncremental.divergencias(base, base.copy()) == []
+    assert EstadoIncremental.divergencias(base, outra) == [2]
+    assert EstadoIncremental.divergencias(base.iloc[:2], base) == [3]
+
+    estado = EstadoIncremental(str(tmp_path))
+    chave = EstadoIncremental.chave("entrada", CTX)
+    assert estado.carregar(chave) is None
+    estado.salvar(chave, {"base_final": base})
+    pd.testing.assert_frame_equal(estado.carregar(chave)["base_final"], base)
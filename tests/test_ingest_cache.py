@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.ingest_cache import IngestCache
+
+
+def _arquivo(tmp_path, nome, conteudo):
+    path = tmp_path / nome
+    path.write_bytes(conteudo)
+    return str(path)
+
+
+def test_chave_muda_com_conteudo_aba_e_mapa(tmp_path):
+    cache = IngestCache(str(tmp_path / "cache"))
+    arq = _arquivo(tmp_path, "a.xlsx", b"conteudo-1")
+    chave = cache.key(arq, "Planilha1", {"MATRICULA": ["CHAPA"]})
+
+    assert chave == cache.key(arq, "Planilha1", {"MATRICULA": ["CHAPA"]})
+    assert chave != cache.key(arq, "ATIVOS", {"MATRICULA": ["CHAPA"]})
+    assert chave != cache.key(arq, "Planilha1", {"MATRICULA": ["CADASTRO"]})
+    _arquivo(tmp_path, "a.xlsx", b"conteudo-2")
+    assert chave != cache.key(arq, "Planilha1", {"MATRICULA": ["CHAPA"]})
+
+
+def test_get_put_preserva_dataframe(tmp_path):
+    cache = IngestCache(str(tmp_path / "cache"))
+    df = pd.DataFrame({"MATRICULA": [1, 2], "DATA": pd.to_datetime(["2025-04-01", None])})
+
+    assert cache.get("k") is None
+    cache.put("k", df)
+    pd.testing.assert_frame_equal(cache.get("k"), df)
+
+
+def test_evict_por_idade_e_tamanho(tmp_path):
+    df = pd.DataFrame({"X": range(1000)})
+    cache = IngestCache(str(tmp_path / "cache"), max_mb=1, max_age_days=1)
+    cache.put("antiga", df)
+    velho = time.time() - 2 * 86400
+    os.utime(os.path.join(cache.cache_dir, "antiga.pkl"), (velho, velho))
+    cache.put("nova", df)
+    assert cache.get("antiga") is None
+    assert cache.get("nova") is not None
+
+    cache.max_bytes = 1
+    cache.evict()
+    assert cache.get("nova") is None
+
+
+def test_clear(tmp_path):
+    cache = IngestCache(str(tmp_path / "cache"))
+    cache.put("a", pd.DataFrame({"X": [1]}))
+    cache.put("b", pd.DataFrame({"X": [2]}))
+    assert cache.clear() == 2
+    assert cache.get("a") is None
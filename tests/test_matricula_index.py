@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.matricula_index import MatriculaIndex
+
+
+def _bases():
+    return {
+        "ATIVOS": pd.DataFrame({"MATRICULA": [10, 20, 30, 40]}),
+        "DESLIGADOS": pd.DataFrame({
+            "MATRICULA": pd.array([20, 20, None], dtype="Int64"),
+            "DATA DEMISSÃO": pd.to_datetime(["2025-04-05", "2025-04-20", "2025-04-21"]),
+        }),
+        "FERIAS": pd.DataFrame({"MATRICULA": [30, 30, 10], "DIAS DE FÉRIAS": [5, 10, 3]}),
+    }
+
+
+def test_indice_detecta_duplicadas_e_usa_primeira_ocorrencia():
+    index = MatriculaIndex(_bases())
+    codigos = index.codigos_de(pd.Series([10, 20, 30, 99]))
+
+    assert index.duplicadas == {"DESLIGADOS": [20], "FERIAS": [30]}
+    assert codigos[-1] == -1
+    datas = index.valores("DESLIGADOS", "DATA DEMISSÃO", codigos)
+    assert datas.iloc[1] == pd.Timestamp("2025-04-05")
+    assert datas.drop(index=1).isna().all()
+    assert index.contem("DESLIGADOS", codigos).tolist() == [False, True, False, False]
+
+
+def test_indice_soma_por_matricula_e_base_ausente():
+    index = MatriculaIndex(_bases())
+    codigos = index.codigos_de(pd.Series([10, 20, 30, 40]))
+
+    np.testing.assert_array_equal(index.soma("FERIAS", "DIAS DE FÉRIAS", codigos), [3, 0, 15, 0])
+    assert not index.contem("EXTERIOR", codigos).any()
+    assert index.valores("ADMISSAO", "ADMISSAO", codigos).isna().all()
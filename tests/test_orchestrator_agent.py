@@ -0,0 +1,134 @@
+import os
+import sys
+import threading
+
+import pandas as pd
+import pytest
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.context import Contexto
+from agents.orchestrator_agent import OrchestratorAgent
+from agents.reporter_agent import ReporterAgent
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_expandir_competencias_intervalos_e_listas():
+    assert OrchestratorAgent.expandir_competencias("2024-11..2025-02") == [
+        "2024-11-01", "2024-12-01", "2025-01-01", "2025-02-01",
+    ]
+    assert OrchestratorAgent.expandir_competencias("2025-03, 2025-01-15,2025-03") == ["2025-01-01", "2025-03-01"]
+    with pytest.raises(ValueError):
+        OrchestratorAgent.expandir_competencias("2025-05..2025-01")
+    with pytest.raises(ValueError):
+        OrchestratorAgent.expandir_competencias(" , ")
+
+
+def _contexto(mes: str) -> Contexto:
+    competencia = pd.Timestamp(mes)
+    return Contexto(
+        periodo_beneficio_ini=competencia, periodo_beneficio_fim=competencia + pd.offsets.MonthEnd(0),
+        periodo_eventos_ini=competencia, periodo_eventos_fim=competencia + pd.offsets.MonthEnd(0),
+        competencia=competencia,
+    )
+
+
+def test_consolidado_soma_competencias(tmp_path):
+    def base(matriculas, totais):
+        totais = pd.Series(totais, dtype="int64")  # centavos
+        return pd.DataFrame({
+            "MATRICULA": matriculas, "DIAS_CALCULADOS": [20] * len(matriculas), "VR_TOTAL": totais,
+            "EMPRESA_80": totais * 8 // 10, "COLABORADOR_20": totais - totais * 8 // 10,
+        })
+
+    calculadas = [(_contexto("2025-01-01"), base([1, 2], [10000, 20000])), (_contexto("2025-02-01"), base([2, 3], [5000, 1000]))]
+    out = tmp_path / "consolidado.xlsx"
+    resumo = ReporterAgent().consolidar(calculadas, str(out))
+
+    assert resumo["Competência"].tolist() == ["01/2025", "02/2025", "TOTAL"]
+    assert resumo["TOTAL"].tolist() == [300.0, 60.0, 360.0]
+    por_colaborador = pd.read_excel(out, sheet_name="Por Colaborador")
+    assert por_colaborador.columns.tolist() == ["Matricula", "01/2025", "02/2025", "TOTAL"]
+    assert por_colaborador.set_index("Matricula")["TOTAL"].to_dict() == {1: 100.0, 2: 250.0, 3: 10.0}
+
+
+def _config(tmp_path) -> str:
+    with open(os.path.join(RAIZ, "config.yaml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config["calendario"]["diretorio_feriados"] = os.path.join(RAIZ, "feriados")
+    for secao in ("cache_coleta", "cache_resultado", "checkpoints", "incremental"):
+        config[secao]["diretorio"] = str(tmp_path / ".cache" / secao)
+    config["exportacao"]["particionamento"]["coluna"] = "SINDICATO"
+    caminho = tmp_path / "config.yaml"
+    caminho.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+    return str(caminho)
+
+
+def _entrada(tmp_path) -> str:
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    sp, rj = "SINDPD SP - SIND.TRAB.EM PROC DADOS", "SINDPD RJ - SINDICATO PROFISSIONAIS PROC DADOS"
+    pd.DataFrame({
+        "MATRICULA": [1, 2, 3], "EMPRESA": 1410, "TITULO DO CARGO": "ANALISTA", "DESC. SITUACAO": "Trabalhando",
+        "Sindicato": [sp, rj, sp],
+    }).to_excel(entrada / "ATIVOS.xlsx", sheet_name="ATIVOS", index=False)
+    pd.DataFrame({
+        "MATRICULA": [3], "DATA DEMISSÃO": [pd.Timestamp("2025-05-10")], "COMUNICADO DE DESLIGAMENTO": ["OK"],
+    }).to_excel(entrada / "DESLIGADOS.xlsx", sheet_name="DESLIGADOS", index=False)
+    pd.DataFrame([["SINDICADO", "DIAS UTEIS "], [sp, 22], [rj, 21]], columns=["BASE DIAS UTEIS", ""]).to_excel(
+        entrada / "Base dias uteis.xlsx", sheet_name="Planilha1", index=False
+    )
+    pd.DataFrame({"ESTADO": ["São Paulo", "Rio de Janeiro"], "VALOR": [37.5, 35.0]}).to_excel(
+        entrada / "Base sindicato x valor.xlsx", sheet_name="Planilha1", index=False
+    )
+    return str(entrada)
+
+
+def test_run_retoma_e_reexecuta_etapas(tmp_path, monkeypatch):
+    # Com o `processamento` do config.yaml, coleta e partições usam pools de
+    # processos iniciados de dentro das threads do pipeline
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    agente = OrchestratorAgent(_config(tmp_path))
+    entrada, saida = _entrada(tmp_path), str(tmp_path / "saida")
+    os.makedirs(saida)
+    threads = set()
+
+    def origens(results):
+        return {e["etapa"]: e["origem"] for e in results["metrics"]["etapas"]}
+
+    completo = agente.run(entrada, saida, "2025-05-01", lambda passo, mensagem: threads.add(threading.get_ident()), use_cache=False)
+    assert completo["total_vr"] > 0
+    assert {"preparo_dias_uteis", "preparo_sind_valor", "preparo_desligados", "validacao"} <= set(origens(completo))
+    assert set(origens(completo).values()) == {"executada"}
+    # Etapas rodam no pool, mas o progresso é narrado na thread que chamou run
+    assert threads == {threading.get_ident()}
+
+    retomado = agente.run(entrada, saida, "2025-05-01", use_cache=False, retomar=True)
+    assert set(origens(retomado).values()) == {"checkpoint"}
+    pd.testing.assert_frame_equal(retomado["base_final"], completo["base_final"])
+
+    os.remove(os.path.join(saida, "VR MENSAL 05.2025.xlsx"))
+    relatorio = agente.run(entrada, saida, "2025-05-01", use_cache=False, etapas=["relatorio"])
+    assert {etapa for etapa, origem in origens(relatorio).items() if origem == "executada"} == {"relatorio"}
+    assert relatorio["total_vr"] == completo["total_vr"]
+    assert os.path.exists(os.path.join(saida, "VR MENSAL 05.2025.xlsx"))
+
+    with pytest.raises(ValueError, match="desconhecida"):
+        agente.run(entrada, saida, "2025-05-01", use_cache=False, etapas=["layout"])
+
+
+def test_run_batch_mede_lote_e_cada_competencia(tmp_path):
+    agente = OrchestratorAgent(_config(tmp_path))
+    entrada, saida = _entrada(tmp_path), str(tmp_path / "saida")
+    os.makedirs(saida)
+
+    results = agente.run_batch(entrada, saida, ["2025-06-01", "2025-05-01"], use_cache=False)
+
+    assert [e["etapa"] for e in results["metrics"]["etapas"]] == ["coleta", "validacao"]
+    assert results["metrics"]["competencias"] == ["2025-05-01", "2025-06-01"]
+    for chave, mes in (("2025-05", "05.2025"), ("2025-06", "06.2025")):
+        metricas = results["competencias"][chave]["metrics"]
+        assert [e["etapa"] for e in metricas["etapas"]] == ["elegibilidade", "calculo", "relatorio"]
+        assert os.path.exists(os.path.join(saida, f"VR MENSAL {mes} - METRICAS.json"))
+    assert results["total_vr"] == sum(r["total_vr"] for r in results["competencias"].values()) > 0
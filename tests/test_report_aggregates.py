@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.report_aggregates import SEM_AJUSTE, calcular_agregados
+
+
+def test_agregados_em_uma_passada():
+    base = pd.DataFrame({
+        "MATRICULA": [1, 2, 3, 4],
+        "SINDICATO": pd.Categorical(["SINDPD SP", "SINDPD SP", "SINDPD RJ", None]),
+        "ESTADO": ["São Paulo", "São Paulo", "Rio de Janeiro", None],
+        "ADMISSAO": pd.to_datetime(["2025-04-15", None, None, None]),
+        "FATOR_ADMISSAO": [0.5, 1.0, 1.0, 1.0],
+        "FATOR_DESLIG": [1.0, 1.0, 0.0, 1.0],
+        "FERIAS_DIAS": [5, 0, 0, 0],
+        "DIAS_CALCULADOS": [6, 22, 0, 0],
+        "VR_TOTAL": [22500, 82500, 0, 0],
+        "EMPRESA_80": [18000, 66000, 0, 0],
+        "COLABORADOR_20": [4500, 16500, 0, 0],
+    })
+    bases = {
+        # 2: desligado após o período de eventos (FATOR_DESLIG 1.0, mas com OBS); 4: sem comunicado OK
+        "DESLIGADOS": pd.DataFrame({
+            "MATRICULA": [3, 2, 9, 4],
+            "DATA DEMISSÃO": pd.to_datetime(["2025-04-10", "2025-05-10", "2025-05-20", "2025-04-05"]),
+            "OK": [True, True, True, False],
+        }),
+        "SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo", "Rio de Janeiro"], "VALOR": [37.5, 35.0]}),
+    }
+    agregados = calcular_agregados(base, bases)
+
+    resumo = agregados["resumo"]
+    assert (resumo["total"], resumo["custo_empresa"], resumo["colaboradores"]) == (105000, 84000, 4)
+    assert (resumo["desligados"], resumo["desligados_ate15"], resumo["desligados_pos16"]) == (4, 2, 1)
+    assert resumo["sindicatos_valor"] == "São Paulo: 37.50, Rio de Janeiro: 35.00"
+
+    por_sindicato = agregados["por_sindicato"]
+    assert por_sindicato.loc["SINDPD SP", ["Colaboradores", "TOTAL"]].tolist() == [2, 105000]
+    assert por_sindicato["Colaboradores"].sum() == 4
+    assert agregados["por_uf"].loc["São Paulo", "UF"] == "SP"
+
+    por_ajuste = agregados["por_ajuste"]["Colaboradores"]
+    assert por_ajuste.to_dict() == {"Admissão": 1, "Desligamento": 2, "Férias": 1, SEM_AJUSTE: 1}
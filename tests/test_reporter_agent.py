@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+
+import openpyxl
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.context import Contexto
+from agents.reporter_agent import ReporterAgent
+
+CTX = Contexto(
+    periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+    periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+    competencia=pd.Timestamp("2025-05-01"),
+)
+
+
+def test_saida_particionada_confere_com_o_total(tmp_path):
+    base = pd.DataFrame({
+        "MATRICULA": [1, 2, 3, 4],
+        "SINDICATO": pd.Categorical(["SINDPD SP", "SINDPD RJ", "SINDPD SP", None]),
+        "ESTADO": ["São Paulo", "Rio de Janeiro", "São Paulo", None],
+        "ADMISSAO": pd.NaT,
+        "FATOR_ADMISSAO": 1.0,
+        "FATOR_DESLIG": 1.0,
+        "FERIAS_DIAS": 0,
+        "DIAS_CALCULADOS": [22, 21, 22, 0],
+        "VALOR_UNITARIO": [3750, 3500, 3750, 0],
+        "VR_TOTAL": [82500, 73500, 82500, 0],
+        "EMPRESA_80": [66000, 58800, 66000, 0],
+        "COLABORADOR_20": [16500, 14700, 16500, 0],
+        "OBS GERAL": "",
+    })
+    config = {"exportacao": {
+        "formatos": ["xlsx", "csv"],
+        "particionamento": {"coluna": "SINDICATO", "mapa": {"SINDPD RJ": "CONTRATO A/B"}, "max_workers": 1},
+    }}
+    reporter = ReporterAgent(config)
+    out = tmp_path / "VR MENSAL 05.2025.xlsx"
+    total = reporter.execute(base, {}, CTX, str(out))
+
+    assert total == 2385.0
+    manifesto = reporter.particoes
+    assert sorted(manifesto["PARTICAO"].unique()) == ["CONTRATO A/B", "SEM VALOR", "SINDPD SP"]
+    assert len(manifesto) == 6
+    diretorio = tmp_path / "VR MENSAL 05.2025"
+    assert (diretorio / "VR MENSAL 05.2025 - CONTRATO A_B.csv").exists()
+
+    gravado = json.loads((diretorio / "MANIFESTO.json").read_text(encoding="utf-8"))
+    assert (gravado["particoes"], gravado["linhas"], gravado["total_centavos"]) == (3, 4, 238500)
+
+    sp = openpyxl.load_workbook(diretorio / "VR MENSAL 05.2025 - SINDPD SP.xlsx")["VR MENSAL 05.2025"]
+    assert [linha[0].value for linha in sp.iter_rows(min_row=2)] == [1, 3]
+    resumo = openpyxl.load_workbook(out)
+    assert resumo.sheetnames[0] == "Partições"
+    assert [c.value for c in list(resumo["Partições"].rows)[-1]][:5] == ["TOTAL", None, None, 4, 2385]
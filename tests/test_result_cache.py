@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.context import Contexto
+from agents.result_cache import ResultCache
+
+CTX = Contexto(
+    periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+    periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+    competencia=pd.Timestamp("2025-05-01"),
+)
+FERIADOS = pd.DataFrame({"DATA": pd.to_datetime(["2025-05-01"]), "UF": [None]})
+
+
+def test_chave_restauracao_e_invalidacao(tmp_path):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    (entrada / "ATIVOS.xlsx").write_bytes(b"ativos-1")
+    cache = ResultCache(str(tmp_path / "cache"))
+    config = {"regras": {"pos15_regra": "integral"}}
+
+    chave = cache.chave_execucao(str(entrada), config, CTX, ["xlsx"], FERIADOS)
+    assert chave == cache.chave_execucao(str(entrada), config, CTX, ["xlsx"], FERIADOS)
+    assert chave != cache.chave_execucao(str(entrada), config, CTX, ["xlsx", "csv"], FERIADOS)
+    assert chave != cache.chave_execucao(str(entrada), {"regras": {"pos15_regra": "pro-rata"}}, CTX, ["xlsx"], FERIADOS)
+    assert cache.chave_execucao(str(tmp_path / "inexistente"), config, CTX, ["xlsx"], FERIADOS) is None
+
+    saida = tmp_path / "saida"
+    (saida / "VR MENSAL 05.2025").mkdir(parents=True)
+    (saida / "VR MENSAL 05.2025.xlsx").write_bytes(b"planilha")
+    (saida / "VR MENSAL 05.2025" / "MANIFESTO.json").write_bytes(b"{}")
+    results = {"total_vr": 735.0, "base_final": pd.DataFrame({"MATRICULA": [1]}), "logs": {"relatorio": ["ok"]}, "bases": {"ATIVOS": 1}}
+    cache.guardar(chave, results, [str(saida / "VR MENSAL 05.2025.xlsx"), str(saida / "VR MENSAL 05.2025" / "MANIFESTO.json")], str(saida))
+
+    outra = tmp_path / "outra"
+    anteriores, arquivos = cache.restaurar(chave, str(outra))
+    assert anteriores["total_vr"] == 735.0 and "bases" not in anteriores
+    assert (outra / "VR MENSAL 05.2025.xlsx").read_bytes() == b"planilha"
+    assert (outra / "VR MENSAL 05.2025" / "MANIFESTO.json").exists() and len(arquivos) == 2
+
+    (entrada / "ATIVOS.xlsx").write_bytes(b"ativos-2")
+    assert cache.restaurar(cache.chave_execucao(str(entrada), config, CTX, ["xlsx"], FERIADOS), str(outra)) is None
+    assert cache.clear() == 1
+    assert cache.restaurar(chave, str(outra)) is None
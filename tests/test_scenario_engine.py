@@ -0,0 +1,82 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.calculator_agent import CalculatorAgent
+from agents.context import Contexto
+from agents.scenario_engine import Cenario, ScenarioEngine
+
+FERIADOS_DIR = os.path.join(os.path.dirname(__file__), '..', 'feriados')
+
+
+def _contexto() -> Contexto:
+    return Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"), periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"), periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"),
+    )
+
+
+def _bases(n: int = 400, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    abril = pd.date_range("2025-04-01", "2025-04-30").to_numpy()
+    matriculas = np.arange(1, n + 1)
+    des = rng.choice(matriculas, n // 5, replace=False)
+    elegiveis = pd.DataFrame({"MATRICULA": matriculas, "SINDICATO": rng.choice(["SINDPD SP", "SINDPD RJ", "SEM UF"], n)})
+    bases = {
+        "DIAS_UTEIS": pd.DataFrame({"SINDICATO": ["SINDPD SP", "SINDPD RJ"], "DIAS_UTEIS": [22, 21]}),
+        "SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo", "Rio de Janeiro"], "VALOR": [37.5, 35.0]}),
+        "DESLIGADOS": pd.DataFrame({"MATRICULA": des, "DATA DEMISSÃO": rng.choice(abril, len(des)), "OK": True}),
+        "FERIAS": pd.DataFrame({"MATRICULA": rng.choice(matriculas, n // 4), "DIAS DE FÉRIAS": 3}),
+    }
+    return elegiveis, bases
+
+
+def _calcular(elegiveis, bases):
+    agente = CalculatorAgent({"calendario": {"diretorio_feriados": FERIADOS_DIR}})
+    return agente, agente.execute(elegiveis, bases, _contexto())
+
+
+def test_cenarios_identicos_ao_calculo_completo():
+    elegiveis, bases = _bases()
+    agente, base = _calcular(elegiveis, bases)
+    engine = ScenarioEngine(agente.entradas)
+
+    tabela = engine.avaliar([
+        Cenario("Atual"),
+        Cenario("SP 40", valores={"sp": 40.0}, dias_uteis={"SP": 20}),
+    ])
+
+    # A tabela sai em reais; a base calculada guarda centavos
+    atual = base.groupby("SINDICATO")["VR_TOTAL"].sum()
+    assert (tabela.loc["Atual", atual.index] * 100).round().astype(int).tolist() == atual.tolist()
+    assert tabela.loc["Atual", "Custo empresa"] == base["EMPRESA_80"].sum() / 100
+
+    sp = bases.copy()
+    sp["SIND_VALOR"] = pd.DataFrame({"ESTADO": ["São Paulo", "Rio de Janeiro"], "VALOR": [40.0, 35.0]})
+    sp["DIAS_UTEIS"] = pd.DataFrame({"SINDICATO": ["SINDPD SP", "SINDPD RJ"], "DIAS_UTEIS": [20, 21]})
+    _, base_sp = _calcular(elegiveis, sp)
+    assert tabela.loc["SP 40", "TOTAL"] == base_sp["VR_TOTAL"].sum() / 100
+    assert tabela.loc["SP 40", "SINDPD RJ"] == tabela.loc["Atual", "SINDPD RJ"]
+
+
+def test_cenarios_em_blocos_e_parametros_invalidos():
+    elegiveis, bases = _bases()
+    agente, _ = _calcular(elegiveis, bases)
+    cenarios = [Cenario(f"SP {v}", valores={"SP": v}, percentual_empresa=0.7) for v in (30.0, 35.0, 40.0)]
+
+    inteiro = ScenarioEngine(agente.entradas).avaliar(cenarios)
+    em_blocos = ScenarioEngine(agente.entradas, max_elementos=1).avaliar(cenarios)
+    pd.testing.assert_frame_equal(inteiro, em_blocos)
+    assert (inteiro["Custo empresa"] + inteiro["Desconto profissional"]).round(2).equals(inteiro["TOTAL"])
+
+    with pytest.raises(ValueError):
+        ScenarioEngine(agente.entradas).avaliar([Cenario("x", valores={"XX": 1.0})])
+    with pytest.raises(ValueError):
+        ScenarioEngine(agente.entradas).avaliar([Cenario("x", percentual_empresa=1.5)])
+    with pytest.raises(ValueError):
+        ScenarioEngine({})
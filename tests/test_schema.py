@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.schema import SchemaRegistry, ensure_int
+
+
+def test_aplica_tipos_compactos():
+    registry = SchemaRegistry({"ativos": {"MATRICULA": "Int32", "SINDICATO": "category", "ADMISSAO": "datetime"}})
+    df = pd.DataFrame({
+        "MATRICULA": ["10", 11.0, None],
+        "SINDICATO": ["SINDPD SP", "SINDPD SP", "SINDPD RJ"],
+        "ADMISSAO": ["2025-04-01", "x", None],
+    })
+
+    tipado = registry.apply("ativos", df)
+
+    assert str(tipado["MATRICULA"].dtype) == "Int32"
+    assert tipado["MATRICULA"].tolist()[:2] == [10, 11]
+    assert isinstance(tipado["SINDICATO"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(tipado["ADMISSAO"])
+    assert tipado["ADMISSAO"].isna().sum() == 2
+
+
+def test_matricula_fora_do_intervalo_usa_int64():
+    registry = SchemaRegistry({"ativos": {"MATRICULA": "Int32"}})
+    tipado = registry.apply("ativos", pd.DataFrame({"MATRICULA": [1, 2**40]}))
+    assert str(tipado["MATRICULA"].dtype) == "Int64"
+
+
+def test_ensure_int_nao_reconverte_serie_tipada():
+    s = pd.Series([1, 2], dtype="Int32")
+    assert ensure_int(s) is s
+    assert str(ensure_int(pd.Series(["1", "a"])).dtype) == "Int64"
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.business_calendar import UF_POR_ESTADO
+from agents.sindicato_resolver import SindicatoResolver
+
+
+def test_resolve_siglas_nomes_tabela_e_padroes():
+    resolver = SindicatoResolver(
+        tabela={"Sindicato Único da Capital": "DF"},
+        padroes=[{"padrao": "CURITIBA", "uf": "PR"}],
+    )
+    sindicatos = pd.Series([
+        "SINDPD SP - SIND.TRAB.EM PROC DADOS E EMPR.EMPRESAS PROC DADOS ESTADO DE SP.",
+        "SINDPPD RS - SINDICATO DOS TRAB. EM PROC. DE DADOS RIO GRANDE DO SUL",
+        "SIND DOS TRAB DE CURITIBA",
+        "SINDICATO DOS COMERCIÁRIOS DE MINAS GERAIS",
+        "Sindicato único da capital",
+        "SINDICATO DOS BANCARIOS MT",
+        "SINDICATO SEM ESTADO",
+        None,
+    ])
+
+    assert resolver.ufs(sindicatos).tolist() == ["SP", "RS", "PR", "MG", "DF", "MT", None, None]
+    assert resolver.nao_resolvidos(sindicatos).tolist() == [False] * 6 + [True, False]
+
+
+def test_todas_as_ufs_por_sigla_e_resolucao_memoizada():
+    resolver = SindicatoResolver()
+    sindicatos = pd.Series([f"SINDICATO X {uf}" for uf in UF_POR_ESTADO.values()] * 1000)
+
+    assert resolver.ufs(sindicatos).tolist() == list(UF_POR_ESTADO.values()) * 1000
+    assert len(resolver._memo) == 27
+
+
+def test_uf_invalida_na_configuracao():
+    with pytest.raises(ValueError):
+        SindicatoResolver(tabela={"SIND X": "XX"})
+
+
+def test_siglas_que_sao_palavras_comuns_nao_resolvem_fora_de_posicao():
+    resolver = SindicatoResolver()
+    sindicatos = pd.Series([
+        "SINDICATO DOS TRABALHADORES DE MINAS GERAIS SE FILIADO",
+        "SIND. DOS EMPREGADOS - MA CONSULTORIA BAHIA",
+        "SINDICATO DOS TRABALHADORES SE FILIADO A CUT",
+        "SINDICATO DOS EMPREGADOS EM TO DAS AS EMPRESAS",
+        "SINDPD ES - SINDICATO DOS TRAB. EM PROC. DE DADOS",
+        "SINDICATO DOS COMERCIARIOS - AL",
+        "SINDICATO DOS BANCARIOS DE BELEM/PA",
+        "SIND. DOS EMPREGADOS - MA CONSULTORIA",
+        "SINDPD SP - SIND.TRAB.EM PROC DADOS E EMPR.EMPRESAS PROC DADOS ESTADO DE SP.",
+    ])
+
+    assert resolver.ufs(sindicatos).tolist() == ["MG", "BA", None, None, "ES", "AL", "PA", "MA", "SP"]
@@ -0,0 +1,100 @@
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.run_metrics import MedidorEtapas
+from agents.stage_dag import ChamadasPrincipais, Checkpoints, Etapa, StageDAG
+
+
+def _pipeline(chamadas):
+    def registrar(nome, **saidas):
+        chamadas.append((nome, threading.current_thread().name))
+        return saidas
+
+    return StageDAG([
+        Etapa("relatorio", lambda total: registrar("relatorio", arquivo=f"total={total}"), ("total",), ("arquivo",)),
+        Etapa("coleta", lambda: registrar("coleta", bases=[1, 2, 3]), saidas=("bases",)),
+        Etapa("contexto", lambda: registrar("contexto", ctx=10), saidas=("ctx",)),
+        Etapa("calculo", lambda bases, ctx: registrar("calculo", total=sum(bases) * ctx), ("bases", "ctx"), ("total",)),
+    ])
+
+
+def test_ordem_e_etapas_independentes_em_paralelo():
+    chamadas = []
+    dag = _pipeline(chamadas)
+    assert dag.ordem == ["coleta", "contexto", "calculo", "relatorio"]
+    assert dag.dependentes(["calculo"]) == {"calculo", "relatorio"}
+
+    valores = dag.executar(max_workers=2)
+    assert valores["arquivo"] == "total=60"
+
+    # Etapas no pool rodam juntas, mas o que elas passam por `chamadas` roda nesta thread
+    juntas, principal, narradas = threading.Barrier(2, timeout=5), ChamadasPrincipais(), []
+
+    def etapa(nome):
+        juntas.wait()
+        principal.chamar(lambda: narradas.append((nome, threading.current_thread().name)))
+        return {nome: True}
+
+    StageDAG([Etapa("a", lambda: etapa("a"), saidas=("a",)), Etapa("b", lambda: etapa("b"), saidas=("b",))]).executar(
+        max_workers=2, chamadas=principal,
+    )
+    assert sorted(narradas) == [("a", threading.current_thread().name), ("b", threading.current_thread().name)]
+
+    with pytest.raises(ValueError, match="circular"):
+        StageDAG([Etapa("a", lambda y: {}, ("y",), ("x",)), Etapa("b", lambda x: {}, ("x",), ("y",))])
+
+
+def test_retomar_e_reexecutar_uma_etapa(tmp_path):
+    checkpoints = Checkpoints(str(tmp_path))
+    chamadas = []
+    dag = _pipeline(chamadas)
+    with pytest.raises(ValueError, match="sem checkpoint"):
+        dag.executar(checkpoints, "2025-05", "v1", etapas=["relatorio"])
+
+    dag.executar(checkpoints, "2025-05", "v1")
+    chamadas.clear()
+    assert dag.executar(checkpoints, "2025-05", "v1", retomar=True)["arquivo"] == "total=60"
+    assert chamadas == [] and set(dag.origem.values()) == {"checkpoint"}
+
+    dag.executar(checkpoints, "2025-05", "v1", etapas=["calculo"])
+    assert [nome for nome, _ in chamadas] == ["calculo", "relatorio"]
+    assert dag.origem["coleta"] == "checkpoint"
+
+    # Outra assinatura (ex.: arquivos de entrada alterados) não reaproveita nada
+    chamadas.clear()
+    dag.executar(checkpoints, "2025-05", "v2", retomar=True)
+    assert len(chamadas) == 4
+
+
+def test_metricas_por_etapa():
+    eventos = []
+    medidor = MedidorEtapas(ao_medir=eventos.append)
+    dag = StageDAG([
+        Etapa("coleta", lambda: {"bases": {"ATIVOS": pd.DataFrame({"MATRICULA": range(100_000)})}}, saidas=("bases",)),
+        Etapa("calculo", lambda bases: {"base": bases["ATIVOS"].head(50_000)}, ("bases",), ("base",)),
+    ])
+    dag.executar(medidor=medidor)
+    metricas = medidor.resumo(competencia="2025-05-01")
+
+    assert [e["etapa"] for e in metricas["etapas"]] == ["coleta", "calculo"] and eventos == metricas["etapas"]
+    calculo = metricas["etapas"][1]
+    assert (calculo["linhas_entrada"], calculo["linhas_saida"], calculo["origem"]) == (100_000, 50_000, "executada")
+    assert calculo["tempo_s"] >= 0 and calculo["memoria_saida_mb"] > 0 and calculo["memoria_pico_mb"] is None
+    assert metricas["competencia"] == "2025-05-01" and metricas["tempo_total_s"] >= calculo["tempo_s"]
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="RSS atual só é lido de /proc")
+def test_memoria_por_etapa_nao_repete_o_pico_anterior():
+    medidor = MedidorEtapas()
+    grande = medidor.medir("coleta", lambda: {"bases": np.ones(10_000_000)})  # ~76 MB
+    medidor.medir("relatorio", lambda: {"total": float(grande["bases"].sum())})
+    coleta, relatorio = medidor.etapas
+
+    assert coleta["rss_variacao_mb"] > 50
+    assert abs(relatorio["rss_variacao_mb"]) < 50 and relatorio["rss_mb"] >= coleta["rss_variacao_mb"]
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.tenant_runner import TenantRunner
+
+CONFIG = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config.yaml'))
+
+
+def test_resolver_diretorios_expande_glob(tmp_path):
+    for nome in ("cliente_b", "cliente_a", "outro"):
+        (tmp_path / nome).mkdir()
+    (tmp_path / "cliente_c.txt").write_text("")
+
+    diretorios = TenantRunner.resolver_diretorios([str(tmp_path / "cliente_*"), str(tmp_path / "cliente_a")])
+    assert [os.path.basename(d) for d in diretorios] == ["cliente_a", "cliente_b"]
+
+    (tmp_path / "x" / "cliente_a").mkdir(parents=True)
+    with pytest.raises(ValueError):
+        TenantRunner.resolver_diretorios([str(tmp_path / "cliente_a"), str(tmp_path / "x" / "cliente_a")])
+
+
+def test_falha_de_um_cliente_nao_interrompe_os_demais(tmp_path):
+    for nome in ("a", "b"):
+        (tmp_path / "entrada" / nome).mkdir(parents=True)
+
+    runner = TenantRunner(config_path=CONFIG, max_workers=1)
+    resumo = runner.execute([str(tmp_path / "entrada" / "*")], str(tmp_path / "saida"), ["competencia-invalida"])
+
+    assert resumo["CLIENTE"].tolist() == ["a", "b"]
+    assert (resumo["STATUS"] == "ERRO").all()
+    assert resumo["ERRO"].str.len().gt(0).all()
+    assert (tmp_path / "saida" / "RESUMO CLIENTES.xlsx").exists()
@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.collector_agent import CollectorAgent
+from agents.context import Contexto
+from agents.validation_rules import RuleEngine
+from agents.validator_agent import ValidatorAgent
+
+
+@pytest.fixture
+def ctx():
+    return Contexto(
+        periodo_beneficio_ini=pd.Timestamp("2025-05-01"),
+        periodo_beneficio_fim=pd.Timestamp("2025-05-31"),
+        periodo_eventos_ini=pd.Timestamp("2025-04-01"),
+        periodo_eventos_fim=pd.Timestamp("2025-04-30"),
+        competencia=pd.Timestamp("2025-05-01"),
+    )
+
+
+def test_preflight_reporta_todos_os_problemas(ctx):
+    amostras = {
+        "ATIVOS": pd.DataFrame({"MATRICULA": [1], "SINDICATO": ["SINDPD SP"]}),
+        "ADMISSAO": pd.DataFrame({"MATRICULA": [1, 2], "ADMISSAO": pd.to_datetime(["2025-06-02", "2025-06-03"])}),
+        "EXTERIOR": pd.DataFrame(),
+    }
+    file_report = {"ATIVOS": "ATIVOS.xlsx", "ADMISSAO": "ADMISSAO.xlsx", "EXTERIOR": "Não encontrado"}
+
+    erros, avisos = ValidatorAgent().preflight(amostras, file_report, ctx)
+
+    assert any("TITULO DO CARGO" in e for e in erros)
+    assert any("ADMISSAO" in e and "mês diferente" in e for e in erros)
+    assert avisos == ["Arquivo da base 'EXTERIOR' não encontrado."]
+
+
+def test_preflight_sem_problemas(ctx):
+    amostras = {
+        "ATIVOS": pd.DataFrame({"MATRICULA": [1], "TITULO DO CARGO": ["ANALISTA"], "SINDICATO": ["SINDPD SP"]}),
+        "ADMISSAO": pd.DataFrame({"MATRICULA": [1], "ADMISSAO": pd.to_datetime(["2025-04-10"])}),
+    }
+    file_report = {"ATIVOS": "ATIVOS.xlsx", "ADMISSAO": "ADMISSAO.xlsx"}
+
+    assert ValidatorAgent().preflight(amostras, file_report, ctx) == ([], [])
+
+
+def test_motor_de_regras_gera_tabela_de_violacoes(ctx):
+    bases = {
+        "ATIVOS": pd.DataFrame({"MATRICULA": [1, 2, 2]}),
+        "DESLIGADOS": pd.DataFrame({"MATRICULA": [1, 9]}),
+        "ADMISSAO": pd.DataFrame({"MATRICULA": [1, 2], "ADMISSAO": pd.to_datetime(["2025-04-10", "2025-03-02"])}),
+        "FERIAS": pd.DataFrame({"MATRICULA": [1, 2], "DIAS DE FÉRIAS": [10, 40]}),
+    }
+    engine = RuleEngine([
+        {"regra": "unica", "base": "ATIVOS", "coluna": "MATRICULA"},
+        {"regra": "referencia", "base": "DESLIGADOS", "coluna": "MATRICULA", "referencia": "ATIVOS"},
+        {"regra": "intervalo_datas", "base": "ADMISSAO", "coluna": "ADMISSAO", "inicio": "periodo_eventos_ini", "fim": "periodo_eventos_fim"},
+        {"regra": "intervalo_numerico", "base": "FERIAS", "coluna": "DIAS DE FÉRIAS", "min": 0, "max": 30, "nivel": "erro"},
+    ])
+
+    mensagens, violacoes = engine.run(bases, ctx)
+
+    assert len(mensagens) == 4
+    assert mensagens[-1].startswith("ERRO:")
+    assert violacoes.groupby("REGRA")["MATRICULA"].apply(list).to_dict() == {
+        "intervalo_datas": [2], "intervalo_numerico": [2], "referencia": [9], "unica": [2, 2],
+    }
+
+
+def test_motor_de_regras_rejeita_tipo_desconhecido():
+    with pytest.raises(ValueError):
+        RuleEngine([{"regra": "inexistente", "base": "ATIVOS"}])
+
+
+def test_sindicato_sem_uf_gera_aviso(ctx):
+    bases = {"ATIVOS": pd.DataFrame({
+        "MATRICULA": [1, 2], "TITULO DO CARGO": ["ANALISTA", "ANALISTA"], "SINDICATO": ["SINDPD SP", "SINDICATO SEM ESTADO"],
+    })}
+    validator = ValidatorAgent()
+
+    _, avisos = validator.execute(bases, ctx)
+
+    assert any("sem UF identificada" in a and "SINDICATO SEM ESTADO" in a for a in avisos)
+    assert validator.violations.query("REGRA == 'sindicato_sem_uf'")["MATRICULA"].tolist() == [2]
+
+
+def test_sind_valor_com_cabecalho_fora_do_padrao(ctx, tmp_path):
+    # As duas primeiras colunas são renomeadas pela posição para ESTADO e VALOR
+    pd.DataFrame({"UF / Estado": ["São Paulo", "Rio de Janeiro"], "Valor diário (R$)": [37.5, 35.0]}).to_excel(
+        tmp_path / "Base sindicato x valor.xlsx", index=False
+    )
+    bases, _ = CollectorAgent({
+        "arquivos_entrada": {"sind_valor": "Base sindicato x valor"}, "cache_coleta": {"habilitado": False},
+    }).execute(str(tmp_path))
+    validator = ValidatorAgent()
+
+    preparadas, _ = validator.execute(bases, ctx)
+
+    assert preparadas["SIND_VALOR"].to_dict("list") == {"ESTADO": ["São Paulo", "Rio de Janeiro"], "VALOR": [37.5, 35.0]}
+    assert validator.preflight(bases, {"SIND_VALOR": "Base sindicato x valor.xlsx"}, ctx) == ([], [])
+    with pytest.raises(ValueError, match="VALOR"):
+        validator.execute({"SIND_VALOR": pd.DataFrame({"ESTADO": ["São Paulo"]})}, ctx)
@@ -0,0 +1,79 @@
+import os
+import sys
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Alignment, Font, PatternFill
+from pandas.io.excel._openpyxl import OpenpyxlWriter
+from pandas.io.formats.excel import ExcelFormatter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from agents.xlsx_writer import FORMATO_DATA, StreamingXlsxWriter
+
+
+def test_escrita_em_passada_unica(tmp_path, monkeypatch):
+    monkeypatch.setattr(StreamingXlsxWriter, "LINHAS_POR_BLOCO", 2)
+    df = pd.DataFrame({
+        "Matricula": pd.array([1, 2, None], dtype="Int64"),
+        "Admissão": pd.to_datetime(["2025-04-10", None, "2025-04-30"]),
+        "Sindicato": pd.Categorical(["SP", None, "RJ"]),
+        "TOTAL": [10.5, float("nan"), 0.0],
+    })
+    out = tmp_path / "saida.xlsx"
+    with StreamingXlsxWriter(str(out)) as w:
+        w.aba("VR MENSAL 05.2025", df, cabecalho_estilizado=True)
+        w.aba("Validações", pd.DataFrame({"Validações": ["A"], "Check": [1]}))
+
+    wb = openpyxl.load_workbook(out)
+    assert wb.sheetnames == ["VR MENSAL 05.2025", "Validações"]
+    ws = wb["VR MENSAL 05.2025"]
+    assert [c.value for c in ws[1]] == ["Matricula", "Admissão", "Sindicato", "TOTAL"]
+    assert all(c.font.b and c.font.sz == 8 and c.fill.fill_type == "solid" for c in ws[1])
+    assert [[c.value for c in linha] for linha in ws.iter_rows(min_row=2)] == [
+        [1, pd.Timestamp("2025-04-10").to_pydatetime(), "SP", 10.5],
+        [2, None, None, None],
+        [None, pd.Timestamp("2025-04-30").to_pydatetime(), "RJ", 0],
+    ]
+    assert ws["B2"].number_format == FORMATO_DATA
+
+
+# ExcelFormatter.header_style do pandas 2.x; o pandas 3 deixou de estilizar o cabeçalho
+ESTILO_CABECALHO_PANDAS = {
+    "font": {"bold": True},
+    "borders": {"top": "thin", "right": "thin", "bottom": "thin", "left": "thin"},
+    "alignment": {"horizontal": "center", "vertical": "top"},
+}
+
+
+def _estilo(cell) -> tuple:
+    return (
+        cell.font.b, cell.font.name, cell.font.sz, cell.font.color.rgb if cell.font.color else None, cell.fill.fill_type,
+        tuple(getattr(cell.border, lado).style for lado in ("left", "right", "top", "bottom")),
+        cell.alignment.horizontal, cell.alignment.vertical,
+    )
+
+
+def test_cabecalho_igual_ao_do_excel_writer(tmp_path):
+    df = pd.DataFrame({"Matricula": [1], "TOTAL": [10.5]})
+    referencia = tmp_path / "referencia.xlsx"
+    # Como o relatório gravava antes: pd.ExcelWriter e, na aba principal, fonte e fundo trocados por cima
+    with pd.ExcelWriter(referencia, engine="openpyxl") as w:
+        for nome in ("VR MENSAL 05.2025", "Validações"):
+            df.to_excel(w, sheet_name=nome, index=False)
+            for cell in w.sheets[nome][1]:
+                if not hasattr(ExcelFormatter, "header_style"):
+                    for atributo, valor in OpenpyxlWriter._convert_to_style_kwargs(ESTILO_CABECALHO_PANDAS).items():
+                        setattr(cell, atributo, valor)
+                if nome.startswith("VR MENSAL"):
+                    cell.font = Font(name="Calibri", size=8, bold=True, color="FFFFFF")
+                    cell.fill = PatternFill(start_color="000000", end_color="000000", fill_type="solid")
+                    cell.alignment = Alignment(horizontal="center", vertical="center")
+    out = tmp_path / "saida.xlsx"
+    with StreamingXlsxWriter(str(out)) as w:
+        w.aba("VR MENSAL 05.2025", df, cabecalho_estilizado=True)
+        w.aba("Validações", df)
+
+    esperado, obtido = openpyxl.load_workbook(referencia), openpyxl.load_workbook(out)
+    for nome in esperado.sheetnames:
+        assert [_estilo(c) for c in obtido[nome][1]] == [_estilo(c) for c in esperado[nome][1]]
+    assert obtido["Validações"]["A1"].font.b and obtido["VR MENSAL 05.2025"]["A1"].border.left.style == "thin"